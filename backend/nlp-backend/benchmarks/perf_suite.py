@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+"""
+Performance benchmarks for model loading, providers, services and endpoints
+
+Runs offline on CPU. By default it benchmarks tiny randomly initialized
+models (see tiny_models.py), which measures the serving code and catches
+regressions in it; `--models configured` uses the production models from
+the local Hugging Face cache instead.
+
+Usage:
+    python benchmarks/perf_suite.py                                   # everything, tiny models
+    python benchmarks/perf_suite.py --groups provider endpoint        # some groups
+    python benchmarks/perf_suite.py --output results.json             # save results
+    python benchmarks/perf_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/perf_suite.py --baseline benchmarks/baseline.json --threshold 0.3
+    python benchmarks/perf_suite.py --baseline benchmarks/baseline.json \\
+        --threshold-for endpoint.summarize=1.0
+
+Groups:
+    - cold_start: `import main` in a fresh interpreter, load time of each
+      model and of main.load_models()
+    - provider: single and batched inference latency per provider
+    - service: service overhead (post-processing, validation, cache hits)
+      measured with the model output replayed instantly
+    - endpoint: end-to-end latency and throughput through the ASGI app with
+      concurrent requests (rate limits and result caching disabled)
+
+With --baseline, p50 latency and throughput are compared against the
+baseline and the script exits with status 1 if any benchmark regressed by
+more than its threshold (a fraction: 0.3 = 30% slower, default 0.5).
+Baselines are machine-specific: the committed baseline.json was recorded
+with tiny models and `--threads 2`; record your own on the box that gates
+changes.
+"""
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+# Allow running from the backend directory or from benchmarks/
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from tiny_models import TRANSLATION_PAIR, build_tiny_models
+
+GROUPS = ["cold_start", "provider", "service", "endpoint"]
+
+# Metric name -> True if lower is better
+REGRESSION_METRICS = {"p50_ms": True, "throughput_per_s": False}
+
+SHORT_TEXT = "I love this product, it works perfectly."
+MEDIUM_TEXT = "Tim Cook is the CEO of Apple Inc, which is located in Cupertino, California. " * 4
+LONG_TEXT = "The weather was mild and the roads were quiet that day in California. " * 120
+
+
+def summarize_samples(samples_ms: List[float], items: int = 1) -> Dict[str, float]:
+    """Latency statistics (and items per second) for a list of timings"""
+    ordered = sorted(samples_ms)
+    mean = statistics.fmean(ordered)
+    return {
+        "iterations": len(ordered),
+        "mean_ms": round(mean, 3),
+        "p50_ms": round(ordered[len(ordered) // 2], 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "throughput_per_s": round(items * 1000 / mean, 2) if mean else 0.0,
+    }
+
+
+def time_calls(fn: Callable, iterations: int, warmup: int = 2) -> List[float]:
+    """Call `fn` repeatedly and return the duration of each call in ms"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def configure_models(api, models: str, model_dir: str):
+    """Point the app's providers at the tiny models (or keep the configured ones)"""
+    if models != "tiny":
+        return
+    paths = build_tiny_models(model_dir)
+    api.sentiment_model.model_name = paths["sentiment"]
+    api.ner_model.model_name = paths["ner"]
+    api.paraphrase_model.model_name = paths["paraphrase"]
+    api.summarization_model.model_name = paths["summarization"]
+    api.translation_model.model_name = paths["translation"]
+
+
+def time_import_main() -> float:
+    """Seconds to `import main` in a fresh interpreter"""
+    code = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def bench_cold_start(api) -> Dict[str, dict]:
+    """Time importing main, loading each model, then main.load_models() as a whole"""
+    results = {"cold_start.import_main": summarize_samples([time_import_main() * 1000])}
+    for name in ("sentiment", "ner", "paraphrase", "summarization"):
+        provider = getattr(api, f"{name}_model")
+        provider.pipeline = None
+        start = time.perf_counter()
+        provider.load_model()
+        results[f"cold_start.{name}"] = summarize_samples([(time.perf_counter() - start) * 1000])
+
+    # Start from an empty translation cache so the pair is really loaded
+    from lib.providers.model_cache import ModelCache
+    model_cache = api.translation_model.model_cache
+    api.translation_model.model_cache = ModelCache(model_cache.max_bytes, idle_seconds=model_cache.idle_seconds)
+    start = time.perf_counter()
+    api.translation_model.load_model(*TRANSLATION_PAIR)
+    results["cold_start.translation_pair"] = summarize_samples([(time.perf_counter() - start) * 1000])
+
+    for name in ("sentiment", "ner", "paraphrase", "summarization"):
+        getattr(api, f"{name}_model").pipeline = None
+    start = time.perf_counter()
+    api.load_models()
+    results["cold_start.load_models"] = summarize_samples([(time.perf_counter() - start) * 1000])
+    return results
+
+
+def bench_providers(api, iterations: int) -> Dict[str, dict]:
+    """Single and batched inference latency per provider"""
+    generation_iterations = max(3, iterations // 4)
+    batch = [SHORT_TEXT, MEDIUM_TEXT, "Bad.", "This is the product I hate."] * 8
+    src, tgt = TRANSLATION_PAIR
+
+    cases = [
+        ("provider.sentiment.single", lambda: api.sentiment_model.predict(SHORT_TEXT), iterations, 1),
+        ("provider.sentiment.batch32", lambda: api.sentiment_model.predict_batch(batch, 32), iterations, len(batch)),
+        ("provider.ner.single", lambda: api.ner_model.predict(MEDIUM_TEXT), iterations, 1),
+        ("provider.ner.long", lambda: api.ner_model.predict(LONG_TEXT), iterations, 1),
+        ("provider.translation.single", lambda: api.translation_model.predict(SHORT_TEXT, src, tgt), generation_iterations, 1),
+        ("provider.paraphrase.single", lambda: api.paraphrase_model.predict(SHORT_TEXT), generation_iterations, 1),
+        ("provider.summarization.single", lambda: api.summarization_model.predict(MEDIUM_TEXT), generation_iterations, 1),
+        ("provider.summarization.batch8", lambda: api.summarization_model.predict_batch([MEDIUM_TEXT] * 8, 8), generation_iterations, 8),
+    ]
+    return {name: summarize_samples(time_calls(fn, n), items) for name, fn, n, items in cases}
+
+
+class ReplayPipeline:
+    """Returns a recorded pipeline output instantly, isolating service overhead"""
+
+    def __init__(self, pipeline, text: str):
+        self.tokenizer = pipeline.tokenizer
+        self.model = pipeline.model
+        self.output = pipeline(text)
+
+    def __call__(self, *args, **kwargs):
+        return self.output
+
+
+def bench_services(api, iterations: int) -> Dict[str, dict]:
+    """Service-layer overhead with the model output replayed"""
+    from lib.cache import ResultCache
+
+    def replayed(service, text):
+        provider = copy.copy(service.model_provider)
+        provider.pipeline = ReplayPipeline(service.model_provider.pipeline, text)
+        replay = copy.copy(service)
+        replay.model_provider = provider
+        replay.cache = None
+        return replay
+
+    sentiment = replayed(api.sentiment_service, SHORT_TEXT)
+    ner = replayed(api.ner_service, MEDIUM_TEXT)
+    paraphrase = replayed(api.paraphrase_service, SHORT_TEXT)
+    summarization = replayed(api.summarization_service, MEDIUM_TEXT)
+
+    cached = copy.copy(sentiment)
+    cached.cache = ResultCache(max_bytes=1024 * 1024)
+    cached.analyze_sentiment(SHORT_TEXT)
+
+    iterations *= 10  # These calls are fast, so take more samples
+    cases = [
+        ("service.sentiment", lambda: sentiment.analyze_sentiment(SHORT_TEXT)),
+        ("service.sentiment.cache_hit", lambda: cached.analyze_sentiment(SHORT_TEXT)),
+        ("service.ner", lambda: ner.extract_entities(MEDIUM_TEXT)),
+        ("service.paraphrase", lambda: paraphrase.paraphrase(SHORT_TEXT)),
+        ("service.summarization", lambda: summarization.summarize(MEDIUM_TEXT)),
+    ]
+    return {name: summarize_samples(time_calls(fn, iterations)) for name, fn in cases}
+
+
+async def _run_endpoint(client, path: str, body: dict, requests: int, concurrency: int) -> dict:
+    """Send `requests` POSTs with up to `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.text}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - start
+
+    stats = summarize_samples(latencies)
+    stats["throughput_per_s"] = round(requests / wall, 2)
+    stats["concurrency"] = concurrency
+    return stats
+
+
+def bench_endpoints(api, requests: int, concurrency: int) -> Dict[str, dict]:
+    """End-to-end latency and throughput through the ASGI app"""
+    import httpx
+    from lib.rate_limiter import cost_limiter, limiter
+
+    src, tgt = TRANSLATION_PAIR
+    generation_requests = max(concurrency, requests // 4)
+    cases = [
+        ("endpoint.analyze", "/analyze", {"text": SHORT_TEXT}, requests),
+        ("endpoint.ner", "/ner", {"text": MEDIUM_TEXT}, requests),
+        ("endpoint.translate", "/translate", {"text": SHORT_TEXT, "source_lang": src, "target_lang": tgt}, generation_requests),
+        ("endpoint.paraphrase", "/paraphrase", {"text": SHORT_TEXT}, generation_requests),
+        ("endpoint.summarize", "/summarize", {"text": MEDIUM_TEXT}, generation_requests),
+    ]
+
+    services = [api.sentiment_service, api.ner_service, api.translation_service,
+                api.paraphrase_service, api.summarization_service]
+    saved_caches = [service.cache for service in services]
+    limiter.enabled = False
+    cost_limiter.enabled = False
+    for service in services:
+        service.cache = None
+
+    async def run():
+        results = {}
+        async with httpx.AsyncClient(app=api.app, base_url="http://bench") as client:
+            for name, path, body, n in cases:
+                await _run_endpoint(client, path, body, concurrency, concurrency)  # Warm-up
+                results[name] = await _run_endpoint(client, path, body, n, concurrency)
+        return results
+
+    try:
+        return asyncio.run(run())
+    finally:
+        limiter.enabled = True
+        cost_limiter.enabled = True
+        for service, cache in zip(services, saved_caches):
+            service.cache = cache
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    threshold: float,
+    overrides: Optional[Dict[str, float]] = None
+) -> List[str]:
+    """
+    Compare results with a baseline
+
+    Args:
+        results: Benchmark name -> metrics for this run
+        baseline: Benchmark name -> metrics from the baseline run
+        threshold: Allowed slowdown as a fraction (0.25 = 25%)
+        overrides: Per-benchmark thresholds, matched by name prefix
+
+    Returns:
+        A description of each regression (empty if none)
+    """
+    overrides = overrides or {}
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        if name not in baseline:
+            continue
+        allowed = threshold
+        for prefix, value in overrides.items():
+            if name.startswith(prefix):
+                allowed = value
+        for metric, lower_is_better in REGRESSION_METRICS.items():
+            old = baseline[name].get(metric)
+            new = metrics.get(metric)
+            if not old or new is None:
+                continue
+            slowdown = (new - old) / old if lower_is_better else (old - new) / old
+            if slowdown > allowed:
+                regressions.append(
+                    f"{name} {metric}: {old} -> {new} ({slowdown:+.0%} worse, allowed {allowed:.0%})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=GROUPS)
+    parser.add_argument("--models", choices=["tiny", "configured"], default="tiny",
+                        help="Tiny generated models (default) or the app's configured models")
+    parser.add_argument("--model-dir", default=os.path.join(tempfile.gettempdir(), "nlp-bench-models"),
+                        help="Where tiny models are built and reused")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per provider benchmark")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per endpoint benchmark")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent requests per endpoint benchmark")
+    parser.add_argument("--threads", type=int, help="Torch CPU threads (pin for stable numbers)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--save-baseline", help="Write the results as the new baseline to this file")
+    parser.add_argument("--baseline", help="Compare against this baseline and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Allowed slowdown before failing, as a fraction (default 0.5)")
+    parser.add_argument("--threshold-for", action="append", default=[], metavar="PREFIX=FRACTION",
+                        help="Threshold for benchmarks whose name starts with PREFIX")
+    args = parser.parse_args(argv)
+
+    if args.models == "configured":
+        # Only use models already in the local cache
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    logging.basicConfig(level=logging.WARNING)
+
+    import torch
+    import transformers
+    transformers.logging.set_verbosity_error()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    import main as api
+    logging.getLogger().setLevel(logging.WARNING)
+    configure_models(api, args.models, args.model_dir)
+
+    results: Dict[str, dict] = {}
+    if "cold_start" in args.groups:
+        print("Benchmarking cold start...")
+        results.update(bench_cold_start(api))
+    else:
+        api.load_models()
+    if "provider" in args.groups:
+        print("Benchmarking providers...")
+        results.update(bench_providers(api, args.iterations))
+    if "service" in args.groups:
+        print("Benchmarking services...")
+        results.update(bench_services(api, args.iterations))
+    if "endpoint" in args.groups:
+        print("Benchmarking endpoints...")
+        results.update(bench_endpoints(api, args.requests, args.concurrency))
+
+    print()
+    print(f"{'benchmark':<32}{'p50 ms':>10}{'p95 ms':>10}{'per s':>10}")
+    for name, row in results.items():
+        print(f"{name:<32}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['throughput_per_s']:>10}")
+
+    report = {
+        "meta": {
+            "models": args.models,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "transformers": transformers.__version__,
+            "machine": platform.machine(),
+            "threads": torch.get_num_threads(),
+        },
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("models") != args.models:
+            print(f"\nWarning: baseline was recorded with {baseline['meta'].get('models')} models")
+        overrides = {prefix: float(value) for prefix, value in (item.split("=", 1) for item in args.threshold_for)}
+        regressions = compare(results, baseline["results"], args.threshold, overrides)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Compare fp32 and dynamic int8 models on a small fixed evaluation set
+
+Used to decide, per task, whether to enable QUANTIZE_MODELS in production.
+
+Usage:
+    python benchmarks/quantization_eval.py                        # all tasks
+    python benchmarks/quantization_eval.py --tasks sentiment ner  # some tasks
+    python benchmarks/quantization_eval.py --model ner=/path/to/local/model
+    python benchmarks/quantization_eval.py --output quantization.json
+
+For each task and mode it reports mean latency per input, serialized model
+size and a quality score:
+    - sentiment: label accuracy against the gold labels in eval_set.json
+    - ner: entity-level F1 against the gold entities in eval_set.json
+    - summarization / paraphrase: token-overlap F1 of the int8 output
+      against the fp32 output (agreement, since there is no single gold text)
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+# Allow running from the backend directory or from benchmarks/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lib.providers.model_providers import (
+    SentimentModelProvider,
+    NERModelProvider,
+    ParaphraseModelProvider,
+    SummarizationModelProvider,
+)
+from lib.services import SentimentService, NERService, ParaphraseService, SummarizationService
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(__file__), "eval_set.json")
+
+TASKS = {
+    "sentiment": (SentimentModelProvider, SentimentService),
+    "ner": (NERModelProvider, NERService),
+    "summarization": (SummarizationModelProvider, SummarizationService),
+    "paraphrase": (ParaphraseModelProvider, ParaphraseService),
+}
+
+
+def model_size_mb(provider) -> float:
+    """Size of the model's serialized state dict (captures packed int8 weights)"""
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(provider.pipeline.model.state_dict(), buffer)
+    return round(buffer.tell() / (1024 * 1024), 1)
+
+
+def token_f1(prediction: str, reference: str) -> float:
+    """Bag-of-tokens F1 between two texts"""
+    pred_tokens = prediction.lower().split()
+    ref_tokens = reference.lower().split()
+    if not pred_tokens or not ref_tokens:
+        return float(pred_tokens == ref_tokens)
+    common = 0
+    remaining = list(ref_tokens)
+    for token in pred_tokens:
+        if token in remaining:
+            remaining.remove(token)
+            common += 1
+    if common == 0:
+        return 0.0
+    precision = common / len(pred_tokens)
+    recall = common / len(ref_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_task(task: str, service, examples: list) -> tuple:
+    """Run every example through the service, returning (outputs, mean latency ms)"""
+    outputs = []
+    start = time.perf_counter()
+    for example in examples:
+        if task == "sentiment":
+            outputs.append(service.analyze_sentiment(example["text"]).sentiment)
+        elif task == "ner":
+            response = service.extract_entities(example["text"])
+            outputs.append({(e.text, e.label) for e in response.entities})
+        elif task == "summarization":
+            outputs.append(service.summarize(example).summary_text)
+        else:
+            outputs.append(service.paraphrase(example).paraphrased_text)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return outputs, elapsed_ms / len(examples)
+
+
+def score(task: str, examples: list, outputs: list, reference_outputs: list) -> float:
+    """Quality score for one mode (see module docstring)"""
+    if task == "sentiment":
+        correct = sum(out == ex["label"] for out, ex in zip(outputs, examples))
+        return correct / len(examples)
+    if task == "ner":
+        true_positives = predicted = gold = 0
+        for out, ex in zip(outputs, examples):
+            expected = {tuple(entity) for entity in ex["entities"]}
+            true_positives += len(out & expected)
+            predicted += len(out)
+            gold += len(expected)
+        precision = true_positives / predicted if predicted else 0.0
+        recall = true_positives / gold if gold else 0.0
+        return 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return sum(token_f1(o, r) for o, r in zip(outputs, reference_outputs)) / len(outputs)
+
+
+def evaluate(task: str, examples: list, model_name: str = None) -> list:
+    """Evaluate fp32 then int8 for one task and return a result row per mode"""
+    provider_cls, service_cls = TASKS[task]
+    rows = []
+    reference_outputs = None
+
+    for quantize in (False, True):
+        kwargs = {"quantize": quantize}
+        if model_name:
+            kwargs["model_name"] = model_name
+        provider = provider_cls(**kwargs)
+        provider.load_model()
+        service = service_cls(provider)
+
+        # One untimed pass so lazy initialization doesn't count as latency
+        run_task(task, service, examples[:1])
+        outputs, latency_ms = run_task(task, service, examples)
+        if reference_outputs is None:
+            reference_outputs = outputs
+
+        rows.append({
+            "task": task,
+            "mode": "int8" if quantize else "fp32",
+            "model": provider.model_name,
+            "latency_ms": round(latency_ms, 1),
+            "size_mb": model_size_mb(provider),
+            "quality": round(score(task, examples, outputs, reference_outputs), 3),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", nargs="+", choices=sorted(TASKS), default=sorted(TASKS))
+    parser.add_argument("--model", action="append", default=[], metavar="TASK=NAME",
+                        help="Override the model for a task (hub name or local path)")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    model_overrides = dict(item.split("=", 1) for item in args.model)
+    with open(EVAL_SET_PATH) as f:
+        eval_set = json.load(f)
+
+    results = []
+    for task in args.tasks:
+        print(f"Evaluating {task}...")
+        results.extend(evaluate(task, eval_set[task], model_overrides.get(task)))
+
+    print()
+    print(f"{'task':<15}{'mode':<7}{'latency ms':>12}{'size MB':>10}{'quality':>10}")
+    for row in results:
+        print(f"{row['task']:<15}{row['mode']:<7}{row['latency_ms']:>12}{row['size_mb']:>10}{row['quality']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
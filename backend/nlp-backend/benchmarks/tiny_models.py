@@ -0,0 +1,104 @@
+"""
+Build tiny, randomly initialized models for offline benchmarking
+
+The models have the same architectures and pipeline tasks as the production
+models (BERT classifiers for sentiment and NER, BART for the generation
+tasks) but only a few thousand parameters, so they are built in seconds
+without network access. Their outputs are meaningless; they exist to
+measure the serving code around the models and to catch regressions in it.
+"""
+import os
+import string
+from typing import Dict
+
+# Translation models are looked up as "<prefix>-<src>-<tgt>", like opus-mt
+TRANSLATION_PAIR = ("en", "fr")
+
+
+def build_tiny_models(root: str) -> Dict[str, str]:
+    """
+    Create the tiny models under `root` (skipped if they already exist)
+
+    Returns:
+        Mapping of task to model path: sentiment, ner, paraphrase and
+        summarization paths are loadable directly; translation is the
+        prefix a TranslationModelProvider expects as its `model_name`
+    """
+    paths = {
+        "sentiment": os.path.join(root, "sentiment"),
+        "ner": os.path.join(root, "ner"),
+        "paraphrase": os.path.join(root, "seq2seq"),
+        "summarization": os.path.join(root, "seq2seq"),
+        "translation": os.path.join(root, "opus-mt"),
+    }
+    translation_dir = f"{paths['translation']}-{TRANSLATION_PAIR[0]}-{TRANSLATION_PAIR[1]}"
+    if all(os.path.exists(os.path.join(p, "config.json")) for p in (paths["sentiment"], paths["ner"], paths["paraphrase"], translation_dir)):
+        return paths
+
+    from transformers import (
+        BartConfig,
+        BartForConditionalGeneration,
+        BertConfig,
+        BertForSequenceClassification,
+        BertForTokenClassification,
+        BertTokenizerFast,
+    )
+
+    os.makedirs(root, exist_ok=True)
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    words += list(string.ascii_lowercase) + list(string.ascii_uppercase) + list(".,!?'")
+    words += ["##" + c for c in string.ascii_lowercase]
+    words += "i love this hate it is the a product apple inc located in cupertino california tim cook good bad".split()
+    vocab_file = os.path.join(root, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(dict.fromkeys(words)))
+    tokenizer = BertTokenizerFast(vocab_file, do_lower_case=False, model_max_length=512)
+
+    encoder = dict(
+        vocab_size=len(tokenizer),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=37,
+        max_position_embeddings=512,
+    )
+
+    sentiment_labels = ["negative", "neutral", "positive"]
+    model = BertForSequenceClassification(BertConfig(
+        **encoder,
+        id2label=dict(enumerate(sentiment_labels)),
+        label2id={label: i for i, label in enumerate(sentiment_labels)},
+    ))
+    model.save_pretrained(paths["sentiment"])
+    tokenizer.save_pretrained(paths["sentiment"])
+
+    ner_labels = ["O", "B-PER", "I-PER", "B-ORG", "I-ORG", "B-LOC", "I-LOC"]
+    model = BertForTokenClassification(BertConfig(
+        **encoder,
+        id2label=dict(enumerate(ner_labels)),
+        label2id={label: i for i, label in enumerate(ner_labels)},
+    ))
+    model.save_pretrained(paths["ner"])
+    tokenizer.save_pretrained(paths["ner"])
+
+    seq2seq_tokenizer = BertTokenizerFast(vocab_file, do_lower_case=False, model_max_length=1024)
+    model = BartForConditionalGeneration(BartConfig(
+        vocab_size=len(tokenizer),
+        d_model=32,
+        encoder_layers=1,
+        decoder_layers=1,
+        encoder_attention_heads=2,
+        decoder_attention_heads=2,
+        encoder_ffn_dim=37,
+        decoder_ffn_dim=37,
+        max_position_embeddings=1024,
+        pad_token_id=0,
+        bos_token_id=2,
+        eos_token_id=3,
+        decoder_start_token_id=2,
+    ))
+    for path in (paths["paraphrase"], translation_dir):
+        model.save_pretrained(path)
+        seq2seq_tokenizer.save_pretrained(path)
+
+    return paths
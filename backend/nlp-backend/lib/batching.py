@@ -0,0 +1,102 @@
+"""
+Dynamic micro-batching for concurrent inference requests
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests into a single batched model call
+
+    Items submitted while a batch is pending are grouped together until either
+    `max_batch_size` items are waiting or `max_wait_ms` has passed since the
+    first one arrived. The whole group is then passed to `batch_fn` in one call
+    and every caller receives the result at its own position.
+
+    `run_in_executor` decides where the blocking `batch_fn` runs; pass a
+    provider's `run_in_executor` to use its inference thread pool. The event
+    loop's default executor is used otherwise.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        run_in_executor: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        self.batch_fn = batch_fn
+        self.run_in_executor = run_in_executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item for the next batch and wait for its result
+
+        Args:
+            item: The input to pass to the batch function
+
+        Returns:
+            The batch function's output for this item
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Pending state belongs to the loop that created it
+            self._loop = loop
+            self._pending = []
+            self._flush_handle = None
+
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send everything pending as one batch"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = self._loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Run the batch function off the event loop and fan results back out"""
+        items = [item for item, _ in batch]
+        try:
+            if self.run_in_executor is not None:
+                results = await self.run_in_executor(self.batch_fn, items)
+            else:
+                results = await self._loop.run_in_executor(None, self.batch_fn, items)
+            if len(results) != len(items):
+                raise ValueError(f"Batch returned {len(results)} results for {len(items)} inputs")
+        except Exception as e:
+            logger.error(f"Batched inference failed for {len(items)} items: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # Callers that went away (e.g. client disconnect) are skipped
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,212 @@
+"""
+In-process result cache for NLP service responses
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from lib.persistent_cache import SQLiteResultStore
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize text so trivially different inputs share a cache entry
+
+    Only the Unicode form is normalized: whitespace is kept, since responses
+    echo the input (e.g. NERResponse.text) and entity offsets index into it.
+    """
+    return unicodedata.normalize("NFC", text)
+
+
+def make_cache_key(task: str, model_id: str, params: Dict[str, Any], text: str) -> str:
+    """
+    Build a content-addressed cache key
+
+    Args:
+        task: Task name (e.g. "sentiment", "summarization")
+        model_id: Model name/version that produced the result
+        params: Generation or request parameters that affect the output
+        text: The input text (normalized before hashing)
+
+    Returns:
+        SHA-256 hex digest identifying the result
+    """
+    payload = json.dumps(
+        {"task": task, "model": model_id, "params": params, "text": normalize_text(text)},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache for JSON-serializable results
+
+    - Bounded by the total size of the serialized values (`max_bytes`)
+    - Entries older than `ttl_seconds` are treated as misses (None = no expiry)
+    - Counts hits and misses for monitoring
+    - Optionally backed by a persistent `store` shared across workers:
+      memory misses fall through to it and every write goes to both
+      (get_async/set_async keep the store's blocking I/O off the event loop)
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        store: Optional["SQLiteResultStore"] = None
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._size_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Total serialized size of all cached values"""
+        return self._size_bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for `key`, or None on a miss"""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        stored = self.store.lookup(key) if self.store is not None else None
+        return self._promote(key, stored)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Like get, but reads the persistent store on the default executor"""
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        stored = None
+        if self.store is not None:
+            stored = await asyncio.get_running_loop().run_in_executor(None, self.store.lookup, key)
+        return self._promote(key, stored)
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        """Return the in-memory value for `key` (counted as a hit), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size_bytes, stored_at = entry
+            if self.ttl_seconds is None or self.clock() - stored_at <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            # Expired
+            del self._entries[key]
+            self._size_bytes -= size_bytes
+            return None
+
+    def _promote(self, key: str, stored: Optional[Tuple[Any, float]]) -> Optional[Any]:
+        """
+        Count a memory miss, copying a (value, created_at) found in the store
+        into memory
+        """
+        if stored is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        value, created_at = stored
+        self._set_memory(key, value, age=time.time() - created_at)
+        with self._lock:
+            self.hits += 1
+            self.store_hits += 1
+        return value
+
+    def set(self, key: str, value: Any, task: str = "", model_id: str = ""):
+        """
+        Store a JSON-serializable value, evicting old entries to stay in budget
+
+        `task` and `model_id` are recorded in the persistent store (if any) so
+        results can be invalidated when a model changes.
+        """
+        self._set_memory(key, value)
+        if self.store is not None:
+            self.store.set(key, value, task, model_id)
+
+    async def set_async(self, key: str, value: Any, task: str = "", model_id: str = ""):
+        """Like set, but writes the persistent store on the default executor"""
+        self._set_memory(key, value)
+        if self.store is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.set, key, value, task, model_id)
+
+    def warm(self, limit: int) -> int:
+        """
+        Pre-load the most frequently hit entries from the persistent store
+
+        Returns:
+            Number of entries loaded into memory
+        """
+        if self.store is None or limit <= 0:
+            return 0
+        entries = self.store.hottest(limit)
+        # Load coldest first so the hottest end up most recently used
+        now = time.time()
+        for key, value, created_at in reversed(entries):
+            self._set_memory(key, value, age=now - created_at)
+        logger.info(f"Warm-loaded {len(entries)} cached results from persistent store")
+        return len(entries)
+
+    def _set_memory(self, key: str, value: Any, age: float = 0.0):
+        """
+        Store a value in the in-memory tier only
+
+        `age` is how many seconds ago the value was computed (for values
+        copied from the store), so it expires on the original schedule.
+        """
+        size_bytes = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size_bytes > self.max_bytes:
+            # Never worth evicting everything else for one oversized result
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size_bytes -= previous[1]
+            self._entries[key] = (value, size_bytes, self.clock() - max(0.0, age))
+            self._size_bytes += size_bytes
+
+            while self._size_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._size_bytes -= evicted_size
+
+    def clear(self):
+        """Remove every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "store_hits": self.store_hits,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": len(self._entries),
+            "size_bytes": self._size_bytes,
+        }
@@ -0,0 +1,574 @@
+"""
+Background bulk jobs over JSONL corpora
+
+A job is a corpus of texts (one JSON object per line) and a task. It is
+stored in its own directory under the jobs directory:
+
+    <job_id>/input.jsonl    validated input, one {"text": ..., "id": ...} per line
+    <job_id>/results.jsonl  one result (or error) per input line, in input order
+    <job_id>/job.json       status and checkpoint
+
+Jobs are processed in the background, oldest first, a batch at a time
+through the same services as the interactive endpoints. After every batch
+the results are flushed to disk and the checkpoint (lines done and byte
+offsets into both files) is saved, so a restarted server resumes a job
+where it stopped instead of starting over.
+
+Jobs run at lower priority than interactive requests: a batch is only
+started when the task's model has no other calls queued or running, so an
+interactive request waits at most for the one job batch in progress.
+
+Each job is claimed with a file lock while it runs, so several worker
+processes (see serve_prefork.py) can share one jobs directory without
+running the same job twice.
+
+The line parsing, batch running and result format are shared with the
+NDJSON endpoint, which streams results back instead (see stream_results).
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from lib.models import TextInput
+from lib.providers.admission import ModelOverloaded
+from lib.providers.model_providers import ModelProvider
+from lib.rate_limiter import CostCharge, CostLimitExceeded
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single worker process is assumed
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Statuses a job still has work to do in
+ACTIVE_STATUSES = ("queued", "running")
+
+# Longest accepted input line (texts are capped at 5000 characters)
+MAX_LINE_BYTES = 1024 * 1024
+
+
+@dataclass
+class JobTask:
+    """
+    How jobs of one task are run
+
+    Attributes:
+        provider: Provider whose model the task runs on (its executor runs
+            the batches, and its pending calls take priority over jobs)
+        run_batch: Blocking call mapping (texts, params) to one result per
+            text; results are pydantic models
+        input_model: Model each input line (plus the job's params) is
+            validated with
+        check_params: Optional extra check of the validated params, raising
+            ValueError (e.g. that a language pair is supported)
+    """
+    provider: ModelProvider
+    run_batch: Callable[[List[str], Dict[str, Any]], List[BaseModel]]
+    input_model: Type[BaseModel] = TextInput
+    check_params: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def validate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate a job's params for this task
+
+        Returns:
+            The params with defaults filled in
+
+        Raises:
+            ValueError: The params are invalid
+        """
+        params = validate_params(self.input_model, params)
+        if self.check_params is not None:
+            self.check_params(params)
+        return params
+
+
+class JobManager:
+    """
+    Creates, tracks and runs bulk jobs stored under `directory`
+
+    Args:
+        directory: Where job directories are kept
+        tasks: Task name -> JobTask
+        batch_size: Lines run per batch (and per checkpoint)
+        max_lines: Largest corpus accepted per job
+        poll_seconds: How often to look for new or orphaned jobs
+        idle_poll_seconds: How often to check whether a busy model is free
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        tasks: Dict[str, JobTask],
+        batch_size: int = 32,
+        max_lines: int = 1_000_000,
+        poll_seconds: float = 2.0,
+        idle_poll_seconds: float = 0.05
+    ):
+        self.directory = directory
+        self.tasks = tasks
+        self.batch_size = max(1, batch_size)
+        self.max_lines = max_lines
+        self.poll_seconds = poll_seconds
+        self.idle_poll_seconds = idle_poll_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Jobs seen completed or failed, so polling does not re-read them
+        self._finished: set = set()
+
+    # Job files
+
+    def _path(self, job_id: str, name: str = "") -> str:
+        return os.path.join(self.directory, job_id, name)
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(job_id, "job.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, job: Dict[str, Any]):
+        """Replace job.json atomically, so a crash never leaves it half-written"""
+        job["updated_at"] = time.time()
+        path = self._path(job["job_id"], "job.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(job, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    # API
+
+    async def create(self, task: str, params: Dict[str, Any], chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Store a new job from a stream of JSONL bytes and queue it
+
+        Each line must be a JSON object with a "text" field and may carry an
+        "id", which is echoed back in its result. Lines are validated as
+        they arrive, so the corpus is never held in memory.
+
+        Raises:
+            ValueError: Unknown task, invalid params or an invalid line
+                (nothing is kept)
+        """
+        if task not in self.tasks:
+            raise ValueError(f"Unknown task '{task}'; expected one of: {', '.join(sorted(self.tasks))}")
+        input_model = self.tasks[task].input_model
+        job_params = self.tasks[task].validate(params)
+
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._path(job_id))
+        total = 0
+        try:
+            with open(self._path(job_id, "input.jsonl"), "wb") as f:
+                async for line in iter_lines(chunks):
+                    if not line.strip():
+                        continue
+                    total += 1
+                    if total > self.max_lines:
+                        raise ValueError(f"Too many lines (max {self.max_lines})")
+                    try:
+                        record = parse_line(input_model, job_params, line)
+                    except ValueError as e:
+                        raise ValueError(f"Line {total}: {e}")
+                    f.write(json.dumps(record, ensure_ascii=False).encode() + b"\n")
+            if total == 0:
+                raise ValueError("The corpus is empty")
+        except BaseException:
+            shutil.rmtree(self._path(job_id), ignore_errors=True)
+            raise
+        open(self._path(job_id, "results.jsonl"), "wb").close()
+
+        now = time.time()
+        job = {
+            "job_id": job_id,
+            "task": task,
+            "params": job_params,
+            "status": "queued",
+            "total": total,
+            "processed": 0,
+            "failed": 0,
+            "input_bytes": 0,
+            "results_bytes": 0,
+            "created_at": now,
+            "updated_at": now,
+            "error": None,
+        }
+        self._save(job)
+        logger.info(f"Queued {task} job {job_id} with {total} lines")
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's state, or None if there is no such job"""
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        return self._load(job_id)
+
+    def results_path(self, job_id: str) -> str:
+        """Path of the job's results file (JSONL)"""
+        return self._path(job_id, "results.jsonl")
+
+    # Background processing
+
+    def start(self):
+        """Start processing jobs in the background (call from the running event loop)"""
+        if self._worker is None:
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        """Stop processing; the job in progress resumes from its checkpoint on next start"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_pending()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job processing failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def run_pending(self):
+        """Run every job that has work left and is not claimed by another process"""
+        while True:
+            claimed = self._claim_next()
+            if claimed is None:
+                return
+            job, lock = claimed
+            try:
+                await self._process(job)
+            finally:
+                lock.close()
+
+    def _claim_next(self) -> Optional[Tuple[Dict[str, Any], Any]]:
+        """
+        Lock the oldest job with work left and return it with its lock
+
+        Jobs left "running" by a crashed or restarted process have no lock
+        holder and are picked up again here.
+        """
+        if not os.path.isdir(self.directory):
+            return None
+        jobs = []
+        for job_id in os.listdir(self.directory):
+            if job_id in self._finished or not JOB_ID_PATTERN.match(job_id):
+                continue
+            job = self._load(job_id)
+            if job is None:
+                continue
+            if job["status"] in ACTIVE_STATUSES:
+                jobs.append(job)
+            else:
+                self._finished.add(job_id)
+        for job in sorted(jobs, key=lambda j: j["created_at"]):
+            lock = open(self._path(job["job_id"], "lock"), "w")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock.close()
+                    continue
+            # Re-read under the lock: another process may have just finished it
+            job = self._load(job["job_id"])
+            if job is not None and job["status"] in ACTIVE_STATUSES:
+                return job, lock
+            lock.close()
+        return None
+
+    async def _process(self, job: Dict[str, Any]):
+        """Run a claimed job from its checkpoint to the end"""
+        task = self.tasks.get(job["task"])
+        if task is None:
+            job.update(status="failed", error=f"Task '{job['task']}' is not available")
+            self._save(job)
+            return
+
+        if job["processed"]:
+            logger.info(f"Resuming job {job['job_id']} at line {job['processed'] + 1}/{job['total']}")
+        job["status"] = "running"
+        self._save(job)
+        try:
+            with open(self._path(job["job_id"], "input.jsonl"), "rb") as source, \
+                    open(self.results_path(job["job_id"]), "r+b") as results:
+                # Drop anything written after the last checkpoint
+                results.truncate(job["results_bytes"])
+                results.seek(job["results_bytes"])
+                source.seek(job["input_bytes"])
+                while True:
+                    records = [json.loads(line) for line in _read_lines(source, self.batch_size)]
+                    if not records:
+                        break
+                    await self._wait_for_idle(task.provider)
+                    outcomes = await run_batch(task, [r["text"] for r in records], job["params"])
+                    lines = [
+                        result_line(job["processed"] + offset + 1, record["id"], result, error)
+                        for offset, (record, (result, error)) in enumerate(zip(records, outcomes))
+                    ]
+                    job["failed"] += sum(error is not None for _, error in outcomes)
+                    job["processed"] += len(records)
+                    # fsync can take a while; keep it off the event loop
+                    await asyncio.to_thread(self._checkpoint, job, lines, source, results)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job "running" so it resumes from the checkpoint
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job['job_id']} failed")
+            job.update(status="failed", error=str(e))
+            self._save(job)
+            return
+
+        job["status"] = "completed"
+        self._save(job)
+        logger.info(f"Job {job['job_id']} completed: {job['processed']} lines, {job['failed']} failed")
+
+    def _checkpoint(self, job: Dict[str, Any], lines: List[bytes], source, results):
+        """Make a batch's results durable, then record how far the job got"""
+        results.writelines(lines)
+        results.flush()
+        os.fsync(results.fileno())
+        job["input_bytes"] = source.tell()
+        job["results_bytes"] = results.tell()
+        self._save(job)
+
+    async def _wait_for_idle(self, provider: ModelProvider):
+        """Yield to interactive traffic: wait until the model has nothing else to do"""
+        while provider.pending > 0:
+            await asyncio.sleep(self.idle_poll_seconds)
+
+
+def validate_params(input_model: Type[BaseModel], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate a task's params against its input model (with a stand-in text)
+
+    Returns:
+        The params with defaults filled in
+
+    Raises:
+        ValueError: The params are invalid
+    """
+    try:
+        return input_model(text="-", **params).model_dump(exclude={"text"})
+    except ValidationError as e:
+        raise ValueError(_describe(e))
+
+
+def parse_line(input_model: Type[BaseModel], params: Dict[str, Any], line: bytes) -> Dict[str, Any]:
+    """
+    Parse and validate one input line
+
+    Returns:
+        {"text": validated text, "id": the line's id or None}
+
+    Raises:
+        ValueError: The line is not a valid input
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise ValueError("not valid JSON")
+    if not isinstance(record, dict) or "text" not in record:
+        raise ValueError("expected an object with a \"text\" field")
+    try:
+        text = input_model(text=record["text"], **params).text
+    except ValidationError as e:
+        raise ValueError(_describe(e))
+    return {"text": text, "id": record.get("id")}
+
+
+async def run_batch(
+    task: JobTask,
+    texts: List[str],
+    params: Dict[str, Any],
+    admit: bool = False
+) -> List[Tuple[Optional[BaseModel], Optional[str]]]:
+    """
+    Run a batch on the task's executor as (result, error) pairs
+
+    If the batch fails, its texts are retried one at a time so that one bad
+    input only fails its own line. Queued jobs are never shed; with `admit`
+    (interactive callers) the batch goes through the model's admission
+    control instead, and ModelOverloaded is raised rather than retried.
+    """
+    submit = task.provider.run_in_executor if admit else task.provider.run_background
+    try:
+        results = await submit(task.run_batch, texts, params)
+        return [(result, None) for result in results]
+    except ModelOverloaded:
+        raise
+    except Exception as e:
+        if len(texts) == 1:
+            return [(None, str(e))]
+    outcomes = []
+    for text in texts:
+        outcomes.extend(await run_batch(task, [text], params, admit))
+    return outcomes
+
+
+def result_line(number: int, record_id: Any, result: Optional[BaseModel], error: Optional[str]) -> bytes:
+    """One output line: {"line", "id", "result"} or {"line", "id", "error"}"""
+    line = {"line": number, "id": record_id}
+    if error is None:
+        line["result"] = result.model_dump()
+    else:
+        line["error"] = error
+    return json.dumps(line, ensure_ascii=False).encode() + b"\n"
+
+
+def stop_line(error: Exception) -> bytes:
+    """Last line of a stream stopped early: {"error"}, plus "retry_after" if known"""
+    line: Dict[str, Any] = {"error": str(error)}
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        line["retry_after"] = max(1, math.ceil(retry_after))
+    return json.dumps(line, ensure_ascii=False).encode() + b"\n"
+
+
+async def stream_results(
+    task: JobTask,
+    params: Dict[str, Any],
+    chunks: AsyncIterator[bytes],
+    batch_size: int,
+    charge: Optional[Callable[[List[str]], CostCharge]] = None
+) -> AsyncIterator[bytes]:
+    """
+    Run a task over a stream of JSONL bytes, yielding results as batches finish
+
+    Lines are read and validated as they arrive and run `batch_size` at a
+    time. The next batch is read while the previous one runs, so at most two
+    batches are held in memory whatever the size of the input. Each input
+    line gets exactly one output line, in input order; an invalid line gets
+    an error line instead of stopping the stream.
+
+    `charge` builds the CostCharge for a batch's valid texts, which is taken
+    once the model would admit the batch and refunded if it is shed anyway.
+    If the budget cannot cover a batch, or a batch is shed by the model's
+    admission control, the stream ends with a stop_line instead of running
+    the rest of the input.
+    """
+    async def run(
+        batch: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+        batch_charge: Optional[CostCharge]
+    ) -> bytes:
+        valid = [record["text"] for _, record, error in batch if error is None]
+        try:
+            outcomes = iter(await run_batch(task, valid, params, admit=True) if valid else [])
+        except ModelOverloaded:
+            if batch_charge is not None:
+                batch_charge.refund()
+            raise
+        lines = []
+        for number, record, error in batch:
+            if error is None:
+                result, error = next(outcomes)
+                lines.append(result_line(number, record["id"], result, error))
+            else:
+                lines.append(result_line(number, None, None, error))
+        return b"".join(lines)
+
+    def charge_for(batch) -> Optional[CostCharge]:
+        """
+        Charge for a batch once the model would admit it
+
+        Raises:
+            ModelOverloaded: The model would shed the batch
+            CostLimitExceeded: The client's budget cannot cover it
+        """
+        if charge is None:
+            return None
+        task.provider.check_admission()
+        batch_charge = charge([record["text"] for _, record, error in batch if error is None])
+        batch_charge()
+        return batch_charge
+
+    batch_size = max(1, batch_size)
+    running: Optional[asyncio.Future] = None
+    batch = []
+    number = 0
+    try:
+        try:
+            async for line in iter_lines(chunks):
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    batch.append((number, parse_line(task.input_model, params, line), None))
+                except ValueError as e:
+                    batch.append((number, None, str(e)))
+                if running is not None and running.done():
+                    yield running.result()
+                    running = None
+                if len(batch) == batch_size:
+                    if running is not None:
+                        yield await running
+                        running = None
+                    running = asyncio.ensure_future(run(batch, charge_for(batch)))
+                    batch = []
+        except ValueError as e:
+            # Unreadable input: report it after the lines already accepted
+            batch.append((number + 1, None, str(e)))
+        if running is not None:
+            yield await running
+            running = None
+        if batch:
+            yield await run(batch, charge_for(batch))
+    except (ModelOverloaded, CostLimitExceeded) as e:
+        yield stop_line(e)
+    finally:
+        if running is not None:
+            running.cancel()
+
+
+def _describe(error: ValidationError) -> str:
+    """First validation message, without pydantic's boilerplate"""
+    return error.errors()[0]["msg"]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Split a stream of byte chunks into lines (without the newline)"""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Line longer than {MAX_LINE_BYTES} bytes")
+    if buffer:
+        yield buffer
+
+
+def _read_lines(source, count: int) -> List[bytes]:
+    """Read up to `count` complete lines"""
+    lines = []
+    while len(lines) < count:
+        line = source.readline()
+        if not line:
+            break
+        lines.append(line)
+    return lines
@@ -2,7 +2,7 @@
 Pydantic models for request and response validation
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 
 
 class TextInput(BaseModel):
@@ -27,6 +27,78 @@ class TextInput(BaseModel):
         return v
 
 
+class DocumentInput(TextInput):
+    """Input model for long-document operations"""
+    text: str = Field(
+        ...,
+        min_length=1,
+        max_length=50000,
+        description="The document to process (max 50000 characters)"
+    )
+
+
+class StreamTextInput(TextInput):
+    """Input model for streamed text generation"""
+    greedy: bool = Field(
+        default=False,
+        description="Decode greedily so tokens stream as they are generated "
+                    "(the default beam search only sends the final text)"
+    )
+
+
+class ParaphraseInput(TextInput):
+    """Input model for paraphrasing, with optional generation settings"""
+    num_candidates: int = Field(
+        default=1,
+        ge=1,
+        description="Number of paraphrases to return (at most num_beams)"
+    )
+    num_beams: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Beam width (default: the server's setting)"
+    )
+    greedy: bool = Field(
+        default=False,
+        description="Fast mode: decode greedily, returning a single paraphrase (num_beams is ignored)"
+    )
+    max_length: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Maximum length of each paraphrase in tokens (default: the server's setting)"
+    )
+
+
+class SummarizationInput(TextInput):
+    """Input model for summarization, with optional length settings"""
+    ratio: Optional[float] = Field(
+        default=None,
+        gt=0.0,
+        le=1.0,
+        description="Summary length relative to the input (default 0.5)"
+    )
+    max_tokens: Optional[int] = Field(
+        default=None,
+        ge=8,
+        le=512,
+        description="Upper bound on the summary length in tokens (default 150)"
+    )
+
+
+class AnalyzeAllInput(TextInput):
+    """Input model for running several tasks on one text"""
+    tasks: List[Literal["sentiment", "ner", "paraphrase", "summarization"]] = Field(
+        default=["sentiment", "ner"],
+        min_items=1,
+        description="Tasks to run (sentiment, ner, paraphrase, summarization)"
+    )
+    
+    @validator('tasks')
+    def validate_tasks(cls, v):
+        """Drop repeated tasks, keeping the first occurrence"""
+        return list(dict.fromkeys(v))
+
+
 class BatchTextInput(BaseModel):
     """Input model for batch text processing"""
     texts: List[str] = Field(
@@ -77,6 +149,16 @@ class TranslationInput(BaseModel):
         return v
 
 
+class BatchTranslationInput(BaseModel):
+    """Input model for batch translation"""
+    items: List[TranslationInput] = Field(
+        ...,
+        min_items=1,
+        max_items=100,
+        description="Texts to translate, each with its own language pair (max 100 items)"
+    )
+
+
 class SentimentResponse(BaseModel):
     """Response model for sentiment analysis"""
     sentiment: str = Field(..., description="The detected sentiment (Positive/Negative/Neutral)")
@@ -89,6 +171,23 @@ class TranslationResponse(BaseModel):
     translated_text: str = Field(..., description="The translated text")
 
 
+class BatchTranslationResponse(BaseModel):
+    """Response model for batch translation"""
+    results: List[TranslationResponse] = Field(..., description="Translations in input order")
+
+
+class LanguagePair(BaseModel):
+    """A supported translation language pair"""
+    source_lang: str = Field(..., description="Source language code")
+    target_lang: str = Field(..., description="Target language code")
+    loaded: bool = Field(..., description="Whether the pair's model is already in memory")
+
+
+class LanguagesResponse(BaseModel):
+    """Response model for the supported language pairs"""
+    pairs: List[LanguagePair] = Field(..., description="Supported pairs, sorted")
+
+
 class Entity(BaseModel):
     """Model for a named entity"""
     text: str = Field(..., description="The entity text")
@@ -116,7 +215,33 @@ class BatchSentimentResponse(BaseModel):
 class ParaphraseResponse(BaseModel):
     """Response model for paraphrasing"""
     paraphrased_text: str = Field(..., description="The paraphrased text")
+    candidates: Optional[List[str]] = Field(
+        default=None,
+        description="All paraphrases, best first (only when more than one was requested)"
+    )
 
 class SummarizationResponse(BaseModel):
     """Response model for text summarization"""
-    summary_text: str = Field(..., description="The summarized text")
\ No newline at end of file
+    summary_text: str = Field(..., description="The summarized text")
+
+
+class AnalyzeAllResponse(BaseModel):
+    """Response model for several tasks run on one text (unrequested or failed tasks are null)"""
+    sentiment: Optional[SentimentResponse] = Field(default=None, description="Sentiment analysis result")
+    ner: Optional[NERResponse] = Field(default=None, description="Named entity recognition result")
+    paraphrase: Optional[ParaphraseResponse] = Field(default=None, description="Paraphrasing result")
+    summarization: Optional[SummarizationResponse] = Field(default=None, description="Summarization result")
+    errors: Dict[str, str] = Field(default_factory=dict, description="Error message per failed task")
+
+
+class JobStatus(BaseModel):
+    """Status of a bulk job"""
+    job_id: str = Field(..., description="Job identifier")
+    task: str = Field(..., description="Task run on every line (sentiment, ner, translation, summarization)")
+    status: str = Field(..., description="queued, running, completed or failed")
+    total: int = Field(..., description="Lines in the corpus")
+    processed: int = Field(..., description="Lines done so far (including failed ones)")
+    failed: int = Field(..., description="Lines whose result is an error")
+    created_at: float = Field(..., description="Submission time (Unix seconds)")
+    updated_at: float = Field(..., description="Time of the last checkpoint (Unix seconds)")
+    error: Optional[str] = Field(default=None, description="Why the job failed, if it did")
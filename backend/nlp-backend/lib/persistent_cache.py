@@ -0,0 +1,206 @@
+"""
+Persistent result store backed by SQLite
+
+Shared by every worker process on a node and kept across restarts, so a
+cached response computed by one worker is a hit for all of them.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteResultStore:
+    """
+    Key-value store for cached results in a SQLite database (WAL mode)
+
+    - Entries record the task and model id that produced them, so results
+      from an older model version can be dropped on startup
+    - The database is pruned back under `max_bytes` by least recent access
+      when `prune()` is called (periodically, off the request path)
+    - Hit counts are tracked so the hottest entries can be pre-loaded
+
+    Every call does blocking I/O (and may wait on another process's write
+    lock), so async code should run them on an executor.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return this thread's connection
+
+        sqlite3 connections must not be shared between threads or carried
+        across a fork, so one is opened per thread per process.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_task_model ON results (task, model_id)")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value for `key`, or None if missing or expired"""
+        entry = self.lookup(key)
+        return None if entry is None else entry[0]
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Return (value, created_at) for `key`, or None if missing or expired
+
+        `created_at` is the time.time() the value was stored, so callers can
+        keep expiring it from the original write.
+        """
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, created_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            now = time.time()
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE results SET hits = hits + 1, last_access = ? WHERE key = ?",
+                (now, key)
+            )
+            return json.loads(value), created_at
+        except sqlite3.Error as e:
+            logger.warning(f"Result store read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any, task: str, model_id: str):
+        """Store a JSON-serializable value"""
+        payload = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        try:
+            self._connect().execute(
+                """
+                INSERT INTO results (key, task, model_id, value, size_bytes, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value,
+                    size_bytes = excluded.size_bytes,
+                    created_at = excluded.created_at,
+                    last_access = excluded.last_access
+                """,
+                (key, task, model_id, payload, len(payload.encode("utf-8")), now, now)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Result store write failed: {e}")
+
+    def prune(self) -> int:
+        """
+        Delete least recently accessed entries until the store fits `max_bytes`
+
+        Returns:
+            Number of entries deleted
+        """
+        try:
+            conn = self._connect()
+            total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            # Prune to 90% of the budget so we don't prune again straight away.
+            # One statement: every entry whose older entries (by last access)
+            # have not yet freed `excess` bytes is deleted.
+            excess = total - int(self.max_bytes * 0.9)
+            cursor = conn.execute(
+                """
+                DELETE FROM results WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, size_bytes, SUM(size_bytes) OVER (
+                            ORDER BY last_access, key ROWS UNBOUNDED PRECEDING
+                        ) AS freed
+                        FROM results
+                    ) WHERE freed - size_bytes < ?
+                )
+                """,
+                (excess,)
+            )
+            deleted = cursor.rowcount
+            logger.info(f"Pruned {deleted} entries from result store")
+            return deleted
+        except sqlite3.Error as e:
+            logger.warning(f"Result store prune failed: {e}")
+            return 0
+
+    def invalidate_stale(self, current_models: Dict[str, str]) -> int:
+        """
+        Delete results produced by a different model than the current one
+
+        Args:
+            current_models: Mapping of task name to current model id
+
+        Returns:
+            Number of entries deleted
+        """
+        deleted = 0
+        try:
+            conn = self._connect()
+            for task, model_id in current_models.items():
+                cursor = conn.execute(
+                    "DELETE FROM results WHERE task = ? AND model_id != ?", (task, model_id)
+                )
+                deleted += cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Result store invalidation failed: {e}")
+        if deleted:
+            logger.info(f"Invalidated {deleted} results from previous model versions")
+        return deleted
+
+    def hottest(self, limit: int) -> List[Tuple[str, Any, float]]:
+        """Return the `limit` most frequently hit (key, value, created_at) entries"""
+        oldest = time.time() - self.ttl_seconds if self.ttl_seconds is not None else 0
+        try:
+            rows = self._connect().execute(
+                """
+                SELECT key, value, created_at FROM results WHERE created_at >= ?
+                ORDER BY hits DESC, last_access DESC LIMIT ?
+                """,
+                (oldest, limit)
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Result store warm-load failed: {e}")
+            return []
+        return [(key, json.loads(value), created_at) for key, value, created_at in rows]
+
+    def count(self) -> int:
+        """Number of stored results"""
+        return self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
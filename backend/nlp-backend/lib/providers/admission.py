@@ -0,0 +1,120 @@
+"""
+Admission control for a model's inference executor
+
+Calls wait for a free inference thread in a bounded queue. A call is
+admitted only while fewer than `limit` calls are in flight and the wait it
+would face (estimated from recent inference times) fits the wait budget;
+otherwise it is rejected at once with ModelOverloaded, which the API turns
+into a 503 with Retry-After. Shedding the excess during a burst keeps the
+latency of admitted requests bounded instead of every request timing out
+together.
+
+The in-flight limit adapts (AIMD): it grows by about one for every `limit`
+calls that start within the wait budget and is cut by BACKOFF when a call
+waits longer, staying between the worker count and workers + max_queue.
+"""
+import math
+from typing import Optional
+
+
+class ModelOverloaded(Exception):
+    """A model's queue is full or too slow to take another call"""
+
+    def __init__(self, task: str, retry_after: float, reason: str = "queue_full"):
+        super().__init__(f"The {task} model is overloaded; retry in {math.ceil(retry_after)} seconds")
+        self.task = task
+        self.retry_after = retry_after
+        # "queue_full" or "wait_budget", for metrics
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounded, adaptive queue in front of one model's executor
+
+    Only touched on the event loop, so it needs no lock.
+
+    Args:
+        task: Model task name, for error messages and metrics
+        workers: Calls the executor runs at once
+        max_queue: Most calls waiting for a free thread
+        max_wait_seconds: Calls expected to wait longer than this for a
+            thread are rejected (0 = no wait budget)
+    """
+
+    # Multiplier applied to the limit when a call waits past the budget
+    BACKOFF = 0.9
+
+    # Weight of the latest inference time in the moving average
+    SMOOTHING = 0.2
+
+    def __init__(self, task: str, workers: int = 1, max_queue: int = 32, max_wait_seconds: float = 10.0):
+        self.task = task
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.max_wait_seconds = max(0.0, max_wait_seconds)
+        self.limit = float(self.max_limit)
+        # Admitted calls that have not finished (queued or running)
+        self.in_flight = 0
+        # Moving average of inference time; None until a call has finished
+        self.service_seconds: Optional[float] = None
+
+    @property
+    def max_limit(self) -> int:
+        """Most calls in flight: every worker busy and the queue full"""
+        return self.workers + self.max_queue
+
+    def estimated_wait(self) -> float:
+        """Seconds a call arriving now would wait for a free thread"""
+        if self.service_seconds is None:
+            return 0.0
+        queued_ahead = max(0, self.in_flight - self.workers + 1)
+        return queued_ahead * self.service_seconds / self.workers
+
+    def check(self):
+        """
+        Raise if a call arriving now would be rejected
+
+        Raises:
+            ModelOverloaded: The queue is at its limit or the estimated wait
+                exceeds the budget
+        """
+        slot_seconds = (self.service_seconds or 1.0) / self.workers
+        excess = self.in_flight - int(self.limit) + 1
+        if excess > 0:
+            raise ModelOverloaded(self.task, excess * slot_seconds, reason="queue_full")
+        wait = self.estimated_wait()
+        if self.max_wait_seconds and wait > self.max_wait_seconds:
+            raise ModelOverloaded(self.task, max(wait - self.max_wait_seconds, slot_seconds), reason="wait_budget")
+
+    def acquire(self, check: bool = True):
+        """
+        Count a call as in flight, after checking it may be admitted
+
+        Background work passes check=False: it is never rejected, but still
+        occupies a thread and so counts towards the wait of later calls.
+        """
+        if check:
+            self.check()
+        self.in_flight += 1
+
+    def release(self, waited: Optional[float] = None, service: Optional[float] = None):
+        """
+        Record a finished call and adapt the limit
+
+        Args:
+            waited: Seconds the call waited for a thread (None if it never started)
+            service: Seconds the call ran
+        """
+        self.in_flight -= 1
+        if service is not None:
+            if self.service_seconds is None:
+                self.service_seconds = service
+            else:
+                self.service_seconds += self.SMOOTHING * (service - self.service_seconds)
+        if waited is None:
+            return
+        if self.max_wait_seconds and waited > self.max_wait_seconds:
+            self.limit = max(float(self.workers), self.limit * self.BACKOFF)
+        else:
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
@@ -0,0 +1,118 @@
+"""
+Inference backends that build the pipelines model providers run
+
+The default backend runs the PyTorch model through `transformers.pipeline`.
+The ONNX Runtime backend runs an exported ONNX graph of the same model
+inside the same pipeline class, so pre- and post-processing (including NER
+entity aggregation) are unchanged.
+"""
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    """Base class for inference backends"""
+
+    name: str = ""
+
+    def build_pipeline(self, task: str, model_name: str, **pipeline_kwargs):
+        """Build a ready-to-run pipeline - to be implemented by subclasses"""
+        raise NotImplementedError
+
+
+class TorchBackend(InferenceBackend):
+    """Runs the PyTorch model (the default)"""
+
+    name = "torch"
+
+    def build_pipeline(self, task: str, model_name: str, **pipeline_kwargs):
+        from transformers import pipeline
+        return pipeline(task, model=model_name, **pipeline_kwargs)
+
+
+class ONNXRuntimeBackend(InferenceBackend):
+    """
+    Runs an ONNX export of the model with ONNX Runtime
+
+    Supports encoder-only tasks (sentiment and NER). If `export_dir` is set,
+    a graph previously exported there is loaded; otherwise the model is
+    exported on first load and saved to `export_dir` for next time.
+
+    Requires the optional dependency: pip install "optimum[onnxruntime]"
+    """
+
+    name = "onnx"
+
+    ORT_MODEL_CLASSES = {
+        "sentiment-analysis": "ORTModelForSequenceClassification",
+        "text-classification": "ORTModelForSequenceClassification",
+        "ner": "ORTModelForTokenClassification",
+        "token-classification": "ORTModelForTokenClassification",
+    }
+
+    def __init__(self, export_dir: Optional[str] = None, num_threads: Optional[int] = None):
+        self.export_dir = export_dir
+        self.num_threads = num_threads
+
+    def build_pipeline(self, task: str, model_name: str, **pipeline_kwargs):
+        if task not in self.ORT_MODEL_CLASSES:
+            raise ValueError(f"ONNX Runtime backend does not support task '{task}'")
+
+        try:
+            import onnxruntime
+            import optimum.onnxruntime
+        except ImportError as e:
+            raise ImportError(
+                "ONNX Runtime backend requires optional dependencies: "
+                "pip install \"optimum[onnxruntime]\""
+            ) from e
+
+        from transformers import AutoTokenizer, pipeline
+
+        ort_model_class = getattr(optimum.onnxruntime, self.ORT_MODEL_CLASSES[task])
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            session_options.intra_op_num_threads = self.num_threads
+
+        local_dir = self._export_path(model_name)
+        if local_dir and os.path.exists(os.path.join(local_dir, "model.onnx")):
+            logger.info(f"Loading pre-exported ONNX model from {local_dir}")
+            model = ort_model_class.from_pretrained(local_dir, session_options=session_options)
+            tokenizer = AutoTokenizer.from_pretrained(local_dir)
+        else:
+            logger.info(f"Exporting {model_name} to ONNX")
+            model = ort_model_class.from_pretrained(model_name, export=True, session_options=session_options)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            if local_dir:
+                model.save_pretrained(local_dir)
+                tokenizer.save_pretrained(local_dir)
+                logger.info(f"Saved ONNX export to {local_dir}")
+
+        return pipeline(task, model=model, tokenizer=tokenizer, **pipeline_kwargs)
+
+    def _export_path(self, model_name: str) -> Optional[str]:
+        """Directory holding the ONNX export of a model, if exports are kept"""
+        if not self.export_dir:
+            return None
+        return os.path.join(self.export_dir, model_name.strip("/").replace("/", "--"))
+
+
+def get_backend(name: str, export_dir: Optional[str] = None, num_threads: Optional[int] = None) -> InferenceBackend:
+    """
+    Create a backend from its configured name
+
+    Args:
+        name: "torch" or "onnx"
+        export_dir: Where ONNX exports are stored (ONNX only)
+        num_threads: ONNX Runtime intra-op threads (ONNX only, None = default)
+    """
+    if name == TorchBackend.name:
+        return TorchBackend()
+    if name == ONNXRuntimeBackend.name:
+        return ONNXRuntimeBackend(export_dir=export_dir, num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend: {name}")
@@ -0,0 +1,151 @@
+"""
+Index of the translation language pairs this server can serve
+
+A pair is supported when it is on the configured allow-list or its model
+is already in the local Hugging Face cache. Requests for any other pair
+are rejected before a load is attempted, so they never wait on the hub.
+Pairs whose model failed to load are remembered for a while and rejected
+the same way.
+"""
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+Pair = Tuple[str, str]
+
+
+def parse_pairs(value: str) -> List[Pair]:
+    """
+    Parse a comma-separated list of "src-tgt" pairs (e.g. "en-fr,fr-en")
+
+    Raises:
+        ValueError: An entry is not of the form "src-tgt"
+    """
+    pairs = []
+    for entry in value.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        parts = entry.split("-")
+        if len(parts) != 2 or not all(parts):
+            raise ValueError(f"Invalid language pair '{entry}'; expected 'src-tgt'")
+        pairs.append((parts[0], parts[1]))
+    return pairs
+
+
+def hub_cache_dir() -> str:
+    """Directory of the local Hugging Face hub cache (same lookup as huggingface_hub)"""
+    for variable in ("HF_HUB_CACHE", "HUGGINGFACE_HUB_CACHE"):
+        if os.getenv(variable):
+            return os.path.expanduser(os.environ[variable])
+    hf_home = os.getenv("HF_HOME") or os.path.join(os.getenv("XDG_CACHE_HOME", "~/.cache"), "huggingface")
+    return os.path.join(os.path.expanduser(hf_home), "hub")
+
+
+class LanguagePairIndex:
+    """
+    Supported translation pairs: an allow-list plus the locally cached models
+
+    Args:
+        model_prefix: Model name without the pair, e.g. "Helsinki-NLP/opus-mt"
+            (models are named "{model_prefix}-{src}-{tgt}")
+        allowed_pairs: Pairs that may be loaded (downloaded if needed)
+        cache_dir: Hugging Face hub cache to scan (default: the usual lookup)
+        failure_ttl: Seconds a pair whose model failed to load stays rejected
+    """
+
+    def __init__(
+        self,
+        model_prefix: str,
+        allowed_pairs: Iterable[Pair] = (),
+        cache_dir: Optional[str] = None,
+        failure_ttl: float = 600
+    ):
+        self.model_prefix = model_prefix
+        self.allowed_pairs: Set[Pair] = set(allowed_pairs)
+        self.cache_dir = cache_dir or hub_cache_dir()
+        self.failure_ttl = failure_ttl
+        self._local_pairs: Set[Pair] = set()
+        # Pair -> when (time.monotonic) its model last failed to load
+        self._failures: Dict[Pair, float] = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Rescan the local cache for downloaded models"""
+        # Hub cache entries are named like "models--Helsinki-NLP--opus-mt-en-fr"
+        prefix = "models--" + self.model_prefix.replace("/", "--") + "-"
+        try:
+            entries = os.listdir(self.cache_dir)
+        except OSError:
+            entries = []
+        local = set()
+        for entry in entries:
+            if not entry.startswith(prefix) or not self._has_snapshot(entry):
+                continue
+            parts = entry[len(prefix):].split("-")
+            if len(parts) == 2 and all(parts):
+                local.add((parts[0], parts[1]))
+        with self._lock:
+            self._local_pairs = local
+
+    def _has_snapshot(self, entry: str) -> bool:
+        """Whether a cache entry holds a downloaded revision (not just a failed attempt)"""
+        try:
+            return bool(os.listdir(os.path.join(self.cache_dir, entry, "snapshots")))
+        except OSError:
+            return False
+
+    def pairs(self) -> List[Pair]:
+        """Supported pairs, sorted, excluding ones that recently failed to load"""
+        with self._lock:
+            candidates = self.allowed_pairs | self._local_pairs
+            return sorted(pair for pair in candidates if not self._failed(pair))
+
+    def is_local(self, source_lang: str, target_lang: str) -> bool:
+        """Whether the pair's model is in the local cache"""
+        return (source_lang, target_lang) in self._local_pairs
+
+    def check(self, source_lang: str, target_lang: str):
+        """
+        Reject a pair that is not supported, without loading anything
+
+        Raises:
+            ValueError: The pair is not supported or its model recently
+                failed to load
+        """
+        pair = (source_lang, target_lang)
+        with self._lock:
+            failed = self._failed(pair)
+            known = pair in self.allowed_pairs or pair in self._local_pairs
+        if failed:
+            raise ValueError(
+                f"Translation model for {source_lang}-{target_lang} is unavailable (it failed to load recently)"
+            )
+        if not known:
+            raise ValueError(
+                f"Unsupported language pair: {source_lang}-{target_lang}. See /languages for supported pairs"
+            )
+
+    def record_success(self, source_lang: str, target_lang: str):
+        """Note that a pair's model loaded (so it is now cached locally)"""
+        pair = (source_lang, target_lang)
+        with self._lock:
+            self._failures.pop(pair, None)
+            self._local_pairs.add(pair)
+
+    def record_failure(self, source_lang: str, target_lang: str):
+        """Note that a pair's model failed to load, rejecting it for `failure_ttl` seconds"""
+        with self._lock:
+            self._failures[(source_lang, target_lang)] = time.monotonic()
+
+    def _failed(self, pair: Pair) -> bool:
+        """Whether the pair failed within `failure_ttl` (call with the lock held)"""
+        failed_at = self._failures.get(pair)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at >= self.failure_ttl:
+            del self._failures[pair]
+            return False
+        return True
@@ -0,0 +1,149 @@
+"""
+Memory-bounded cache for models that are loaded on demand
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_model_bytes(pipeline_obj: Any) -> int:
+    """
+    Estimate resident memory of a pipeline from its weights and buffers
+
+    Returns 0 when the pipeline has no torch model to inspect.
+    """
+    model = getattr(pipeline_obj, "model", None)
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size_bytes: int
+    last_used: float
+
+
+class ModelCache:
+    """
+    LRU cache of loaded models bounded by a memory budget and idle time
+
+    - Least recently used models are evicted once the total estimated size
+      exceeds `max_bytes`. The most recent model is always kept, even if it
+      alone is over budget.
+    - Models unused for longer than `idle_seconds` are evicted on the next
+      lookup or when `prune()` is called (the server calls it periodically,
+      so an idle model is unloaded even if no other model is requested).
+    - Each key has its own load lock, so concurrent requests for the same
+      model wait for a single load instead of loading it twice, while
+      different keys load in parallel.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        idle_seconds: Optional[float] = None,
+        size_fn: Callable[[Any], int] = estimate_model_bytes,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.size_fn = size_fn
+        self.clock = clock
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def keys(self) -> List[str]:
+        """Keys of resident models, least recently used first"""
+        with self._lock:
+            return list(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        """Estimated memory held by all resident models"""
+        with self._lock:
+            return sum(entry.size_bytes for entry in self._entries.values())
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached model for `key`, loading it with `loader` if needed
+
+        Args:
+            key: Cache key (e.g. a language pair)
+            loader: Called with no arguments to load the model on a miss
+
+        Returns:
+            The cached or newly loaded model
+        """
+        with self._lock:
+            self._evict_idle()
+            value = self._touch(key)
+            if value is not None:
+                return value
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another request may have loaded it while we waited
+            with self._lock:
+                value = self._touch(key)
+                if value is not None:
+                    return value
+
+            try:
+                value = loader()
+                size_bytes = self.size_fn(value)
+            except Exception:
+                with self._lock:
+                    self._load_locks.pop(key, None)
+                raise
+
+            with self._lock:
+                self._entries[key] = _CacheEntry(value, size_bytes, self.clock())
+                self._load_locks.pop(key, None)
+                self._evict_over_budget()
+            return value
+
+    def prune(self):
+        """Evict idle models without waiting for the next lookup"""
+        with self._lock:
+            self._evict_idle()
+
+    def _touch(self, key: str) -> Any:
+        """Mark an entry as most recently used and return its value (lock held)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry.last_used = self.clock()
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _evict_over_budget(self):
+        """Drop least recently used entries until within budget (lock held)"""
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            total -= entry.size_bytes
+            logger.info(f"Evicted model {key} from cache (memory budget)")
+
+    def _evict_idle(self):
+        """Drop entries unused for longer than idle_seconds (lock held)"""
+        if not self.idle_seconds:
+            return
+        cutoff = self.clock() - self.idle_seconds
+        for key in [k for k, entry in self._entries.items() if entry.last_used < cutoff]:
+            del self._entries[key]
+            logger.info(f"Evicted model {key} from cache (idle)")
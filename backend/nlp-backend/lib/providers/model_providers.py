@@ -1,9 +1,19 @@
 """
 Model providers for loading and managing ML models
 """
+import asyncio
 import logging
-from typing import Optional
-from transformers import pipeline
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from lib.metrics import MODEL_ADMISSION_REJECTIONS, MODEL_BATCH_SIZE, MODEL_INFERENCE_SECONDS, MODEL_LOAD_SECONDS, MODEL_QUEUE_DEPTH, MODEL_QUEUE_WAIT_SECONDS
+from lib.providers.admission import AdmissionController, ModelOverloaded
+from lib.providers.backends import InferenceBackend, TorchBackend
+from lib.providers.language_pairs import LanguagePairIndex
+from lib.providers.model_cache import ModelCache
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +21,31 @@ logger = logging.getLogger(__name__)
 class ModelProvider:
     """Base class for model providers"""
     
-    def __init__(self):
-        self.pipeline: Optional[pipeline] = None
+    # Task name used to label this provider's metrics
+    task: str = ""
+    
+    # Cycled to build the dummy inputs used by warm_up()
+    WARMUP_TEXT = "Tim Cook said the new Apple store in Paris opened on time and customers loved it."
+    
+    def __init__(
+        self,
+        max_workers: int = 1,
+        quantize: bool = False,
+        backend: Optional[InferenceBackend] = None
+    ):
+        self.pipeline: Optional[Any] = None
         self.model_name: Optional[str] = None
+        self.backend = backend or TorchBackend()
+        self.quantize = quantize
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.warmed_up = False
+        # Calls submitted through run_in_executor that have not finished yet
+        # (only touched on the event loop)
+        self.pending = 0
+        # Bounded queue in front of the executor (see enable_admission)
+        self.admission: Optional[AdmissionController] = None
     
     def load_model(self):
         """Load the model - to be implemented by subclasses"""
@@ -23,33 +55,275 @@ class ModelProvider:
         """Check if the model is loaded"""
         return self.pipeline is not None
     
+    @property
+    def model_id(self) -> str:
+        """Identifier of the model producing results (used in cache keys)"""
+        model_id = self.model_name or type(self).__name__
+        if self.backend.name != TorchBackend.name:
+            model_id += f"+{self.backend.name}"
+        elif self.quantize:
+            model_id += "+int8"
+        return model_id
+    
+    def optimize_pipeline(self, pipeline_obj):
+        """
+        Apply the configured load-time optimizations to a freshly loaded pipeline
+        
+        With `quantize` enabled, the weights of every Linear layer are
+        converted to int8 (dynamic quantization: activations are quantized on
+        the fly). On CPU this cuts latency and resident memory for these
+        transformer models at a small accuracy cost. If quantization fails
+        the fp32 model is kept.
+        """
+        if not self.quantize:
+            return pipeline_obj
+        if self.backend.name != TorchBackend.name:
+            logger.warning(f"Quantization only applies to the torch backend, skipping for {self.model_name}")
+            return pipeline_obj
+        
+        try:
+            import torch
+            from torch.ao.quantization import quantize_dynamic
+            
+            # In place, so fp32 and int8 weights are never resident together
+            quantize_dynamic(pipeline_obj.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+            logger.info(f"Applied dynamic int8 quantization to {self.model_id}")
+        except Exception as e:
+            logger.warning(f"Dynamic quantization failed for {self.model_name}, using fp32: {e}")
+        return pipeline_obj
+    
     def predict(self, text: str):
         """Make a prediction - to be implemented by subclasses"""
         raise NotImplementedError
+    
+    def warm_up(self, lengths: Sequence[int] = (16, 64, 256)):
+        """
+        Run dummy inputs of several lengths through the loaded model
+        
+        The first calls to a model pay one-off costs (allocator growth,
+        kernel selection, tokenizer caches); paying them here keeps them off
+        the first real requests. Lengths are in tokens. A failing input is
+        logged and skipped: the model is loaded and still serves. Does
+        nothing if the model is not loaded.
+        """
+        if not self.is_loaded():
+            return
+        for length in lengths:
+            try:
+                self.warm_up_call(self.warm_up_text(length))
+            except Exception as e:
+                logger.warning(f"Warm-up of {self.model_id} failed at {length} tokens: {e}")
+        self.warmed_up = True
+    
+    def warm_up_text(self, length: int) -> str:
+        """
+        Dummy input of `length` tokens, capped at the model's input window
+        
+        Counted in words when the pipeline has no tokenizer.
+        """
+        words = self.WARMUP_TEXT.split()
+        text = " ".join(words[i % len(words)] for i in range(length))
+        tokenizer = getattr(self.pipeline, "tokenizer", None)
+        if tokenizer is None:
+            return text
+        limit = min(length, tokenizer.model_max_length - tokenizer.num_special_tokens_to_add())
+        ids = tokenizer(text, add_special_tokens=False)["input_ids"][:limit]
+        return tokenizer.decode(ids)
+    
+    def warm_up_call(self, text: str):
+        """Run one warm-up input (override when predict() is not representative)"""
+        self.predict(text)
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """
+        Bounded thread pool that runs this provider's inference
+        
+        Created on first use so that no threads exist before the server
+        starts. Torch releases the GIL during forward passes, so inference
+        here does not stall the event loop.
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=type(self).__name__
+                    )
+        return self._executor
+    
+    def enable_admission(self, max_queue: int, max_wait_seconds: float):
+        """
+        Put a bounded, adaptive queue in front of this provider's executor
+        
+        Calls through run_in_executor are then rejected with ModelOverloaded
+        when the queue is full or the expected wait exceeds `max_wait_seconds`.
+        """
+        self.admission = AdmissionController(
+            self.task,
+            workers=self.max_workers,
+            max_queue=max_queue,
+            max_wait_seconds=max_wait_seconds
+        )
+    
+    def check_admission(self):
+        """
+        Raise ModelOverloaded if a call submitted now would be rejected
+        
+        For streaming endpoints, which must fail before their response starts.
+        """
+        if self.admission is None:
+            return
+        try:
+            self.admission.check()
+        except ModelOverloaded as e:
+            MODEL_ADMISSION_REJECTIONS.inc(model=self.task, reason=e.reason)
+            raise
+    
+    async def run_in_executor(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking call on this provider's executor and await the result
+        
+        Records the time spent waiting for a free thread, the time spent
+        running, and how many calls are queued or running.
+        
+        Raises:
+            ModelOverloaded: Admission control is enabled and the call was
+                rejected (it never reaches the executor)
+        """
+        return await self._run(fn, args, kwargs, admit=True)
+    
+    async def run_background(self, fn: Callable, *args, **kwargs) -> Any:
+        """Like run_in_executor, but never rejected by admission control (bulk jobs)"""
+        return await self._run(fn, args, kwargs, admit=False)
+    
+    async def _run(self, fn: Callable, args: tuple, kwargs: dict, admit: bool) -> Any:
+        """Submit a call to the executor, through admission control if enabled"""
+        if self.admission is not None:
+            if admit:
+                self.check_admission()
+            self.admission.acquire(check=False)
+        
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        # Filled in by the worker thread, read back once the call finishes
+        timings: Dict[str, float] = {}
+        
+        def timed():
+            started = time.perf_counter()
+            timings["waited"] = started - submitted
+            MODEL_QUEUE_WAIT_SECONDS.observe(started - submitted, model=self.task)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings["service"] = time.perf_counter() - started
+                MODEL_INFERENCE_SECONDS.observe(timings["service"], model=self.task)
+        
+        def finished():
+            self.pending -= 1
+            MODEL_QUEUE_DEPTH.dec(model=self.task)
+            if self.admission is not None:
+                self.admission.release(timings.get("waited"), timings.get("service"))
+        
+        def on_done(_):
+            # Runs when the thread is free again, even if the awaiting request
+            # was cancelled (e.g. client disconnect) while the call was running
+            try:
+                loop.call_soon_threadsafe(finished)
+            except RuntimeError:
+                pass  # Loop already closed
+        
+        MODEL_QUEUE_DEPTH.inc(model=self.task)
+        self.pending += 1
+        future = self.executor.submit(timed)
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future, loop=loop)
+    
+    def record_load(self, started: float):
+        """Record how long a model load that began at `started` (perf_counter) took"""
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - started, model=self.task)
+    
+    def token_lengths(self, texts: List[str], tokenizer: Optional[Any] = None) -> List[int]:
+        """
+        Count tokens per text with `tokenizer` (default: the loaded pipeline's)
+        
+        Falls back to character counts when there is no tokenizer.
+        """
+        tokenizer = tokenizer or getattr(self.pipeline, "tokenizer", None)
+        if tokenizer is None or not texts:
+            return [len(text) for text in texts]
+        encoded = tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return [len(ids) for ids in encoded]
+    
+    def length_buckets(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        tokenizer: Optional[Any] = None
+    ) -> List[List[int]]:
+        """
+        Group text indices into batches of similar token length
+        
+        Sorting by length before batching keeps padding (and wasted compute)
+        to a minimum inside each forward pass.
+        
+        Args:
+            texts: Texts that will be batched
+            batch_size: Max texts per bucket (all texts in one bucket if None)
+            tokenizer: Tokenizer measuring the texts (default: the loaded pipeline's)
+            
+        Returns:
+            Lists of indices into `texts`, one list per bucket
+        """
+        if not texts:
+            return []
+        lengths = self.token_lengths(texts, tokenizer)
+        order = sorted(range(len(texts)), key=lambda i: lengths[i])
+        size = batch_size or len(texts) or 1
+        return [order[start:start + size] for start in range(0, len(order), size)]
 
 
 class SentimentModelProvider(ModelProvider):
     """Provider for sentiment analysis models"""
     
-    def __init__(self, model_name: str = "cardiffnlp/twitter-roberta-base-sentiment-latest"):
-        super().__init__()
+    task = "sentiment"
+    
+    def __init__(
+        self,
+        model_name: str = "cardiffnlp/twitter-roberta-base-sentiment-latest",
+        max_workers: int = 1,
+        quantize: bool = False,
+        backend: Optional[InferenceBackend] = None
+    ):
+        super().__init__(max_workers=max_workers, quantize=quantize, backend=backend)
         self.model_name = model_name
     
     def load_model(self):
         """Load the sentiment analysis model"""
+        started = time.perf_counter()
         try:
-            logger.info(f"Loading sentiment analysis model: {self.model_name}")
-            self.pipeline = pipeline(
+            logger.info(f"Loading sentiment analysis model: {self.model_name} ({self.backend.name})")
+            self.pipeline = self.backend.build_pipeline(
                 "sentiment-analysis",
-                model=self.model_name,
+                self.model_name,
                 return_all_scores=True
             )
             logger.info("Sentiment model loaded successfully!")
         except Exception as e:
             logger.error(f"Error loading sentiment model: {e}")
+            if self.backend.name != TorchBackend.name:
+                # The fallback would be a different model on a different
+                # backend than configured; fail instead of serving it
+                raise
             # Fallback to a simpler model
             logger.info("Falling back to default sentiment model")
+            from transformers import pipeline
             self.pipeline = pipeline("sentiment-analysis")
+            # Results (and cache keys) must name the model actually serving
+            self.model_name = self.pipeline.model.name_or_path
+        
+        self.optimize_pipeline(self.pipeline)
+        self.record_load(started)
     
     def predict(self, text: str):
         """Perform sentiment analysis on text"""
@@ -57,23 +331,64 @@ class SentimentModelProvider(ModelProvider):
             raise ValueError("Model not loaded")
         return self.pipeline(text)
 
+    def predict_batch(self, texts: List[str], batch_size: Optional[int] = None) -> list:
+        """
+        Perform sentiment analysis on several texts
+        
+        Texts are run in length-sorted buckets of `batch_size` and the
+        results are returned in input order.
+        """
+        if not self.pipeline:
+            raise ValueError("Model not loaded")
+        
+        results: list = [None] * len(texts)
+        for bucket in self.length_buckets(texts, batch_size):
+            MODEL_BATCH_SIZE.observe(len(bucket), model=self.task)
+            outputs = self.pipeline([texts[i] for i in bucket], batch_size=len(bucket))
+            for index, output in zip(bucket, outputs):
+                results[index] = output
+        return results
+
 
 class NERModelProvider(ModelProvider):
-    """Provider for Named Entity Recognition models"""
+    """
+    Provider for Named Entity Recognition models
+    
+    Texts longer than the model's window (512 tokens for BERT) are covered
+    by windows that overlap by `window_stride` tokens. The text is
+    tokenized once, the windows are run `batch_size` at a time, and
+    entities found in more than one window are merged by character offset.
+    A `window_stride` of 0 disables windowing (long texts are truncated).
+    """
+    
+    task = "ner"
     
-    def __init__(self, model_name: str = "dslim/bert-base-NER"):
-        super().__init__()
+    def __init__(
+        self,
+        model_name: str = "dslim/bert-base-NER",
+        max_workers: int = 1,
+        quantize: bool = False,
+        backend: Optional[InferenceBackend] = None,
+        window_stride: int = 128,
+        batch_size: int = 8
+    ):
+        super().__init__(max_workers=max_workers, quantize=quantize, backend=backend)
         self.model_name = model_name
+        self.window_stride = window_stride
+        self.batch_size = batch_size
     
     def load_model(self):
         """Load the NER model"""
+        started = time.perf_counter()
         try:
-            logger.info(f"Loading NER model: {self.model_name}")
-            self.pipeline = pipeline(
+            logger.info(f"Loading NER model: {self.model_name} ({self.backend.name})")
+            self.pipeline = self.backend.build_pipeline(
                 "ner",
-                model=self.model_name,
+                self.model_name,
                 aggregation_strategy="simple"
             )
+            self.optimize_pipeline(self.pipeline)
+            self.record_load(started)
             logger.info("NER model loaded successfully!")
         except Exception as e:
             logger.error(f"Error loading NER model: {e}")
@@ -83,92 +398,475 @@ class NERModelProvider(ModelProvider):
         """Perform NER on text"""
         if not self.pipeline:
             raise ValueError("Model not loaded")
-        return self.pipeline(text)
+        return self.pipeline(text, **self.window_kwargs())
+    
+    def predict_batch(self, texts: List[str], batch_size: Optional[int] = None) -> list:
+        """
+        Perform NER on several texts, one entity list per text in input order
+        
+        Texts are run in length-sorted buckets of `batch_size` (default
+        `self.batch_size`). With windowing on, the windows of a bucket's
+        texts are run `self.batch_size` at a time instead.
+        """
+        if not self.pipeline:
+            raise ValueError("Model not loaded")
+        
+        kwargs = self.window_kwargs()
+        results: list = [None] * len(texts)
+        for bucket in self.length_buckets(texts, batch_size or self.batch_size):
+            MODEL_BATCH_SIZE.observe(len(bucket), model=self.task)
+            outputs = self.pipeline([texts[i] for i in bucket], **{"batch_size": len(bucket), **kwargs})
+            for index, output in zip(bucket, outputs):
+                results[index] = output
+        return results
+    
+    def window_kwargs(self) -> Dict[str, Any]:
+        """
+        Pipeline arguments for sliding-window inference
+        
+        Windowing needs a fast tokenizer (for the character offsets used to
+        merge entities) and a finite model window; without them the
+        pipeline's default truncation applies.
+        """
+        tokenizer = getattr(self.pipeline, "tokenizer", None)
+        if not self.window_stride or tokenizer is None or not tokenizer.is_fast:
+            return {}
+        window = tokenizer.model_max_length - tokenizer.num_special_tokens_to_add()
+        if window > 100_000:
+            # No configured limit, the model sees the whole text anyway
+            return {}
+        # The stride must leave room for the window to advance
+        stride = min(self.window_stride, window // 2)
+        return {"stride": stride, "batch_size": self.batch_size}
 
 
 class TranslationModelProvider(ModelProvider):
     """Provider for translation models"""
     
-    def __init__(self):
-        super().__init__()
-        self.loaded_models: dict = {}
+    task = "translation"
     
-    def load_model(self, source_lang: str, target_lang: str):
-        """Load a translation model for specific language pair"""
-        model_key = f"{source_lang}-{target_lang}"
-        
-        if model_key in self.loaded_models:
-            self.pipeline = self.loaded_models[model_key]
-            return
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_cache_bytes: int = 1200 * 1024 * 1024,
+        idle_seconds: Optional[float] = 1800,
+        quantize: bool = False,
+        language_pairs: Optional[LanguagePairIndex] = None
+    ):
+        super().__init__(max_workers=max_workers, quantize=quantize)
+        self.model_name = "Helsinki-NLP/opus-mt"
+        # One pipeline per language pair, loaded on demand and evicted when
+        # the memory budget is exceeded or a pair goes unused
+        self.model_cache = ModelCache(max_bytes=max_cache_bytes, idle_seconds=idle_seconds)
+        # Pairs that may be loaded; without an index any pair is attempted
+        self.language_pairs = language_pairs
+    
+    def is_loaded(self) -> bool:
+        """Check if any translation model is loaded"""
+        return len(self.model_cache) > 0
+    
+    @property
+    def loaded_pairs(self) -> List[str]:
+        """Language pairs currently resident in memory"""
+        return self.model_cache.keys()
+    
+    def supported_pairs(self) -> List[Tuple[str, str]]:
+        """(source_lang, target_lang) pairs that can be translated, sorted"""
+        if self.language_pairs is not None:
+            return self.language_pairs.pairs()
+        # Without an index, only the resident pairs are known to work
+        return sorted(tuple(key.split("-", 1)) for key in self.loaded_pairs)
+    
+    def check_pair(self, source_lang: str, target_lang: str):
+        """
+        Reject an unsupported language pair without loading anything
         
-        model_name = f"Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
+        Cheap enough to call on the event loop before dispatching work.
         
+        Raises:
+            ValueError: The pair is not in the language pair index
+        """
+        if self.language_pairs is not None and f"{source_lang}-{target_lang}" not in self.model_cache:
+            self.language_pairs.check(source_lang, target_lang)
+    
+    def load_model(self, source_lang: str, target_lang: str):
+        """Load (or fetch from the cache) the translation model for a language pair"""
+        self.check_pair(source_lang, target_lang)
+        model_key = f"{source_lang}-{target_lang}"
+        model_name = f"{self.model_name}-{source_lang}-{target_lang}"
+        try:
+            pipeline_obj = self.model_cache.get_or_load(model_key, lambda: self._load_pipeline(model_name))
+        except ValueError:
+            if self.language_pairs is not None:
+                self.language_pairs.record_failure(source_lang, target_lang)
+            raise
+        if self.language_pairs is not None:
+            self.language_pairs.record_success(source_lang, target_lang)
+        return pipeline_obj
+    
+    def _load_pipeline(self, model_name: str):
+        """Load a translation pipeline from the hub or local cache"""
+        started = time.perf_counter()
         try:
             logger.info(f"Loading translation model: {model_name}")
-            pipeline_obj = pipeline("translation", model=model_name)
-            self.loaded_models[model_key] = pipeline_obj
-            self.pipeline = pipeline_obj
+            pipeline_obj = self.optimize_pipeline(self.backend.build_pipeline("translation", model_name))
+            self.record_load(started)
             logger.info(f"Translation model {model_name} loaded successfully!")
+            return pipeline_obj
         except Exception as e:
             logger.error(f"Error loading translation model {model_name}: {e}")
             raise ValueError(f"Translation model not available: {str(e)}")
     
     def predict(self, text: str, source_lang: str, target_lang: str):
         """Perform translation on text"""
-        self.load_model(source_lang, target_lang)
-        return self.pipeline(text)
+        # Use a local reference so concurrent requests for other pairs never
+        # swap the pipeline out from under this one
+        translator = self.load_model(source_lang, target_lang)
+        return translator(text)
+    
+    def predict_batch(
+        self,
+        texts: List[str],
+        source_lang: str,
+        target_lang: str,
+        batch_size: Optional[int] = None
+    ) -> list:
+        """
+        Translate several texts of one language pair with batched generation
+        
+        Texts are run in length-sorted buckets of `batch_size` and the
+        results are returned in input order. Inputs longer than the model's
+        window are truncated rather than rejected.
+        """
+        translator = self.load_model(source_lang, target_lang)
+        
+        results: list = [None] * len(texts)
+        for bucket in self.length_buckets(texts, batch_size, tokenizer=translator.tokenizer):
+            MODEL_BATCH_SIZE.observe(len(bucket), model=self.task)
+            outputs = translator([texts[i] for i in bucket], batch_size=len(bucket), truncation=True)
+            for index, output in zip(bucket, outputs):
+                results[index] = output
+        return results
+
+class GenerationModelProvider(ModelProvider):
+    """
+    Base class for providers of text generation (seq2seq) models
+    
+    Subclasses set `generate_kwargs`, the generation settings their pipeline
+    is built with.
+    """
+    
+    # Overrides that make decoding stream-friendly: one sequence, token by token
+    GREEDY_KWARGS = {"num_beams": 1, "num_return_sequences": 1, "do_sample": False}
+    
+    # A few decoding steps with the configured search are enough to warm up
+    WARMUP_GENERATE_KWARGS = {"max_length": 16, "min_length": 0}
+    
+    def __init__(self, max_workers: int = 1, quantize: bool = False):
+        super().__init__(max_workers=max_workers, quantize=quantize)
+        self.generate_kwargs: Dict[str, Any] = {}
+    
+    def can_stream(self, greedy: bool = False) -> bool:
+        """
+        Whether generation with these settings can be streamed token by token
+        
+        Only a single greedy or sampled sequence can be: beam search does not
+        know which hypothesis wins until the end.
+        """
+        if greedy:
+            return True
+        num_beams = self.generate_kwargs.get("num_beams")
+        if num_beams is None and self.pipeline is not None:
+            num_beams = self.pipeline.model.generation_config.num_beams
+        return (num_beams or 1) == 1 and self.generate_kwargs.get("num_return_sequences", 1) == 1
+    
+    def warm_up_call(self, text: str):
+        self.pipeline(text, **self.WARMUP_GENERATE_KWARGS)
+    
+    def predict_stream(
+        self,
+        text: str,
+        on_text: Callable[[str], None],
+        greedy: bool = False,
+        cancelled: Optional[threading.Event] = None,
+        generate_kwargs: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Generate for `text`, passing decoded text to `on_text` as it is produced
+        
+        With beam search `on_text` is never called (see `can_stream`); the
+        complete output is still returned.
+        
+        Args:
+            text: Input text
+            on_text: Called from the inference thread with each new piece of text
+            greedy: Use greedy decoding instead of the configured settings
+            cancelled: Stop generating early once this event is set
+            generate_kwargs: Other generation overrides for this call (e.g. max_length)
+            
+        Returns:
+            The pipeline output, as from predict()
+        """
+        if not self.pipeline:
+            # Load on-demand if not loaded at startup
+            self.load_model()
+        from transformers import StoppingCriteriaList
+        from lib.providers.streaming import CallbackStreamer, CancelledCriteria
+        kwargs = dict(generate_kwargs or {})
+        if greedy:
+            kwargs.update(self.GREEDY_KWARGS)
+        if cancelled is not None:
+            kwargs["stopping_criteria"] = StoppingCriteriaList([CancelledCriteria(cancelled)])
+        if self.can_stream(greedy):
+            kwargs["streamer"] = CallbackStreamer(
+                self.pipeline.tokenizer,
+                on_text,
+                # Decode the way the pipeline decodes its final output
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=False
+            )
+        return self.pipeline(text, **kwargs)
 
-class ParaphraseModelProvider(ModelProvider):
-    def __init__(self, model_name: str = "tuner007/pegasus_paraphrase"):
-        super().__init__()
+
+class ParaphraseModelProvider(GenerationModelProvider):
+    task = "paraphrase"
+    
+    def __init__(
+        self,
+        model_name: str = "tuner007/pegasus_paraphrase",
+        max_workers: int = 1,
+        quantize: bool = False
+    ):
+        super().__init__(max_workers=max_workers, quantize=quantize)
         self.model_name = model_name
+        # One sequence by default; callers ask for more per request
+        self.generate_kwargs = {"max_length": 60, "num_beams": 5}
     
     def load_model(self):
         """Load the paraphrasing model"""
+        started = time.perf_counter()
         try:
             logger.info(f"Loading paraphrasing model: {self.model_name}")
-            self.pipeline = pipeline(
+            self.pipeline = self.backend.build_pipeline(
                 "text2text-generation",
-                model=self.model_name,
-                max_length=60,
-                num_beams=5,
-                num_return_sequences=3
+                self.model_name,
+                **self.generate_kwargs
             )
+            self.optimize_pipeline(self.pipeline)
+            self.record_load(started)
             logger.info("Paraphrasing model loaded successfully!")
         except Exception as e:
             logger.error(f"Error loading paraphrasing model: {e}")
             raise
-    def predict(self, text: str):
-        """Perform paraphrasing on text"""
+    def predict(self, text: str, **generate_kwargs):
+        """
+        Perform paraphrasing on text
+        
+        `generate_kwargs` override the generation settings for this call
+        (e.g. num_beams, num_return_sequences, max_length).
+        """
         if not self.pipeline:
             # Load on-demand if not loaded at startup
             self.load_model()
-        return self.pipeline(text)
+        return self.pipeline(text, **generate_kwargs)
 
-class SummarizationModelProvider(ModelProvider):
-    def __init__(self, model_name: str = "facebook/bart-large-cnn"):
-        super().__init__()
+class SummarizationModelProvider(GenerationModelProvider):
+    """
+    Provider for summarization models
+    
+    `predict` and `predict_stream` size the summary to the input: length
+    bounds are planned from the input's token count, and inputs shorter
+    than `min_input_tokens` are returned as their own summary without
+    running the model. `predict_batch` keeps the configured bounds.
+    """
+    
+    task = "summarization"
+    
+    # Summaries are planned to be up to this fraction of the input by default
+    DEFAULT_RATIO = 0.5
+    
+    # Smallest max_length planned, in tokens
+    MIN_SUMMARY_TOKENS = 8
+    
+    # Planned max_length is rounded up to a multiple of this, so inputs of
+    # similar length share generation settings (and batches)
+    LENGTH_STEP = 8
+    
+    def __init__(
+        self,
+        model_name: str = "facebook/bart-large-cnn",
+        max_workers: int = 1,
+        quantize: bool = False,
+        min_input_tokens: int = 32
+    ):
+        super().__init__(max_workers=max_workers, quantize=quantize)
         self.model_name = model_name
+        self.generate_kwargs = {"max_length": 150, "min_length": 30, "do_sample": False}
+        self.min_input_tokens = min_input_tokens
+    
+    # Sentence ends, or blank lines between paragraphs
+    SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
     
     def load_model(self):
         """Load the summarization model"""
+        started = time.perf_counter()
         try:
             logger.info(f"Loading summarization model: {self.model_name}")
-            self.pipeline = pipeline(
+            self.pipeline = self.backend.build_pipeline(
                 "summarization",
-                model=self.model_name,
-                max_length=150,
-                min_length=30,
-                do_sample=False
+                self.model_name,
+                **self.generate_kwargs
             )
+            self.optimize_pipeline(self.pipeline)
+            self.record_load(started)
             logger.info("Summarization model loaded successfully!")
         except Exception as e:
             logger.error(f"Error loading summarization model: {e}")
             raise
     
-    def predict(self, text: str):
-        """Perform summarization on text"""
+    def is_too_short(self, text: str, max_tokens: Optional[int] = None) -> bool:
+        """Whether `text` is too short to be worth summarizing (it is its own summary)"""
         if not self.pipeline:
-            # Load on-demand if not loaded at startup
             self.load_model()
-        return self.pipeline(text)
\ No newline at end of file
+        return self._too_short(self.token_lengths([text])[0], max_tokens)
+    
+    def _too_short(self, tokens: int, max_tokens: Optional[int]) -> bool:
+        # A short text is still summarized if it exceeds the requested length
+        return tokens < self.min_input_tokens and (max_tokens is None or tokens <= max_tokens)
+    
+    def plan_generation(
+        self,
+        text: str,
+        ratio: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> Optional[Dict[str, int]]:
+        """
+        Choose generation length bounds from the input's token count
+        
+        The summary may be up to `ratio` of the input's length, capped by
+        `max_tokens`; the configured min_length is scaled down to at most
+        half of the planned max_length.
+        
+        Args:
+            text: Text to summarize
+            ratio: Summary length relative to the input (default DEFAULT_RATIO)
+            max_tokens: Upper bound on the summary length (default: the configured max_length)
+            
+        Returns:
+            max_length/min_length overrides, or None when the text is too
+            short to summarize
+        """
+        if not self.pipeline:
+            self.load_model()
+        tokens = self.token_lengths([text])[0]
+        if self._too_short(tokens, max_tokens):
+            return None
+        target = math.ceil(tokens * (ratio or self.DEFAULT_RATIO))
+        target = math.ceil(target / self.LENGTH_STEP) * self.LENGTH_STEP
+        max_length = min(max_tokens or self.generate_kwargs["max_length"], max(self.MIN_SUMMARY_TOKENS, target))
+        min_length = min(self.generate_kwargs["min_length"], max_length // 2)
+        return {"max_length": max_length, "min_length": min_length}
+    
+    def predict(self, text: str, ratio: Optional[float] = None, max_tokens: Optional[int] = None):
+        """Perform summarization on text, with length bounds planned from the input"""
+        plan = self.plan_generation(text, ratio, max_tokens)
+        if plan is None:
+            return [{"summary_text": text}]
+        return self.pipeline(text, **plan)
+    
+    def predict_stream(
+        self,
+        text: str,
+        on_text: Callable[[str], None],
+        greedy: bool = False,
+        cancelled: Optional[threading.Event] = None,
+        ratio: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ):
+        """
+        Stream a summary with length bounds planned from the input
+        
+        A text too short to summarize is passed to `on_text` whole and
+        returned unchanged.
+        """
+        plan = self.plan_generation(text, ratio, max_tokens)
+        if plan is None:
+            on_text(text)
+            return [{"summary_text": text}]
+        return super().predict_stream(text, on_text, greedy=greedy, cancelled=cancelled, generate_kwargs=plan)
+    
+    def predict_batch(self, texts: List[str], batch_size: Optional[int] = None, **generate_kwargs) -> list:
+        """
+        Summarize several texts with batched generation
+        
+        Texts are run in length-sorted buckets of `batch_size` and the
+        results are returned in input order. Inputs longer than the model's
+        window are truncated rather than rejected. `generate_kwargs`
+        override the configured generation settings for every text.
+        """
+        if not self.pipeline:
+            self.load_model()
+        
+        results: list = [None] * len(texts)
+        for bucket in self.length_buckets(texts, batch_size):
+            MODEL_BATCH_SIZE.observe(len(bucket), model=self.task)
+            outputs = self.pipeline(
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                truncation=True,
+                **generate_kwargs
+            )
+            for index, output in zip(bucket, outputs):
+                results[index] = output
+        return results
+    
+    @property
+    def max_input_tokens(self) -> int:
+        """Longest input the model reads, in tokens (excluding special tokens)"""
+        if not self.pipeline:
+            self.load_model()
+        tokenizer = self.pipeline.tokenizer
+        limit = tokenizer.model_max_length
+        if limit > 100_000:
+            # Tokenizers without a configured limit report a huge placeholder
+            limit = self.pipeline.model.config.max_position_embeddings
+        return limit - tokenizer.num_special_tokens_to_add()
+    
+    def chunk_text(self, text: str, max_tokens: Optional[int] = None) -> List[str]:
+        """
+        Split text into chunks that each fit in the model's input window
+        
+        Chunks are cut on sentence boundaries and packed as full as
+        possible; a single sentence longer than the window is split between
+        words.
+        
+        Args:
+            text: Text to split
+            max_tokens: Token budget per chunk (defaults to `max_input_tokens`)
+            
+        Returns:
+            Chunks in document order (one chunk if the text already fits)
+        """
+        max_tokens = max_tokens or self.max_input_tokens
+        sentences = [s.strip() for s in self.SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+        
+        units = []
+        for sentence, length in zip(sentences, self.token_lengths(sentences)):
+            if length <= max_tokens:
+                units.append((sentence, length))
+            else:
+                words = sentence.split()
+                units.extend(zip(words, self.token_lengths(words)))
+        
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for unit, length in units:
+            if current and current_tokens + length > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(unit)
+            current_tokens += length
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
\ No newline at end of file
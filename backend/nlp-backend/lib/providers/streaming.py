@@ -0,0 +1,33 @@
+"""
+Generation hooks for token streaming and cancellation
+
+These subclass transformers classes, so they live apart from the providers
+and are imported only when a generation is streamed: importing the API
+layer must not pull in transformers or torch.
+"""
+import threading
+from typing import Callable
+from transformers import StoppingCriteria, TextStreamer
+
+
+class CallbackStreamer(TextStreamer):
+    """Streamer that hands each newly decoded piece of generated text to a callback"""
+    
+    def __init__(self, tokenizer, on_text: Callable[[str], None], **decode_kwargs):
+        # skip_prompt drops the decoder start token of encoder-decoder models
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.on_text = on_text
+    
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.on_text(text)
+
+
+class CancelledCriteria(StoppingCriteria):
+    """Stops generation once `cancelled` is set (e.g. the client went away)"""
+    
+    def __init__(self, cancelled: threading.Event):
+        self.cancelled = cancelled
+    
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.cancelled.is_set()
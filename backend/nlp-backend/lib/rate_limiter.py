@@ -1,11 +1,31 @@
 """
 Rate limiting configuration for API endpoints
+
+Two layers:
+- `limiter` (slowapi) caps requests per route and client IP
+- `cost_limiter` charges each model request its estimated compute cost
+  (task weight x input tokens) against a token bucket per API key, or per
+  IP without a known key. Bucket sizes come from the `rate_limit` tiers in
+  lib.auth.API_KEYS, so a long /summarize uses up far more of a client's
+  budget than a short /analyze.
+
+Requests shed by a model's admission control (lib.providers.admission) are
+answered here too, with 503 rather than 429: the server is busy, not the
+client over its budget.
 """
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from lib.auth import API_KEY_NAME, API_KEYS
+from lib.metrics import RATE_LIMIT_REJECTIONS
+from lib.providers.admission import ModelOverloaded
 
 
 # Initialize rate limiter
@@ -16,12 +36,19 @@ limiter = Limiter(
 )
 
 
+def _endpoint(request: Request) -> str:
+    """Route template of a request, for metric labels"""
+    route = request.scope.get("route")
+    return getattr(route, "path", request.url.path)
+
+
 # Custom rate limit exceeded handler
 async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
     """
     Custom handler for rate limit exceeded errors
     Returns user-friendly JSON response instead of HTML error page
     """
+    RATE_LIMIT_REJECTIONS.inc(endpoint=_endpoint(request))
     return JSONResponse(
         status_code=429,
         content={
@@ -31,3 +58,221 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
         }
     )
 
+
+# Relative compute cost per input token of each task (sentiment = 1)
+TASK_WEIGHTS = {
+    "sentiment": 1.0,
+    "ner": 1.5,
+    "translation": 4.0,
+    "paraphrase": 8.0,
+    "summarization": 8.0,
+}
+
+# Input tokens charged as one cost unit; a short /analyze costs 1 unit
+TOKENS_PER_UNIT = 64
+
+# Characters per token, to estimate token counts without tokenizing
+CHARS_PER_TOKEN = 4
+
+PERIOD_SECONDS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[float, float]:
+    """
+    Parse a rate like "20/minute" into (amount, period in seconds)
+
+    Raises:
+        ValueError: The rate is not "<number>/<second|minute|hour|day>"
+    """
+    try:
+        amount, period = rate.split("/")
+        return float(amount), float(PERIOD_SECONDS[period.strip().rstrip("s")])
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate '{rate}'; expected e.g. '20/minute'")
+
+
+def estimate_cost(task: str, texts: Iterable[str]) -> float:
+    """
+    Estimated compute cost of running `task` on `texts`, in cost units
+
+    Each text costs the task's weight times its estimated tokens per
+    TOKENS_PER_UNIT, and at least the weight.
+    """
+    weight = TASK_WEIGHTS[task]
+    return sum(
+        weight * max(1.0, len(text) / CHARS_PER_TOKEN / TOKENS_PER_UNIT)
+        for text in texts
+    )
+
+
+class CostLimitExceeded(Exception):
+    """A client's compute budget cannot cover a request yet"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Compute budget exhausted; retry in {math.ceil(retry_after)} seconds")
+        self.retry_after = retry_after
+
+
+class CostLimiter:
+    """
+    Token buckets of cost units, one per client
+
+    A bucket holds up to its tier's amount and refills at amount/period.
+    A request costing more than a whole bucket is charged the full bucket,
+    so it is allowed once the bucket is full instead of never.
+
+    Args:
+        tiers: API key -> its "rate_limit" (e.g. "20/minute", in cost units)
+        anonymous_rate: Budget per IP for requests without a known API key
+    """
+
+    # Full buckets are dropped once there are more than this many clients
+    MAX_BUCKETS = 10_000
+
+    def __init__(self, tiers: Dict[str, str], anonymous_rate: str = "100/minute"):
+        self.tiers = {key: parse_rate(rate) for key, rate in tiers.items()}
+        self.anonymous_rate = parse_rate(anonymous_rate)
+        self.enabled = True
+        # Client -> (units left, time.monotonic() of the last update)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def client(self, request: Request) -> Tuple[str, Tuple[float, float]]:
+        """The bucket key and rate for a request: its API key if known, else its IP"""
+        api_key = request.headers.get(API_KEY_NAME)
+        if api_key in self.tiers:
+            return f"key:{api_key}", self.tiers[api_key]
+        return f"ip:{get_remote_address(request)}", self.anonymous_rate
+
+    def charge(self, request: Request, cost: float):
+        """
+        Take `cost` units from the request's bucket
+
+        Raises:
+            CostLimitExceeded: The bucket cannot cover the cost yet
+        """
+        if not self.enabled:
+            return
+        key, rate = self.client(request)
+        wait = self.acquire(key, rate, cost)
+        if wait > 0:
+            raise CostLimitExceeded(wait)
+
+    def refund(self, request: Request, cost: float):
+        """Give back `cost` units taken by charge (e.g. for work that was shed)"""
+        if not self.enabled:
+            return
+        key, (capacity, _) = self.client(request)
+        with self._lock:
+            if key in self._buckets:
+                units, updated = self._buckets[key]
+                self._buckets[key] = (min(capacity, units + min(cost, capacity)), updated)
+
+    def acquire(self, key: str, rate: Tuple[float, float], cost: float, now: Optional[float] = None) -> float:
+        """
+        Take `cost` units from bucket `key` if it has them
+
+        Returns:
+            0 if the units were taken, else seconds until the bucket will
+            have enough
+        """
+        capacity, period = rate
+        refill_per_second = capacity / period
+        cost = min(cost, capacity)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            units, updated = self._buckets.get(key, (capacity, now))
+            units = min(capacity, units + (now - updated) * refill_per_second)
+            if units >= cost:
+                self._buckets[key] = (units - cost, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (units, now)
+                wait = (cost - units) / refill_per_second
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._drop_full_buckets(now, period)
+        return wait
+
+    def _drop_full_buckets(self, now: float, period: float):
+        """Forget clients idle long enough to have refilled (call with the lock held)"""
+        for key, (_, updated) in list(self._buckets.items()):
+            if now - updated >= period:
+                del self._buckets[key]
+
+    def reset(self):
+        """Refill every bucket"""
+        with self._lock:
+            self._buckets.clear()
+
+
+class CostCharge:
+    """
+    One request's compute cost, taken only once its model work is admitted
+
+    Routes hand one to their service, which calls it after a result-cache
+    miss and once admission control would let the model call through, so
+    cache hits and requests shed with 503 cost nothing. Calling it again is
+    a no-op; `refund` gives the units back if the work is shed after all.
+
+    Args:
+        limiter: Budgets to charge
+        request: Request whose client pays
+        cost: Units to charge (see estimate_cost)
+    """
+
+    def __init__(self, limiter: CostLimiter, request: Request, cost: float):
+        self.limiter = limiter
+        self.request = request
+        self.cost = cost
+        self.charged = False
+
+    def __call__(self):
+        """
+        Charge the cost, unless already charged
+
+        Raises:
+            CostLimitExceeded: The client's budget cannot cover the cost yet
+        """
+        if not self.charged:
+            self.limiter.charge(self.request, self.cost)
+            self.charged = True
+
+    def refund(self):
+        """Give the cost back if it was charged"""
+        if self.charged:
+            self.limiter.refund(self.request, self.cost)
+            self.charged = False
+
+
+async def cost_limit_handler(request: Request, exc: CostLimitExceeded):
+    """Reject a request over its compute budget, saying when to retry"""
+    RATE_LIMIT_REJECTIONS.inc(endpoint=_endpoint(request))
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "Rate limit exceeded",
+            "message": "Compute budget exhausted. Please try again later.",
+            "detail": str(exc)
+        },
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
+
+
+async def model_overloaded_handler(request: Request, exc: ModelOverloaded):
+    """Shed a request its model cannot take in time, saying when to retry"""
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": "Service overloaded",
+            "message": "The model is busy. Please try again later.",
+            "detail": str(exc)
+        },
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
+# Budgets per API key tier, and per IP for everyone else
+cost_limiter = CostLimiter(
+    {key: info["rate_limit"] for key, info in API_KEYS.items()},
+    anonymous_rate=os.getenv("COST_LIMIT_ANONYMOUS", "100/minute")
+)
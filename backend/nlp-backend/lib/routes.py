@@ -1,51 +1,147 @@
 """
 API routes for the NLP application
 """
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from lib.models import (
     ParaphraseResponse,
     SummarizationResponse,
     TextInput,
+    AnalyzeAllInput,
+    AnalyzeAllResponse,
+    DocumentInput,
+    StreamTextInput,
+    ParaphraseInput,
+    SummarizationInput,
     BatchTextInput,
     TranslationInput,
+    BatchTranslationInput,
     SentimentResponse,
     TranslationResponse,
+    BatchTranslationResponse,
+    LanguagePair,
+    LanguagesResponse,
     NERResponse,
-    BatchSentimentResponse
+    BatchSentimentResponse,
+    JobStatus
 )
+from lib.jobs import JobManager, stream_results
 from lib.services import ParaphraseService, SentimentService, NERService, SummarizationService, TranslationService
-from lib.rate_limiter import limiter
+from lib.metrics import REGISTRY
+from lib.providers.admission import ModelOverloaded
+from lib.rate_limiter import CostCharge, CostLimitExceeded, cost_limiter, estimate_cost, limiter
 
 # Create router
 router = APIRouter()
 
 
-def get_sentiment_service() -> SentimentService:
+def get_sentiment_service(request: Request) -> SentimentService:
     """Dependency to get sentiment service"""
-    from main import sentiment_service
-    return sentiment_service
+    return request.app.state.sentiment_service
 
 
-def get_ner_service() -> NERService:
+def get_ner_service(request: Request) -> NERService:
     """Dependency to get NER service"""
-    from main import ner_service
-    return ner_service
+    return request.app.state.ner_service
 
 
-def get_translation_service() -> TranslationService:
+def get_translation_service(request: Request) -> TranslationService:
     """Dependency to get translation service"""
-    from main import translation_service
-    return translation_service
+    return request.app.state.translation_service
 
-def get_paraphrase_service() -> ParaphraseService:
+def get_paraphrase_service(request: Request) -> ParaphraseService:
     """Dependency to get paraphrase service"""
-    from main import paraphrase_service
-    return paraphrase_service
+    return request.app.state.paraphrase_service
 
-def get_summarization_service() -> SummarizationService:
+def get_summarization_service(request: Request) -> SummarizationService:
     """Dependency to get summarization service"""
-    from main import summarization_service
-    return summarization_service
+    return request.app.state.summarization_service
+
+def get_job_manager(request: Request) -> JobManager:
+    """Dependency to get the bulk job manager"""
+    return request.app.state.job_manager
+
+
+def cost_charge(request: Request, task: str, texts: List[str]) -> CostCharge:
+    """
+    The cost of running `task` on `texts`, for the service to charge only if
+    the model runs (cache hits and shed requests are free)
+    """
+    return CostCharge(cost_limiter, request, estimate_cost(task, texts))
+
+
+def get_job_or_404(job_id: str, jobs: JobManager) -> dict:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_response(events: AsyncIterator[Tuple[str, Any]], task: str) -> StreamingResponse:
+    """
+    Send a service's stream events as server-sent events
+    
+    Each ("token", text) becomes a `token` event with {"text": ...}; the
+    final response becomes a `done` event with the same body as the
+    non-streaming endpoint. The first event is awaited before the response
+    starts, so a request that is shed or over its compute budget still
+    gets its 503/429. Later failures are sent as an `error` event, since
+    the status code has already gone out.
+    """
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"{task} failed: {str(e)}")
+    
+    def format_event(event: str, payload: Any) -> str:
+        if event == "token":
+            return sse_event("token", {"text": payload})
+        return sse_event("done", payload.model_dump())
+    
+    async def body():
+        if first is None:
+            return
+        yield format_event(*first)
+        try:
+            async for event, payload in events:
+                yield format_event(event, payload)
+        except Exception as e:
+            yield sse_event("error", {"detail": f"{task} failed: {str(e)}"})
+    
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response sent while the request body is still being read
+    
+    StreamingResponse watches for client disconnects by reading from the
+    request channel, which would swallow body chunks the response has not
+    consumed yet. This one only sends; reading the body raises
+    ClientDisconnect if the client goes away.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
 
 # Health check endpoints
 @router.get("/")
@@ -59,18 +155,47 @@ async def root(request: Request):
 @limiter.limit("30/minute")
 async def health_check(request: Request):
     """Detailed health check endpoint with model status"""
-    from main import sentiment_model, ner_model, paraphrase_model, summarization_model
+    models = request.app.state.models
     return {
         "status": "healthy",
         "models": {
-            "sentiment": sentiment_model.is_loaded() if sentiment_model else False,
-            "ner": ner_model.is_loaded() if ner_model else False,
-            "paraphrase": paraphrase_model.is_loaded() if paraphrase_model else False,
-            "summarization": summarization_model.is_loaded() if summarization_model else False
+            name: models[name].is_loaded() if models.get(name) else False
+            for name in ("sentiment", "ner", "paraphrase", "summarization")
         }
     }
 
 
+@router.get("/ready")
+async def readiness_check(request: Request):
+    """
+    Readiness probe: 200 once the required models are loaded and warmed up,
+    503 until then (unlike /health, which only says the process is alive)
+    Not rate limited so load balancer probes are never rejected
+    """
+    models = request.app.state.models
+    status = {
+        name: {
+            "loaded": models[name].is_loaded(),
+            "warmed_up": models[name].warmed_up
+        }
+        for name in request.app.state.ready_models
+    }
+    ready = all(model["loaded"] and model["warmed_up"] for model in status.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not ready", "models": status}
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics (text exposition format)
+    Not rate limited so scrapers are never rejected
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # Sentiment analysis endpoints
 @router.post("/analyze", response_model=SentimentResponse)
 @limiter.limit("20/minute")
@@ -83,8 +208,11 @@ async def analyze_sentiment(
     Analyze the sentiment of the provided text
     Rate limited to 20 requests per minute per IP
     """
+    charge = cost_charge(request, "sentiment", [input_data.text])
     try:
-        return service.analyze_sentiment(input_data.text)
+        return await service.analyze_sentiment_async(input_data.text, charge=charge)
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
@@ -100,13 +228,59 @@ async def analyze_batch_sentiment(
     Analyze sentiment for multiple texts at once
     Rate limited to 10 requests per minute (more expensive operation)
     """
+    charge = cost_charge(request, "sentiment", input_data.texts)
     try:
-        results = service.analyze_batch(input_data.texts)
+        results = await service.analyze_batch_async(input_data.texts, charge=charge)
         return BatchSentimentResponse(results=results)
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
 
 
+@router.post("/analyze-all", response_model=AnalyzeAllResponse)
+@limiter.limit("10/minute")
+async def analyze_all(
+    request: Request,
+    input_data: AnalyzeAllInput,
+    sentiment_service: SentimentService = Depends(get_sentiment_service),
+    ner_service: NERService = Depends(get_ner_service),
+    paraphrase_service: ParaphraseService = Depends(get_paraphrase_service),
+    summarization_service: SummarizationService = Depends(get_summarization_service)
+):
+    """
+    Run several tasks on one text in a single request
+    The tasks run concurrently, each on its model's inference executor;
+    a failed task is reported in `errors` while the others still return
+    Rate limited to 10 requests per minute (runs several models)
+    """
+    text = input_data.text
+    runners = {
+        "sentiment": lambda charge: sentiment_service.analyze_sentiment_async(text, charge=charge),
+        "ner": lambda charge: ner_service.extract_entities_async(text, charge=charge),
+        "paraphrase": lambda charge: paraphrase_service.paraphrase_async(text, charge=charge),
+        "summarization": lambda charge: summarization_service.summarize_async(text, charge=charge),
+    }
+    tasks = input_data.tasks
+    # Each task is charged only if its model runs
+    outcomes = await asyncio.gather(*(
+        runners[task](cost_charge(request, task, [text])) for task in tasks
+    ), return_exceptions=True)
+    
+    response = AnalyzeAllResponse()
+    for task, outcome in zip(tasks, outcomes):
+        if isinstance(outcome, BaseException):
+            response.errors[task] = f"{task} failed: {str(outcome)}"
+        else:
+            setattr(response, task, outcome)
+    if len(response.errors) == len(tasks):
+        for refusal in (CostLimitExceeded, ModelOverloaded):
+            if all(isinstance(outcome, refusal) for outcome in outcomes):
+                raise max(outcomes, key=lambda outcome: outcome.retry_after)
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {response.errors}")
+    return response
+
+
 # NER endpoints
 @router.post("/ner", response_model=NERResponse)
 @limiter.limit("15/minute")
@@ -119,8 +293,11 @@ async def extract_entities(
     Extract named entities from the provided text
     Rate limited to 15 requests per minute (compute-intensive)
     """
+    charge = cost_charge(request, "ner", [input_data.text])
     try:
-        return service.extract_entities(input_data.text)
+        return await service.extract_entities_async(input_data.text, charge=charge)
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"NER failed: {str(e)}")
 
@@ -137,34 +314,113 @@ async def translate_text(
     Translate text from source language to target language
     Rate limited to 15 requests per minute (loads models dynamically)
     """
+    charge = cost_charge(request, "translation", [input_data.text])
     try:
-        translated_text = service.translate(
+        translated_text = await service.translate_async(
             input_data.text,
             input_data.source_lang,
-            input_data.target_lang
+            input_data.target_lang,
+            charge=charge
         )
         return TranslationResponse(translated_text=translated_text)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
 
+
+@router.get("/languages", response_model=LanguagesResponse)
+@limiter.limit("30/minute")
+async def list_languages(request: Request):
+    """
+    List the language pairs /translate accepts
+    Pairs come from the configured allow-list and the locally cached models;
+    `loaded` marks pairs whose model is already in memory
+    """
+    provider = request.app.state.models["translation"]
+    loaded = set(provider.loaded_pairs)
+    return LanguagesResponse(pairs=[
+        LanguagePair(source_lang=source, target_lang=target, loaded=f"{source}-{target}" in loaded)
+        for source, target in provider.supported_pairs()
+    ])
+
+
+@router.post("/translate-batch", response_model=BatchTranslationResponse)
+@limiter.limit("10/minute")
+async def translate_batch(
+    request: Request,
+    input_data: BatchTranslationInput,
+    service: TranslationService = Depends(get_translation_service)
+):
+    """
+    Translate multiple texts, each with its own language pair
+    Items sharing a pair are translated together in batches
+    Rate limited to 10 requests per minute (more expensive operation)
+    """
+    charge = cost_charge(request, "translation", [item.text for item in input_data.items])
+    try:
+        translations = await service.translate_items_async([
+            (item.text, item.source_lang, item.target_lang) for item in input_data.items
+        ], charge=charge)
+        return BatchTranslationResponse(
+            results=[TranslationResponse(translated_text=text) for text in translations]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch translation failed: {str(e)}")
+
 # Paraphrasing endpoints
 @router.post("/paraphrase", response_model=ParaphraseResponse)
 @limiter.limit("15/minute")
 async def paraphrase_text(
     request: Request,
-    input_data: TextInput,
+    input_data: ParaphraseInput,
     service: ParaphraseService = Depends(get_paraphrase_service)
 ):
     """
     Paraphrase the provided text
+    Generation settings are optional and capped by the server
     Rate limited to 15 requests per minute
     """
+    charge = cost_charge(request, "paraphrase", [input_data.text])
     try:
-        return service.paraphrase(input_data.text)
+        return await service.paraphrase_async(
+            input_data.text,
+            num_candidates=input_data.num_candidates,
+            num_beams=input_data.num_beams,
+            greedy=input_data.greedy,
+            max_length=input_data.max_length,
+            charge=charge
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Paraphrasing failed: {str(e)}")
+
+
+@router.post("/paraphrase-stream")
+@limiter.limit("15/minute")
+async def paraphrase_text_stream(
+    request: Request,
+    input_data: StreamTextInput,
+    service: ParaphraseService = Depends(get_paraphrase_service)
+):
+    """
+    Paraphrase the provided text, streaming the output as server-sent events
+    Rate limited to 15 requests per minute
+    """
+    charge = cost_charge(request, "paraphrase", [input_data.text])
+    return await sse_response(
+        service.paraphrase_stream(input_data.text, greedy=input_data.greedy, charge=charge),
+        "Paraphrasing"
+    )
     
     
 # Summarization endpoints
@@ -172,14 +428,157 @@ async def paraphrase_text(
 @limiter.limit("15/minute")
 async def summarize_text(
     request: Request,
-    input_data: TextInput,
+    input_data: SummarizationInput,
     service: SummarizationService = Depends(get_summarization_service)
 ):
     """
     Summarize the provided text
+    The summary length follows the input's length (see `ratio`/`max_tokens`)
     Rate limited to 15 requests per minute
     """
+    charge = cost_charge(request, "summarization", [input_data.text])
     try:
-        return service.summarize(input_data.text)
+        return await service.summarize_async(
+            input_data.text,
+            ratio=input_data.ratio,
+            max_tokens=input_data.max_tokens,
+            charge=charge
+        )
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+
+
+@router.post("/summarize-document", response_model=SummarizationResponse)
+@limiter.limit("5/minute")
+async def summarize_document(
+    request: Request,
+    input_data: DocumentInput,
+    service: SummarizationService = Depends(get_summarization_service)
+):
+    """
+    Summarize a long document (up to 50000 characters)
+    Rate limited to 5 requests per minute (runs the model once per chunk)
+    """
+    charge = cost_charge(request, "summarization", [input_data.text])
+    try:
+        return await service.summarize_document_async(input_data.text, charge=charge)
+    except (ModelOverloaded, CostLimitExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+
+
+@router.post("/summarize-stream")
+@limiter.limit("15/minute")
+async def summarize_text_stream(
+    request: Request,
+    input_data: StreamTextInput,
+    service: SummarizationService = Depends(get_summarization_service)
+):
+    """
+    Summarize the provided text, streaming the summary as server-sent events
+    Rate limited to 15 requests per minute
+    """
+    charge = cost_charge(request, "summarization", [input_data.text])
+    return await sse_response(
+        service.summarize_stream(input_data.text, greedy=input_data.greedy, charge=charge),
+        "Summarization"
+    )
+
+
+# Bulk job endpoints
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+@limiter.limit("5/minute")
+async def create_job(
+    request: Request,
+    task: str,
+    source_lang: Optional[str] = None,
+    target_lang: Optional[str] = None,
+    jobs: JobManager = Depends(get_job_manager)
+):
+    """
+    Submit a JSONL corpus (request body, one {"text": ..., "id": ...} per line)
+    to be processed in the background; returns the job to poll
+    Rate limited to 5 requests per minute
+    """
+    params = {"source_lang": source_lang, "target_lang": target_lang}
+    params = {name: value for name, value in params.items() if value is not None}
+    try:
+        job = await jobs.create(task, params, request.stream())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JobStatus(**job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+@limiter.limit("60/minute")
+async def get_job(
+    request: Request,
+    job_id: str,
+    jobs: JobManager = Depends(get_job_manager)
+):
+    """
+    Progress of a bulk job
+    Rate limited to 60 requests per minute
+    """
+    return JobStatus(**get_job_or_404(job_id, jobs))
+
+
+@router.get("/jobs/{job_id}/results")
+@limiter.limit("10/minute")
+async def get_job_results(
+    request: Request,
+    job_id: str,
+    jobs: JobManager = Depends(get_job_manager)
+):
+    """
+    Download the results of a completed bulk job as JSONL, in input order
+    Rate limited to 10 requests per minute
+    """
+    job = get_job_or_404(job_id, jobs)
+    if job["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}, results are not ready")
+    return FileResponse(
+        jobs.results_path(job_id),
+        media_type="application/x-ndjson",
+        filename=f"{job_id}.jsonl"
+    )
+
+
+# NDJSON streaming endpoint
+@router.post("/ndjson")
+@limiter.limit("10/minute")
+async def process_ndjson(
+    request: Request,
+    task: str,
+    source_lang: Optional[str] = None,
+    target_lang: Optional[str] = None,
+    jobs: JobManager = Depends(get_job_manager)
+):
+    """
+    Run a task over an NDJSON request body (one {"text": ..., "id": ...} per line),
+    streaming one NDJSON result per line as each batch completes
+    Rate limited to 10 requests per minute; each batch is charged to the
+    client's compute budget, and the stream ends early once it runs out
+    """
+    job_task = jobs.tasks.get(task)
+    if job_task is None:
+        raise HTTPException(status_code=400, detail=f"Unknown task '{task}'; expected one of: {', '.join(sorted(jobs.tasks))}")
+    params = {"source_lang": source_lang, "target_lang": target_lang}
+    try:
+        params = job_task.validate({k: v for k, v in params.items() if v is not None})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return DuplexStreamingResponse(
+        stream_results(
+            job_task,
+            params,
+            request.stream(),
+            request.app.state.ndjson_batch_size,
+            charge=lambda texts: cost_charge(request, task, texts)
+        ),
+        media_type="application/x-ndjson"
+    )
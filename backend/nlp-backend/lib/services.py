@@ -1,9 +1,17 @@
 """
 Business logic services for NLP operations
 """
+import asyncio
 import logging
-from typing import List, Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+from pydantic import BaseModel
+from lib.batching import MicroBatcher
+from lib.cache import ResultCache, make_cache_key
+from lib.providers.admission import ModelOverloaded
 from lib.providers.model_providers import (
+    ModelProvider,
     SentimentModelProvider,
     NERModelProvider,
     SummarizationModelProvider,
@@ -11,15 +19,178 @@ from lib.providers.model_providers import (
     ParaphraseModelProvider,
 )
 from lib.models import Entity, NERResponse, SentimentResponse, BatchSentimentResult, ParaphraseResponse, SummarizationResponse
+from lib.rate_limiter import CostCharge
 
 logger = logging.getLogger(__name__)
 
 
-class SentimentService:
-    """Service for sentiment analysis operations"""
+class CachedService:
+    """
+    Base class for services whose responses can be served from a ResultCache
+    
+    Responses are cached under a hash of (task, model, params, text). The
+    async path checks the cache on the event loop and only dispatches to
+    the inference executor on a miss; the cache's persistent store (if
+    any) is read and written on the default executor, never on the loop.
+    
+    Async methods take an optional CostCharge, which is only charged on a
+    cache miss once the model call would be admitted (see _charging).
+    """
     
-    def __init__(self, model_provider: SentimentModelProvider):
+    task: str = ""
+    
+    def __init__(self, model_provider: ModelProvider, cache: Optional[ResultCache] = None):
         self.model_provider = model_provider
+        self.cache = cache
+    
+    def _cache_lookup(self, text: str, params: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """Return (key, cached value); both are None when caching is disabled"""
+        if self.cache is None:
+            return None, None
+        key = make_cache_key(self.task, self.model_provider.model_id, params, text)
+        return key, self.cache.get(key)
+    
+    def _cache_store(self, key: Optional[str], response: Any):
+        """Store a response (Pydantic models are stored as plain dicts)"""
+        if key is None:
+            return
+        if isinstance(response, BaseModel):
+            response = response.model_dump()
+        self.cache.set(key, response, task=self.task, model_id=self.model_provider.model_id)
+    
+    async def _cache_lookup_async(self, text: str, params: Dict[str, Any]) -> Tuple[Optional[str], Any]:
+        """Like _cache_lookup, for use on the event loop"""
+        if self.cache is None:
+            return None, None
+        key = make_cache_key(self.task, self.model_provider.model_id, params, text)
+        return key, await self.cache.get_async(key)
+    
+    async def _cache_store_async(self, key: Optional[str], response: Any):
+        """Like _cache_store, for use on the event loop"""
+        if key is None:
+            return
+        if isinstance(response, BaseModel):
+            response = response.model_dump()
+        await self.cache.set_async(key, response, task=self.task, model_id=self.model_provider.model_id)
+    
+    @staticmethod
+    def _restore(value: Any, response_type: type) -> Any:
+        """Rebuild a response from its cached form"""
+        if issubclass(response_type, BaseModel):
+            return response_type(**value)
+        return value
+    
+    @contextmanager
+    def _charging(self, charge: Optional[CostCharge]) -> Iterator[None]:
+        """
+        Take `charge` (if any) for the model work in the block
+        
+        Admission is checked first, so a request about to be shed is not
+        charged; if the work is shed anyway once queued (e.g. with its
+        micro-batch), the charge is refunded.
+        
+        Raises:
+            ModelOverloaded: The model would not admit the work
+            CostLimitExceeded: The client's budget cannot cover it
+        """
+        if charge is not None:
+            self.model_provider.check_admission()
+            charge()
+        try:
+            yield
+        except ModelOverloaded:
+            if charge is not None:
+                charge.refund()
+            raise
+    
+    def _cached(self, text: str, params: Dict[str, Any], compute: Callable[[], Any], response_type: type) -> Any:
+        """Return the cached response for text/params, computing it on a miss"""
+        key, cached = self._cache_lookup(text, params)
+        if cached is not None:
+            return self._restore(cached, response_type)
+        response = compute()
+        self._cache_store(key, response)
+        return response
+    
+    async def _cached_async(
+        self,
+        text: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Any],
+        response_type: type,
+        charge: Optional[CostCharge] = None
+    ) -> Any:
+        """Like _cached, but runs `compute` on the model's inference executor"""
+        key, cached = await self._cache_lookup_async(text, params)
+        if cached is not None:
+            return self._restore(cached, response_type)
+        with self._charging(charge):
+            response = await self.model_provider.run_in_executor(compute)
+        await self._cache_store_async(key, response)
+        return response
+    
+    async def _cached_stream(
+        self,
+        text: str,
+        params: Dict[str, Any],
+        compute: Callable[[Callable[[str], None], threading.Event], Any],
+        response_type: type,
+        charge: Optional[CostCharge] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a response as ("token", text) events followed by ("done", response)
+        
+        `compute(on_text, cancelled)` runs on the inference executor and calls
+        `on_text` with each piece of generated text. A cache hit yields only
+        the "done" event. If the consumer stops early, `cancelled` is set so
+        generation can stop, and nothing is cached.
+        """
+        key, cached = await self._cache_lookup_async(text, params)
+        if cached is not None:
+            yield "done", self._restore(cached, response_type)
+            return
+        
+        loop = asyncio.get_running_loop()
+        pieces: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        
+        def on_text(piece: str):
+            loop.call_soon_threadsafe(pieces.put_nowait, piece)
+        
+        with self._charging(charge):
+            task = asyncio.ensure_future(self.model_provider.run_in_executor(compute, on_text, cancelled))
+            # Runs after every piece queued by on_text, so None marks the end
+            task.add_done_callback(lambda _: pieces.put_nowait(None))
+            try:
+                while True:
+                    piece = await pieces.get()
+                    if piece is None:
+                        break
+                    yield "token", piece
+                response = task.result()
+            finally:
+                if not task.done():
+                    cancelled.set()
+        
+        await self._cache_store_async(key, response)
+        yield "done", response
+
+
+class SentimentService(CachedService):
+    """Service for sentiment analysis operations"""
+    
+    task = "sentiment"
+    
+    def __init__(
+        self,
+        model_provider: SentimentModelProvider,
+        batcher: Optional[MicroBatcher] = None,
+        batch_size: int = 32,
+        cache: Optional[ResultCache] = None
+    ):
+        super().__init__(model_provider, cache)
+        self.batcher = batcher
+        self.batch_size = batch_size
     
     def analyze_sentiment(self, text: str) -> SentimentResponse:
         """
@@ -31,8 +202,55 @@ class SentimentService:
         Returns:
             SentimentResponse with sentiment, confidence, and scores
         """
-        results = self.model_provider.predict(text)
+        return self._cached(
+            text, {},
+            lambda: self._build_response(self.model_provider.predict(text)),
+            SentimentResponse
+        )
+    
+    async def analyze_sentiment_async(self, text: str, charge: Optional[CostCharge] = None) -> SentimentResponse:
+        """
+        Analyze sentiment of a single text, sharing a forward pass with
+        concurrent requests when a batcher is configured
+        
+        Args:
+            text: The text to analyze
+            charge: Cost to charge if the model has to run
+            
+        Returns:
+            SentimentResponse with sentiment, confidence, and scores
+        """
+        if self.batcher is None:
+            return await self._cached_async(
+                text, {},
+                lambda: self._build_response(self.model_provider.predict(text)),
+                SentimentResponse,
+                charge
+            )
         
+        key, cached = await self._cache_lookup_async(text, {})
+        if cached is not None:
+            return SentimentResponse(**cached)
+        
+        # A batched call returns one entry per text; wrap it so it has the
+        # same shape as a single-text prediction
+        with self._charging(charge):
+            item_result = await self.batcher.submit(text)
+        response = self._build_response([item_result])
+        await self._cache_store_async(key, response)
+        return response
+    
+    def _build_response(self, results) -> SentimentResponse:
+        """Convert raw pipeline output for one text into a SentimentResponse"""
+        sentiment, confidence, all_scores = self._parse_result(results)
+        return SentimentResponse(
+            sentiment=sentiment,
+            confidence=confidence,
+            all_scores=all_scores
+        )
+    
+    def _parse_result(self, results):
+        """Pick the best label from raw pipeline output for one text"""
         # Extract the highest scoring sentiment
         if isinstance(results, list) and len(results) > 0:
             if isinstance(results[0], list):
@@ -54,11 +272,7 @@ class SentimentService:
         else:
             sentiment = "Neutral"
         
-        return SentimentResponse(
-            sentiment=sentiment,
-            confidence=round(best_result['score'], 3),
-            all_scores=all_scores
-        )
+        return sentiment, round(best_result['score'], 3), all_scores
     
     def analyze_batch(self, texts: List[str]) -> List[BatchSentimentResult]:
         """
@@ -70,23 +284,60 @@ class SentimentService:
         Returns:
             List of BatchSentimentResult objects
         """
-        results = []
-        for text in texts:
-            if text.strip():
-                analysis_result = self.analyze_sentiment(text)
-                results.append(BatchSentimentResult(
+        texts = [text for text in texts if text.strip()]
+        
+        # Each distinct text is answered from the cache or run through the
+        # model once
+        unique_results = {}
+        to_predict = []
+        for text in dict.fromkeys(texts):
+            key, cached = self._cache_lookup(text, {})
+            if cached is not None:
+                unique_results[text] = BatchSentimentResult(
                     text=text,
-                    sentiment=analysis_result.sentiment,
-                    confidence=analysis_result.confidence
-                ))
-        return results
+                    sentiment=cached['sentiment'],
+                    confidence=cached['confidence']
+                )
+            else:
+                to_predict.append((text, key))
+        
+        predictions = []
+        if to_predict:
+            predictions = self.model_provider.predict_batch(
+                [text for text, _ in to_predict],
+                batch_size=self.batch_size
+            )
+        for (text, key), prediction in zip(to_predict, predictions):
+            # A batched call returns one entry per text; wrap it so it has the
+            # same shape as a single-text prediction
+            sentiment, confidence, all_scores = self._parse_result([prediction])
+            unique_results[text] = BatchSentimentResult(
+                text=text,
+                sentiment=sentiment,
+                confidence=confidence
+            )
+            self._cache_store(key, {
+                "sentiment": sentiment,
+                "confidence": confidence,
+                "all_scores": all_scores
+            })
+        
+        # Scatter back in the original order, duplicates included
+        return [unique_results[text] for text in texts]
+    
+    async def analyze_batch_async(self, texts: List[str], charge: Optional[CostCharge] = None) -> List[BatchSentimentResult]:
+        """Analyze a batch of texts on the model's inference executor"""
+        with self._charging(charge):
+            return await self.model_provider.run_in_executor(self.analyze_batch, texts)
 
 
-class NERService:
+class NERService(CachedService):
     """Service for Named Entity Recognition operations"""
     
-    def __init__(self, model_provider: NERModelProvider):
-        self.model_provider = model_provider
+    task = "ner"
+    
+    def __init__(self, model_provider: NERModelProvider, cache: Optional[ResultCache] = None):
+        super().__init__(model_provider, cache)
     
     def extract_entities(self, text: str) -> NERResponse:
         """
@@ -98,8 +349,54 @@ class NERService:
         Returns:
             NERResponse with extracted entities
         """
-        entities_result = self.model_provider.predict(text)
+        return self._cached(text, self._params(), lambda: self._extract_entities(text), NERResponse)
+    
+    async def extract_entities_async(self, text: str, charge: Optional[CostCharge] = None) -> NERResponse:
+        """Extract entities on the model's inference executor"""
+        return await self._cached_async(text, self._params(), lambda: self._extract_entities(text), NERResponse, charge)
+    
+    def extract_entities_batch(self, texts: List[str]) -> List[NERResponse]:
+        """
+        Extract named entities from several texts with batched forward passes
+        
+        Each distinct text is answered from the cache or run through the
+        model once.
+        
+        Args:
+            texts: Texts to process
+            
+        Returns:
+            One NERResponse per text, in input order
+        """
+        params = self._params()
+        responses: Dict[str, NERResponse] = {}
+        to_predict = []
+        for text in dict.fromkeys(texts):
+            key, cached = self._cache_lookup(text, params)
+            if cached is not None:
+                responses[text] = self._restore(cached, NERResponse)
+            else:
+                to_predict.append((text, key))
         
+        outputs = []
+        if to_predict:
+            outputs = self.model_provider.predict_batch([text for text, _ in to_predict])
+        for (text, key), entities_result in zip(to_predict, outputs):
+            responses[text] = self._build_response(text, entities_result)
+            self._cache_store(key, responses[text])
+        
+        return [responses[text] for text in texts]
+    
+    def _params(self) -> Dict[str, Any]:
+        """Settings that change which entities are found in long texts"""
+        return {"window_stride": self.model_provider.window_stride}
+    
+    def _extract_entities(self, text: str) -> NERResponse:
+        """Run the NER model and convert its output (uncached)"""
+        return self._build_response(text, self.model_provider.predict(text))
+    
+    def _build_response(self, text: str, entities_result: list) -> NERResponse:
+        """Convert raw pipeline output for one text into an NERResponse"""
         # Convert to Entity objects
         entities = []
         for ent in entities_result:
@@ -119,11 +416,19 @@ class NERService:
         )
 
 
-class TranslationService:
+class TranslationService(CachedService):
     """Service for translation operations"""
     
-    def __init__(self, model_provider: TranslationModelProvider):
-        self.model_provider = model_provider
+    task = "translation"
+    
+    def __init__(
+        self,
+        model_provider: TranslationModelProvider,
+        cache: Optional[ResultCache] = None,
+        batch_size: int = 16
+    ):
+        super().__init__(model_provider, cache)
+        self.batch_size = batch_size
     
     def translate(
         self, 
@@ -142,46 +447,483 @@ class TranslationService:
         Returns:
             Translated text
         """
+        params = {"source_lang": source_lang, "target_lang": target_lang}
+        return self._cached(
+            text, params,
+            lambda: self._translate(text, source_lang, target_lang),
+            str
+        )
+    
+    async def translate_async(
+        self,
+        text: str,
+        source_lang: str = "en",
+        target_lang: str = "ar",
+        charge: Optional[CostCharge] = None
+    ) -> str:
+        """
+        Translate text on the model's inference executor
+        
+        Unsupported pairs are rejected on the event loop, before any work is
+        queued on the executor.
+        """
+        self.model_provider.check_pair(source_lang, target_lang)
+        params = {"source_lang": source_lang, "target_lang": target_lang}
+        return await self._cached_async(
+            text, params,
+            lambda: self._translate(text, source_lang, target_lang),
+            str,
+            charge
+        )
+    
+    def translate_batch(
+        self,
+        texts: List[str],
+        source_lang: str = "en",
+        target_lang: str = "ar"
+    ) -> List[str]:
+        """
+        Translate several texts of one language pair with batched generation
+        
+        Each distinct text is answered from the cache or translated once, in
+        length-sorted batches of `batch_size`.
+        
+        Args:
+            texts: Texts to translate
+            source_lang: Source language code
+            target_lang: Target language code
+            
+        Returns:
+            One translated text per input, in input order
+        """
+        params = {"source_lang": source_lang, "target_lang": target_lang}
+        translations: Dict[str, str] = {}
+        to_predict = []
+        for text in dict.fromkeys(texts):
+            key, cached = self._cache_lookup(text, params)
+            if cached is not None:
+                translations[text] = cached
+            else:
+                to_predict.append((text, key))
+        
+        outputs = []
+        if to_predict:
+            outputs = self.model_provider.predict_batch(
+                [text for text, _ in to_predict], source_lang, target_lang, self.batch_size
+            )
+        for (text, key), output in zip(to_predict, outputs):
+            translations[text] = output['translation_text']
+            self._cache_store(key, translations[text])
+        
+        return [translations[text] for text in texts]
+    
+    async def translate_items_async(
+        self,
+        items: List[Tuple[str, str, str]],
+        charge: Optional[CostCharge] = None
+    ) -> List[str]:
+        """
+        Translate (text, source_lang, target_lang) items that may mix language pairs
+        
+        Items are grouped by pair and each group is translated as one
+        batch on the model's inference executor (groups run concurrently
+        when the executor has several workers).
+        
+        Returns:
+            One translated text per item, in input order
+            
+        Raises:
+            ValueError: An item's language pair is not supported
+        """
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, (_, source_lang, target_lang) in enumerate(items):
+            groups.setdefault((source_lang, target_lang), []).append(index)
+        # Reject the whole batch up front if any pair is unsupported
+        for source_lang, target_lang in groups:
+            self.model_provider.check_pair(source_lang, target_lang)
+        
+        with self._charging(charge):
+            outputs = await asyncio.gather(*(
+                self.model_provider.run_in_executor(
+                    self.translate_batch, [items[i][0] for i in indices], source_lang, target_lang
+                )
+                for (source_lang, target_lang), indices in groups.items()
+            ))
+        
+        results: List[str] = [""] * len(items)
+        for indices, translations in zip(groups.values(), outputs):
+            for index, translation in zip(indices, translations):
+                results[index] = translation
+        return results
+    
+    def _translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Run the translation model (uncached)"""
         translation_result = self.model_provider.predict(text, source_lang, target_lang)
         return translation_result[0]['translation_text']
 
-class ParaphraseService:
+class ParaphraseService(CachedService):
     """Service for paraphrasing operations"""
     
-    def __init__(self, model_provider: ParaphraseModelProvider):
-        self.model_provider = model_provider
+    task = "paraphrase"
+    
+    def __init__(
+        self,
+        model_provider: ParaphraseModelProvider,
+        cache: Optional[ResultCache] = None,
+        max_candidates: int = 5,
+        max_beams: int = 8,
+        max_length: int = 60
+    ):
+        super().__init__(model_provider, cache)
+        # Ceilings on the per-request generation settings
+        self.max_candidates = max_candidates
+        self.max_beams = max_beams
+        self.max_length = max_length
     
-    def paraphrase(self, text: str) -> ParaphraseResponse:
+    def paraphrase(
+        self,
+        text: str,
+        num_candidates: int = 1,
+        num_beams: Optional[int] = None,
+        greedy: bool = False,
+        max_length: Optional[int] = None
+    ) -> ParaphraseResponse:
         """
         Paraphrase the given text
         
         Args:
             text: The text to paraphrase
+            num_candidates: Number of paraphrases to return
+            num_beams: Beam width (None keeps the model's setting)
+            greedy: Decode greedily (one candidate, fastest)
+            max_length: Maximum paraphrase length in tokens (None keeps the model's setting)
 
         Returns:
             ParaphraseResponse object containing the paraphrased text
+            
+        Raises:
+            ValueError: The settings exceed the server's ceilings or contradict each other
+        """
+        kwargs = self.generation_kwargs(num_candidates, num_beams, greedy, max_length)
+        return self._cached(text, kwargs, lambda: self._paraphrase(text, kwargs), ParaphraseResponse)
+    
+    async def paraphrase_async(
+        self,
+        text: str,
+        num_candidates: int = 1,
+        num_beams: Optional[int] = None,
+        greedy: bool = False,
+        max_length: Optional[int] = None,
+        charge: Optional[CostCharge] = None
+    ) -> ParaphraseResponse:
+        """Paraphrase text on the model's inference executor (settings are checked first)"""
+        kwargs = self.generation_kwargs(num_candidates, num_beams, greedy, max_length)
+        return await self._cached_async(text, kwargs, lambda: self._paraphrase(text, kwargs), ParaphraseResponse, charge)
+    
+    def generation_kwargs(
+        self,
+        num_candidates: int = 1,
+        num_beams: Optional[int] = None,
+        greedy: bool = False,
+        max_length: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Validate per-request settings and turn them into generation overrides
+        
+        Only settings that differ from the model's defaults are included, so
+        a default request has no overrides (and shares its cache entries with
+        /paraphrase-stream).
+        
+        Raises:
+            ValueError: The settings exceed the server's ceilings or contradict each other
+        """
+        if num_candidates > self.max_candidates:
+            raise ValueError(f"num_candidates must be at most {self.max_candidates}")
+        if num_beams is not None and num_beams > self.max_beams:
+            raise ValueError(f"num_beams must be at most {self.max_beams}")
+        if max_length is not None and max_length > self.max_length:
+            raise ValueError(f"max_length must be at most {self.max_length}")
+        
+        kwargs: Dict[str, Any] = {}
+        if greedy:
+            if num_candidates > 1:
+                raise ValueError("Greedy decoding returns a single candidate")
+            kwargs.update(self.model_provider.GREEDY_KWARGS)
+        elif num_beams is not None:
+            kwargs["num_beams"] = num_beams
+        if num_candidates > 1:
+            beams = kwargs.get("num_beams") or self.model_provider.generate_kwargs.get("num_beams", 1)
+            if num_candidates > beams:
+                raise ValueError(f"num_candidates cannot exceed num_beams ({beams})")
+            kwargs["num_return_sequences"] = num_candidates
+        if max_length is not None:
+            kwargs["max_length"] = max_length
+        return kwargs
+    
+    def paraphrase_stream(
+        self,
+        text: str,
+        greedy: bool = False,
+        charge: Optional[CostCharge] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Paraphrase text, yielding the output as it is generated
+        
+        Yields ("token", text) pieces while generating and finally
+        ("done", ParaphraseResponse). The configured beam search produces no
+        pieces, only the final response; `greedy` decodes greedily so that
+        tokens can be streamed.
         """
-        paraphrase_result = self.model_provider.predict(text)
-        return ParaphraseResponse(paraphrased_text=paraphrase_result[0]['generated_text'])
+        params = {"greedy": True} if greedy else {}
+        
+        def compute(on_text: Callable[[str], None], cancelled: threading.Event) -> ParaphraseResponse:
+            result = self.model_provider.predict_stream(text, on_text, greedy=greedy, cancelled=cancelled)
+            return ParaphraseResponse(paraphrased_text=result[0]['generated_text'])
+        
+        return self._cached_stream(text, params, compute, ParaphraseResponse, charge)
+    
+    def _paraphrase(self, text: str, generate_kwargs: Optional[Dict[str, Any]] = None) -> ParaphraseResponse:
+        """Run the paraphrase model (uncached)"""
+        paraphrase_result = self.model_provider.predict(text, **(generate_kwargs or {}))
+        candidates = [result['generated_text'] for result in paraphrase_result]
+        return ParaphraseResponse(
+            paraphrased_text=candidates[0],
+            candidates=candidates if len(candidates) > 1 else None
+        )
 
-class SummarizationService:
+class SummarizationService(CachedService):
     """Service for text summarization operations"""
 
-    def __init__(self, model_provider: SummarizationModelProvider):
-        self.model_provider = model_provider
+    task = "summarization"
     
-    def summarize(self, text: str) -> SummarizationResponse:
+    # Cache params that keep document summaries apart from /summarize results
+    DOCUMENT_PARAMS = {"document": True}
+    
+    # Partial summaries are chunked and summarized again at most this many times
+    MAX_REDUCE_ROUNDS = 3
+    
+    # Texts up to this many characters are tokenized on the event loop, so
+    # ones too short to summarize are answered without queueing for the model
+    SHORT_CHECK_MAX_CHARS = 512
+
+    def __init__(
+        self,
+        model_provider: SummarizationModelProvider,
+        cache: Optional[ResultCache] = None,
+        batch_size: int = 8
+    ):
+        super().__init__(model_provider, cache)
+        self.batch_size = batch_size
+    
+    def summarize(
+        self,
+        text: str,
+        ratio: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> SummarizationResponse:
         """
         Summarize the given text
         
+        The summary length is planned from the input's length; texts too
+        short to summarize are returned unchanged.
+        
         Args:
             text: The text to summarize
+            ratio: Summary length relative to the input (default: the model's)
+            max_tokens: Upper bound on the summary length in tokens
 
         Returns:
             SummarizationResponse with summarized text
         """
-        summary_result = self.model_provider.predict(text)
+        return self._cached(
+            text, self._length_params(ratio, max_tokens),
+            lambda: self._summarize(text, ratio, max_tokens),
+            SummarizationResponse
+        )
+    
+    async def summarize_async(
+        self,
+        text: str,
+        ratio: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        charge: Optional[CostCharge] = None
+    ) -> SummarizationResponse:
+        """Summarize text on the model's inference executor (short texts are answered directly)"""
+        if self._is_too_short_now(text, max_tokens):
+            return SummarizationResponse(summary_text=text)
+        return await self._cached_async(
+            text, self._length_params(ratio, max_tokens),
+            lambda: self._summarize(text, ratio, max_tokens),
+            SummarizationResponse,
+            charge
+        )
+    
+    def summarize_stream(
+        self,
+        text: str,
+        greedy: bool = False,
+        charge: Optional[CostCharge] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Summarize text, yielding the summary as it is generated
+        
+        Yields ("token", text) pieces while generating and finally
+        ("done", SummarizationResponse). If the model decodes with beam search
+        there are no pieces, only the final response; `greedy` decodes
+        greedily so that tokens can be streamed. A text too short to
+        summarize is sent back as a single piece.
+        """
+        if self._is_too_short_now(text):
+            return self._unchanged_stream(text)
+        params = self._length_params()
+        if greedy:
+            params["greedy"] = True
+        
+        def compute(on_text: Callable[[str], None], cancelled: threading.Event) -> SummarizationResponse:
+            result = self.model_provider.predict_stream(text, on_text, greedy=greedy, cancelled=cancelled)
+            return SummarizationResponse(summary_text=result[0]['summary_text'])
+        
+        return self._cached_stream(text, params, compute, SummarizationResponse, charge)
+    
+    @staticmethod
+    async def _unchanged_stream(text: str) -> AsyncIterator[Tuple[str, Any]]:
+        yield "token", text
+        yield "done", SummarizationResponse(summary_text=text)
+    
+    def _length_params(self, ratio: Optional[float] = None, max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Cache params for the settings that determine a summary's length"""
+        return {
+            "ratio": ratio or self.model_provider.DEFAULT_RATIO,
+            "max_tokens": max_tokens,
+            "min_input_tokens": self.model_provider.min_input_tokens
+        }
+    
+    def _is_too_short_now(self, text: str, max_tokens: Optional[int] = None) -> bool:
+        """
+        Whether `text` is known to be too short to summarize without waiting
+        for the executor (the model is loaded and the text is short enough
+        to tokenize on the event loop)
+        """
+        provider = self.model_provider
+        return (
+            provider.is_loaded()
+            and len(text) <= self.SHORT_CHECK_MAX_CHARS
+            and provider.is_too_short(text, max_tokens)
+        )
+    
+    def summarize_batch(self, texts: List[str]) -> List[SummarizationResponse]:
+        """
+        Summarize several texts with batched generation
+        
+        Each distinct text is answered from the cache or summarized once, in
+        length-sorted batches of `batch_size` per planned summary length.
+        Texts too short to summarize are returned unchanged, and inputs
+        longer than the model's window are truncated.
+        
+        Args:
+            texts: Texts to summarize
+
+        Returns:
+            One SummarizationResponse per text, in input order
+        """
+        params = self._length_params()
+        responses: Dict[str, SummarizationResponse] = {}
+        # Texts to summarize, grouped by their planned length bounds
+        groups: Dict[Tuple[Tuple[str, int], ...], List[Tuple[str, Optional[str]]]] = {}
+        for text in dict.fromkeys(texts):
+            key, cached = self._cache_lookup(text, params)
+            if cached is not None:
+                responses[text] = self._restore(cached, SummarizationResponse)
+                continue
+            plan = self.model_provider.plan_generation(text)
+            if plan is None:
+                responses[text] = SummarizationResponse(summary_text=text)
+            else:
+                groups.setdefault(tuple(sorted(plan.items())), []).append((text, key))
+        
+        for plan, group in groups.items():
+            outputs = self.model_provider.predict_batch([text for text, _ in group], self.batch_size, **dict(plan))
+            for (text, key), output in zip(group, outputs):
+                response = SummarizationResponse(summary_text=output['summary_text'])
+                self._cache_store(key, response)
+                responses[text] = response
+        
+        return [responses[text] for text in texts]
+    
+    def _summarize(
+        self,
+        text: str,
+        ratio: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> SummarizationResponse:
+        """Run the summarization model (uncached)"""
+        summary_result = self.model_provider.predict(text, ratio, max_tokens)
         # Hugging Face summarization pipeline returns 'summary_text' key
         return SummarizationResponse(summary_text=summary_result[0]['summary_text'])
+    
+    def summarize_document(self, text: str) -> SummarizationResponse:
+        """
+        Summarize a document longer than the model's input window (map-reduce)
+        
+        The text is split into window-sized chunks on sentence boundaries,
+        each chunk is summarized, and the concatenated partial summaries
+        are summarized again (repeating while they still don't fit).
+        
+        Args:
+            text: The document to summarize
 
-        
\ No newline at end of file
+        Returns:
+            SummarizationResponse with the summary of the whole document
+        """
+        return self._cached(text, self.DOCUMENT_PARAMS, lambda: self._summarize_document(text), SummarizationResponse)
+    
+    async def summarize_document_async(self, text: str, charge: Optional[CostCharge] = None) -> SummarizationResponse:
+        """
+        Summarize a long document, spreading the chunk summaries over the executor
+        
+        The chunks are divided between the executor's workers and each
+        worker summarizes its share as one batched generation. The document
+        is admitted once, by its first stage; the later stages are never
+        shed, so work already done is not thrown away under load.
+        """
+        key, cached = await self._cache_lookup_async(text, self.DOCUMENT_PARAMS)
+        if cached is not None:
+            return self._restore(cached, SummarizationResponse)
+        
+        provider = self.model_provider
+        with self._charging(charge):
+            chunks = await provider.run_in_executor(provider.chunk_text, text)
+            for _ in range(self.MAX_REDUCE_ROUNDS):
+                if len(chunks) == 1:
+                    break
+                groups = self._worker_groups(chunks)
+                outputs = await asyncio.gather(*(
+                    provider.run_background(provider.predict_batch, group, self.batch_size) for group in groups
+                ))
+                summaries = [output['summary_text'] for group_outputs in outputs for output in group_outputs]
+                chunks = await provider.run_background(provider.chunk_text, " ".join(summaries))
+            
+            final = await provider.run_background(provider.predict_batch, [" ".join(chunks)])
+        response = SummarizationResponse(summary_text=final[0]['summary_text'])
+        await self._cache_store_async(key, response)
+        return response
+    
+    def _summarize_document(self, text: str) -> SummarizationResponse:
+        """Run map-reduce summarization on the calling thread (uncached)"""
+        provider = self.model_provider
+        chunks = provider.chunk_text(text)
+        for _ in range(self.MAX_REDUCE_ROUNDS):
+            if len(chunks) == 1:
+                break
+            outputs = provider.predict_batch(chunks, self.batch_size)
+            chunks = provider.chunk_text(" ".join(output['summary_text'] for output in outputs))
+        
+        # Anything still too long after the last round is truncated by the model
+        final = provider.predict_batch([" ".join(chunks)])
+        return SummarizationResponse(summary_text=final[0]['summary_text'])
+    
+    def _worker_groups(self, chunks: List[str]) -> List[List[str]]:
+        """Split chunks into contiguous groups, one per executor worker"""
+        workers = min(self.model_provider.max_workers, len(chunks))
+        size = -(-len(chunks) // workers)
+        return [chunks[start:start + size] for start in range(0, len(chunks), size)]
@@ -4,8 +4,10 @@ Main FastAPI application with clean architecture
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
+import asyncio
 import logging
 import os
+import time
 from dotenv import load_dotenv
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -15,7 +17,16 @@ load_dotenv()
 
 # Import our modules
 from lib.routes import router
-from lib.rate_limiter import limiter, rate_limit_handler
+from lib.metrics import REGISTRY, CallbackMetric, MetricsMiddleware
+from lib.rate_limiter import CostLimitExceeded, cost_limit_handler, limiter, model_overloaded_handler, rate_limit_handler
+from lib.batching import MicroBatcher
+from lib.cache import ResultCache
+from lib.persistent_cache import SQLiteResultStore
+from lib.jobs import JobManager, JobTask
+from lib.models import TranslationInput, TranslationResponse
+from lib.providers.admission import ModelOverloaded
+from lib.providers.backends import get_backend
+from lib.providers.language_pairs import LanguagePairIndex, parse_pairs
 from lib.providers.model_providers import (
     SentimentModelProvider,
     NERModelProvider,
@@ -33,6 +44,101 @@ logger = logging.getLogger(__name__)
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:8000").split(",")
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 
+# Micro-batching for /analyze: concurrent requests are grouped into one forward
+# pass of up to SENTIMENT_MAX_BATCH_SIZE texts, waiting at most SENTIMENT_MAX_WAIT_MS
+# for the batch to fill. A batch size of 1 disables batching.
+SENTIMENT_MAX_BATCH_SIZE = int(os.getenv("SENTIMENT_MAX_BATCH_SIZE", "32"))
+SENTIMENT_MAX_WAIT_MS = float(os.getenv("SENTIMENT_MAX_WAIT_MS", "5"))
+
+# Forward-pass batch size for /analyze-batch (texts are length-sorted into buckets)
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+
+# NER on texts longer than the model's 512-token window runs overlapping windows
+# (NER_WINDOW_STRIDE tokens of overlap, 0 = truncate instead), NER_BATCH_SIZE per pass
+NER_WINDOW_STRIDE = int(os.getenv("NER_WINDOW_STRIDE", "128"))
+NER_BATCH_SIZE = int(os.getenv("NER_BATCH_SIZE", "8"))
+
+# Chunks summarized per batched generation by /summarize-document
+SUMMARIZATION_BATCH_SIZE = int(os.getenv("SUMMARIZATION_BATCH_SIZE", "8"))
+
+# Texts shorter than this many tokens are returned as their own summary
+SUMMARIZATION_MIN_INPUT_TOKENS = int(os.getenv("SUMMARIZATION_MIN_INPUT_TOKENS", "32"))
+
+# Ceilings on the generation settings a /paraphrase request may ask for
+PARAPHRASE_MAX_CANDIDATES = int(os.getenv("PARAPHRASE_MAX_CANDIDATES", "5"))
+PARAPHRASE_MAX_BEAMS = int(os.getenv("PARAPHRASE_MAX_BEAMS", "8"))
+PARAPHRASE_MAX_LENGTH = int(os.getenv("PARAPHRASE_MAX_LENGTH", "60"))
+
+# Texts of one language pair translated per batched generation by /translate-batch
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "16"))
+
+# Dummy inputs of these lengths (in tokens) are run through each loaded model at
+# startup so the first real requests do not pay one-off initialization costs
+# (empty = no warm-up). /ready passes once READY_REQUIRED_MODELS are loaded and warm.
+WARMUP_SEQUENCE_LENGTHS = [int(n) for n in os.getenv("WARMUP_SEQUENCE_LENGTHS", "16,64,256").split(",") if n.strip()]
+READY_REQUIRED_MODELS = [m.strip() for m in os.getenv("READY_REQUIRED_MODELS", "sentiment,ner").split(",") if m.strip()]
+
+# Bulk jobs (POST /jobs) are stored under JOBS_DIR and processed in the background,
+# JOB_BATCH_SIZE lines per batch and checkpoint, at lower priority than requests
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "32"))
+JOB_MAX_LINES = int(os.getenv("JOB_MAX_LINES", "1000000"))
+
+# POST /ndjson runs its input NDJSON_BATCH_SIZE lines at a time, streaming each
+# batch's results back as soon as it completes
+NDJSON_BATCH_SIZE = int(os.getenv("NDJSON_BATCH_SIZE", "32"))
+
+# Inference runs on a bounded thread pool per model so the event loop stays free
+# to accept and validate requests while a forward pass is running
+MODEL_EXECUTOR_WORKERS = int(os.getenv("MODEL_EXECUTOR_WORKERS", "1"))
+
+# Admission control: at most MODEL_MAX_QUEUE calls wait per model (the limit adapts
+# downwards under load), and calls expected to wait longer than MODEL_MAX_WAIT_SECONDS
+# get an immediate 503 with Retry-After (0 = no wait budget). Bulk jobs are never shed.
+MODEL_MAX_QUEUE = int(os.getenv("MODEL_MAX_QUEUE", "32"))
+MODEL_MAX_WAIT_SECONDS = float(os.getenv("MODEL_MAX_WAIT_SECONDS", "10"))
+
+# Models to load with dynamic int8 quantization, comma-separated
+# (sentiment, ner, translation, paraphrase, summarization). Off by default;
+# see benchmarks/quantization_eval.py for the accuracy/latency trade-off.
+QUANTIZE_MODELS = {m.strip() for m in os.getenv("QUANTIZE_MODELS", "").split(",") if m.strip()}
+
+# Inference backend for the encoder models: "torch" (default) or "onnx"
+# (ONNX Runtime, requires optimum[onnxruntime]). ONNX exports are kept in
+# ONNX_MODEL_DIR so they are only exported once.
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+NER_BACKEND = os.getenv("NER_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_models")
+ONNX_NUM_THREADS = int(os.getenv("ONNX_NUM_THREADS", "0")) or None
+
+# Translation models are cached per language pair within a memory budget;
+# pairs unused for TRANSLATION_CACHE_IDLE_SECONDS are unloaded (0 = never)
+TRANSLATION_CACHE_MAX_MB = int(os.getenv("TRANSLATION_CACHE_MAX_MB", "1200"))
+TRANSLATION_CACHE_IDLE_SECONDS = float(os.getenv("TRANSLATION_CACHE_IDLE_SECONDS", "1800"))
+
+# Language pairs /translate may load, in addition to any opus-mt models already in
+# the local Hugging Face cache; other pairs get a 400 without a load attempt.
+# Pairs whose model fails to load are rejected for TRANSLATION_FAILED_PAIR_TTL_SECONDS
+TRANSLATION_LANGUAGE_PAIRS = parse_pairs(os.getenv(
+    "TRANSLATION_LANGUAGE_PAIRS",
+    "en-ar,ar-en,en-de,de-en,en-es,es-en,en-fr,fr-en,en-it,it-en,"
+    "en-nl,nl-en,en-ru,ru-en,en-sv,sv-en,en-zh,zh-en,ja-en"
+))
+TRANSLATION_FAILED_PAIR_TTL_SECONDS = float(os.getenv("TRANSLATION_FAILED_PAIR_TTL_SECONDS", "600"))
+
+# Identical requests are answered from an in-process result cache
+# (RESULT_CACHE_MAX_MB=0 disables it, RESULT_CACHE_TTL_SECONDS=0 means no expiry)
+RESULT_CACHE_MAX_MB = float(os.getenv("RESULT_CACHE_MAX_MB", "64"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "0"))
+
+# Optional persistent tier for the result cache, shared by all workers on a node
+# and kept across restarts (RESULT_CACHE_DB is a SQLite file path; unset disables it)
+RESULT_CACHE_DB = os.getenv("RESULT_CACHE_DB", "")
+RESULT_CACHE_DB_MAX_MB = float(os.getenv("RESULT_CACHE_DB_MAX_MB", "512"))
+RESULT_CACHE_WARM_ENTRIES = int(os.getenv("RESULT_CACHE_WARM_ENTRIES", "1000"))
+# The persistent tier is pruned back under its budget this often, in the background
+RESULT_CACHE_DB_PRUNE_SECONDS = float(os.getenv("RESULT_CACHE_DB_PRUNE_SECONDS", "60"))
+
 logger.info(f"Starting application in {ENVIRONMENT} mode")
 logger.info(f"Allowed CORS origins: {ALLOWED_ORIGINS}")
 
@@ -46,8 +152,15 @@ app = FastAPI(
 # Add rate limiter to app state
 app.state.limiter = limiter
 
-# Add custom rate limit exception handler
+# Add custom rate limit exception handlers (flat per-route limits and compute budgets)
 app.add_exception_handler(RateLimitExceeded, rate_limit_handler)
+app.add_exception_handler(CostLimitExceeded, cost_limit_handler)
+
+# Requests shed by a model's admission control get 503 with Retry-After
+app.add_exception_handler(ModelOverloaded, model_overloaded_handler)
+
+# Record request counts, latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Add CORS middleware to allow requests from Flutter app
 # SECURITY: Only allow requests from specified origins
@@ -60,18 +173,198 @@ app.add_middleware(
 )
 
 # Initialize model providers
-sentiment_model = SentimentModelProvider()
-ner_model = NERModelProvider()
-translation_model = TranslationModelProvider()
-paraphrase_model = ParaphraseModelProvider()
-summarization_model = SummarizationModelProvider()
+sentiment_model = SentimentModelProvider(
+    max_workers=MODEL_EXECUTOR_WORKERS,
+    quantize="sentiment" in QUANTIZE_MODELS,
+    backend=get_backend(SENTIMENT_BACKEND, export_dir=ONNX_MODEL_DIR, num_threads=ONNX_NUM_THREADS)
+)
+ner_model = NERModelProvider(
+    max_workers=MODEL_EXECUTOR_WORKERS,
+    quantize="ner" in QUANTIZE_MODELS,
+    backend=get_backend(NER_BACKEND, export_dir=ONNX_MODEL_DIR, num_threads=ONNX_NUM_THREADS),
+    window_stride=NER_WINDOW_STRIDE,
+    batch_size=NER_BATCH_SIZE
+)
+translation_model = TranslationModelProvider(
+    max_workers=MODEL_EXECUTOR_WORKERS,
+    max_cache_bytes=TRANSLATION_CACHE_MAX_MB * 1024 * 1024,
+    idle_seconds=TRANSLATION_CACHE_IDLE_SECONDS,
+    quantize="translation" in QUANTIZE_MODELS,
+    language_pairs=LanguagePairIndex(
+        "Helsinki-NLP/opus-mt",
+        TRANSLATION_LANGUAGE_PAIRS,
+        failure_ttl=TRANSLATION_FAILED_PAIR_TTL_SECONDS
+    )
+)
+paraphrase_model = ParaphraseModelProvider(
+    max_workers=MODEL_EXECUTOR_WORKERS,
+    quantize="paraphrase" in QUANTIZE_MODELS
+)
+summarization_model = SummarizationModelProvider(
+    max_workers=MODEL_EXECUTOR_WORKERS,
+    quantize="summarization" in QUANTIZE_MODELS,
+    min_input_tokens=SUMMARIZATION_MIN_INPUT_TOKENS
+)
+for _provider in (sentiment_model, ner_model, translation_model, paraphrase_model, summarization_model):
+    _provider.enable_admission(MODEL_MAX_QUEUE, MODEL_MAX_WAIT_SECONDS)
+
+# Initialize result cache shared by all services
+result_store = None
+if RESULT_CACHE_DB:
+    result_store = SQLiteResultStore(
+        RESULT_CACHE_DB,
+        max_bytes=int(RESULT_CACHE_DB_MAX_MB * 1024 * 1024),
+        ttl_seconds=RESULT_CACHE_TTL_SECONDS or None
+    )
+
+result_cache = None
+if RESULT_CACHE_MAX_MB > 0:
+    result_cache = ResultCache(
+        max_bytes=int(RESULT_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=RESULT_CACHE_TTL_SECONDS or None,
+        store=result_store
+    )
+
+# Initialize request schedulers
+sentiment_batcher = None
+if SENTIMENT_MAX_BATCH_SIZE > 1:
+    sentiment_batcher = MicroBatcher(
+        sentiment_model.predict_batch,
+        max_batch_size=SENTIMENT_MAX_BATCH_SIZE,
+        max_wait_ms=SENTIMENT_MAX_WAIT_MS,
+        run_in_executor=sentiment_model.run_in_executor
+    )
 
 # Initialize services
-sentiment_service = SentimentService(sentiment_model)
-ner_service = NERService(ner_model)
-translation_service = TranslationService(translation_model)
-paraphrase_service = ParaphraseService(paraphrase_model)
-summarization_service = SummarizationService(summarization_model)
+sentiment_service = SentimentService(
+    sentiment_model,
+    batcher=sentiment_batcher,
+    batch_size=SENTIMENT_BATCH_SIZE,
+    cache=result_cache
+)
+ner_service = NERService(ner_model, cache=result_cache)
+translation_service = TranslationService(
+    translation_model,
+    cache=result_cache,
+    batch_size=TRANSLATION_BATCH_SIZE
+)
+paraphrase_service = ParaphraseService(
+    paraphrase_model,
+    cache=result_cache,
+    max_candidates=PARAPHRASE_MAX_CANDIDATES,
+    max_beams=PARAPHRASE_MAX_BEAMS,
+    max_length=PARAPHRASE_MAX_LENGTH
+)
+summarization_service = SummarizationService(
+    summarization_model,
+    cache=result_cache,
+    batch_size=SUMMARIZATION_BATCH_SIZE
+)
+
+# Bulk jobs and /ndjson run each batch through the same services as the endpoints
+job_manager = JobManager(
+    JOBS_DIR,
+    tasks={
+        "sentiment": JobTask(
+            sentiment_model,
+            lambda texts, params: sentiment_service.analyze_batch(texts)
+        ),
+        "ner": JobTask(
+            ner_model,
+            lambda texts, params: ner_service.extract_entities_batch(texts)
+        ),
+        "translation": JobTask(
+            translation_model,
+            lambda texts, params: [
+                TranslationResponse(translated_text=text)
+                for text in translation_service.translate_batch(texts, **params)
+            ],
+            input_model=TranslationInput,
+            check_params=lambda params: translation_model.check_pair(params["source_lang"], params["target_lang"])
+        ),
+        "summarization": JobTask(
+            summarization_model,
+            lambda texts, params: summarization_service.summarize_batch(texts)
+        ),
+    },
+    batch_size=JOB_BATCH_SIZE,
+    max_lines=JOB_MAX_LINES
+)
+
+# Expose services and providers to the routes through app state, so route
+# modules never import main
+app.state.sentiment_service = sentiment_service
+app.state.ner_service = ner_service
+app.state.translation_service = translation_service
+app.state.paraphrase_service = paraphrase_service
+app.state.summarization_service = summarization_service
+app.state.job_manager = job_manager
+app.state.ndjson_batch_size = NDJSON_BATCH_SIZE
+app.state.models = {
+    "sentiment": sentiment_model,
+    "ner": ner_model,
+    "translation": translation_model,
+    "paraphrase": paraphrase_model,
+    "summarization": summarization_model,
+}
+
+# Translation models are loaded per language pair on demand, so they cannot
+# gate readiness
+_unknown_ready_models = set(READY_REQUIRED_MODELS) - (set(app.state.models) - {"translation"})
+if _unknown_ready_models:
+    raise ValueError(f"READY_REQUIRED_MODELS has unknown or unsupported models: {sorted(_unknown_ready_models)}")
+app.state.ready_models = READY_REQUIRED_MODELS
+
+
+# Expose values other components already track as metrics, read at scrape time
+def _result_cache_samples(field: str):
+    if result_cache is None:
+        return []
+    return [({}, result_cache.stats()[field])]
+
+
+for _name, _field, _type, _help in (
+    ("result_cache_hits_total", "hits", "counter", "Result cache hits (memory or persistent tier)"),
+    ("result_cache_misses_total", "misses", "counter", "Result cache misses"),
+    ("result_cache_store_hits_total", "store_hits", "counter", "Result cache hits served by the persistent tier"),
+    ("result_cache_entries", "entries", "gauge", "Results held in memory"),
+    ("result_cache_size_bytes", "size_bytes", "gauge", "Serialized size of the results held in memory"),
+):
+    REGISTRY.register(CallbackMetric(_name, _help, _type, lambda field=_field: _result_cache_samples(field)))
+
+REGISTRY.register(CallbackMetric(
+    "translation_models_resident",
+    "Translation models (language pairs) loaded in memory",
+    "gauge",
+    lambda: [({}, len(translation_model.model_cache))]
+))
+REGISTRY.register(CallbackMetric(
+    "translation_models_bytes",
+    "Estimated memory used by loaded translation models",
+    "gauge",
+    lambda: [({}, translation_model.model_cache.total_bytes)]
+))
+REGISTRY.register(CallbackMetric(
+    "model_loaded",
+    "Whether each model is loaded (1) or not (0)",
+    "gauge",
+    lambda: [
+        ({"model": provider.task}, int(provider.is_loaded()))
+        for provider in (sentiment_model, ner_model, translation_model, paraphrase_model, summarization_model)
+    ],
+    labelnames=("model",)
+))
+REGISTRY.register(CallbackMetric(
+    "model_concurrency_limit",
+    "Calls each model currently admits in flight (adapted by admission control)",
+    "gauge",
+    lambda: [
+        ({"model": provider.task}, int(provider.admission.limit))
+        for provider in (sentiment_model, ner_model, translation_model, paraphrase_model, summarization_model)
+        if provider.admission is not None
+    ],
+    labelnames=("model",)
+))
 
 
 def load_models():
@@ -110,10 +403,94 @@ def load_models():
     logger.info("Core models loaded successfully!")
 
 
+def warm_result_cache():
+    """Drop persisted results from old model versions and pre-load the hottest ones"""
+    if result_cache is None or result_store is None:
+        return
+    result_store.invalidate_stale({
+        service.task: service.model_provider.model_id
+        for service in (sentiment_service, ner_service, translation_service,
+                        paraphrase_service, summarization_service)
+    })
+    result_store.prune()
+    result_cache.warm(RESULT_CACHE_WARM_ENTRIES)
+
+
+async def warm_up_models():
+    """
+    Warm up each loaded model on its own inference executor
+    
+    Runs in the background once the server is up: /health answers straight
+    away and /ready passes once the required models are warm. Translation
+    models are loaded per language pair on demand and are not warmed up.
+    """
+    loop = asyncio.get_running_loop()
+    for provider in (sentiment_model, ner_model, paraphrase_model, summarization_model):
+        if not provider.is_loaded():
+            continue
+        started = time.perf_counter()
+        await loop.run_in_executor(provider.executor, provider.warm_up, WARMUP_SEQUENCE_LENGTHS)
+        logger.info(f"✓ {provider.task.capitalize()} model warmed up in {time.perf_counter() - started:.1f}s")
+
+
+async def prune_periodically(name: str, prune, interval: float):
+    """Call the blocking `prune` every `interval` seconds on the default executor"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await loop.run_in_executor(None, prune)
+        except Exception as e:
+            logger.warning(f"Periodic {name} prune failed: {e}")
+
+
+def start_maintenance_tasks():
+    """Start the background tasks that keep caches within their budgets"""
+    tasks = []
+    if result_store is not None and RESULT_CACHE_DB_PRUNE_SECONDS > 0:
+        tasks.append(asyncio.create_task(
+            prune_periodically("result store", result_store.prune, RESULT_CACHE_DB_PRUNE_SECONDS)
+        ))
+    if TRANSLATION_CACHE_IDLE_SECONDS > 0:
+        # Unload idle language pairs even when no other pair is requested;
+        # checking twice per idle period keeps them at most 1.5x that long
+        tasks.append(asyncio.create_task(prune_periodically(
+            "translation model cache",
+            translation_model.model_cache.prune,
+            min(60.0, TRANSLATION_CACHE_IDLE_SECONDS / 2)
+        )))
+    app.state.maintenance_tasks = tasks
+
+
+# Set by serve_prefork.py when models were loaded in the master process
+# before the workers were forked
+models_preloaded = False
+
+
 # Load models on startup
 @app.on_event("startup")
 async def startup_event():
-    load_models()
+    if models_preloaded:
+        logger.info("Using models pre-loaded by the master process")
+    else:
+        load_models()
+        warm_result_cache()
+    # Warm-up runs inference, so it happens here in each serving process and
+    # never in the pre-fork master
+    app.state.warm_up_task = asyncio.create_task(warm_up_models())
+    start_maintenance_tasks()
+    # Picks up queued jobs, and resumes interrupted ones from their checkpoint
+    job_manager.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    warm_up_task = getattr(app.state, "warm_up_task", None)
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    for task in getattr(app.state, "maintenance_tasks", []):
+        task.cancel()
+    await job_manager.stop()
 
 
 # Include router
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pre-fork server: load models once, then fork workers that share them
+
+Running `uvicorn main:app --workers N` makes every worker import main and
+load all models itself, so RAM grows with N. Here the master process loads
+the models, freezes the Python heap and forks the workers afterwards.
+Model weights are never written to during inference, so the workers share
+those memory pages copy-on-write and N workers cost roughly the memory of
+one.
+
+Usage:
+    python serve_prefork.py                    # WEB_CONCURRENCY workers (default 2)
+    python serve_prefork.py --workers 4 --port 8000
+
+Notes:
+    - Inference thread pools are created lazily, so none exist before the fork.
+    - Do not run inference (e.g. warm-up) in the master: torch's OpenMP
+      thread pool is not safe to use after fork once it has been started.
+      Each worker warms up the shared models itself at startup and reports
+      ready on /ready once done.
+"""
+import argparse
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+# Keep the collector from touching (and so copying) shared pages while models load;
+# it is re-enabled in each worker after the fork
+gc.disable()
+
+import uvicorn
+
+logger = logging.getLogger("prefork")
+
+
+def create_socket(host: str, port: int) -> socket.socket:
+    """Bind the listening socket in the master so all workers accept on it"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, log_level: str):
+    """Serve requests in a forked worker until told to stop"""
+    gc.enable()
+    # Restore default signal handling so uvicorn can install its own
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    config = uvicorn.Config(app, log_level=log_level)
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket, log_level: str) -> int:
+    """Fork one worker process and return its pid"""
+    pid = os.fork()
+    if pid == 0:
+        exit_code = 0
+        try:
+            run_worker(app, sock, log_level)
+        except Exception:
+            logger.exception("Worker crashed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+    logger.info(f"Started worker {pid}")
+    return pid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API with pre-loaded, shared models")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument(
+        "--app",
+        default="main",
+        help="Module providing app, load_models(), warm_result_cache() and models_preloaded"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    sock = create_socket(args.host, args.port)
+
+    # Import and load everything once, in the master
+    api = importlib.import_module(args.app)
+    api.load_models()
+    api.warm_result_cache()
+    api.models_preloaded = True
+
+    # Move everything allocated so far out of the collector's reach so that
+    # collections in the workers never write to the shared pages
+    gc.collect()
+    gc.freeze()
+
+    workers = {spawn_worker(api.app, sock, args.log_level) for _ in range(args.workers)}
+    shutting_down = False
+
+    def shutdown(signum, frame):
+        nonlocal shutting_down
+        shutting_down = True
+        logger.info("Shutting down workers...")
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    logger.info(f"Serving on http://{args.host}:{args.port} with {args.workers} workers")
+
+    # Reap workers and replace any that die unexpectedly
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not shutting_down:
+            logger.warning(f"Worker {pid} exited with status {status}, restarting")
+            time.sleep(1)  # Avoid a tight crash loop
+            workers.add(spawn_worker(api.app, sock, args.log_level))
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
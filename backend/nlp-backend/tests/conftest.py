@@ -11,6 +11,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from main import app
+from lib.rate_limiter import cost_limiter
 
 
 @pytest.fixture(scope="function")
@@ -21,7 +22,9 @@ def client():
     
     Note: Using scope="function" means each test gets a fresh client
     This helps prevent rate limit issues between tests
+    (compute budgets are refilled for each client too)
     """
+    cost_limiter.reset()
     with TestClient(app, raise_server_exceptions=False) as test_client:
         yield test_client
 
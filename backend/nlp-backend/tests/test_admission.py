@@ -0,0 +1,147 @@
+"""
+Unit tests for admission control in front of the model executors
+Stub services stand in for the models, so nothing is downloaded
+"""
+import asyncio
+import threading
+import time
+import httpx
+import pytest
+
+from lib.models import Entity, NERResponse
+from lib.providers.admission import AdmissionController, ModelOverloaded
+from lib.providers.model_providers import ModelProvider
+
+
+class SlowProvider(ModelProvider):
+    task = "ner"
+
+
+class SlowNERService:
+    def __init__(self, model_provider):
+        self.model_provider = model_provider
+
+    async def extract_entities_async(self, text, charge=None):
+        await self.model_provider.run_in_executor(time.sleep, 0.2)
+        return NERResponse(entities=[Entity(text="Paris", label="LOC", score=0.99)], text=text)
+
+
+@pytest.mark.unit
+def test_queue_bound_and_wait_budget():
+    """
+    Test rejecting calls past the queue bound or the wait budget, and that
+    background calls are counted but never rejected
+    """
+    controller = AdmissionController("ner", workers=1, max_queue=2, max_wait_seconds=5)
+    for _ in range(3):
+        controller.acquire()
+    with pytest.raises(ModelOverloaded) as rejected:
+        controller.acquire()
+    assert rejected.value.reason == "queue_full"
+    controller.acquire(check=False)
+    assert controller.in_flight == 4
+
+    budget = AdmissionController("ner", workers=2, max_queue=10, max_wait_seconds=5)
+    budget.service_seconds = 4.0
+    budget.in_flight = 3
+    assert budget.estimated_wait() == pytest.approx(4.0)
+    budget.in_flight = 4
+    with pytest.raises(ModelOverloaded) as rejected:
+        budget.check()
+    assert rejected.value.reason == "wait_budget"
+    assert rejected.value.retry_after == pytest.approx(2.0)
+
+
+@pytest.mark.unit
+def test_limit_backs_off_when_calls_wait_too_long():
+    """
+    Test that the in-flight limit shrinks after slow waits and recovers after
+    fast ones, staying between the worker count and workers + max_queue
+    """
+    controller = AdmissionController("ner", workers=2, max_queue=8, max_wait_seconds=1)
+    for _ in range(50):
+        controller.acquire(check=False)
+        controller.release(waited=3.0, service=0.5)
+    assert controller.limit == 2
+    assert controller.service_seconds == pytest.approx(0.5)
+
+    for _ in range(200):
+        controller.acquire(check=False)
+        controller.release(waited=0.1, service=0.5)
+    assert controller.limit == 10
+
+
+@pytest.mark.unit
+def test_cancelled_request_holds_its_slot_until_the_thread_is_free():
+    """
+    Test that a request cancelled mid-inference (e.g. client disconnect)
+    stays counted until its executor call actually finishes
+    """
+    provider = SlowProvider(max_workers=1)
+    provider.enable_admission(max_queue=0, max_wait_seconds=10)
+    release = threading.Event()
+
+    async def run():
+        request = asyncio.ensure_future(provider.run_in_executor(release.wait, 5))
+        await asyncio.sleep(0.05)
+        request.cancel()
+        await asyncio.sleep(0.05)
+        during = (provider.pending, provider.admission.in_flight)
+        with pytest.raises(ModelOverloaded):
+            await provider.run_in_executor(lambda: None)
+        release.set()
+        for _ in range(100):
+            if provider.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        return during, (provider.pending, provider.admission.in_flight)
+
+    during, after = asyncio.run(run())
+
+    assert during == (1, 1)
+    assert after == (0, 0)
+
+
+@pytest.mark.unit
+def test_overloaded_model_sheds_requests_with_503(monkeypatch):
+    """
+    Test that requests beyond the queue get an immediate 503 with Retry-After
+    while admitted ones complete, and job batches are not shed
+    """
+    import main
+
+    provider = SlowProvider(max_workers=1)
+    provider.enable_admission(max_queue=1, max_wait_seconds=10)
+    monkeypatch.setattr(main.app.state, "ner_service", SlowNERService(provider))
+    monkeypatch.setattr(main.limiter, "enabled", False)
+
+    async def timed_post(client):
+        start = time.perf_counter()
+        response = await client.post("/ner", json={"text": "I loved Paris."})
+        return response, time.perf_counter() - start
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            return await asyncio.gather(*(timed_post(client) for _ in range(4)))
+
+    outcomes = asyncio.run(run())
+
+    served = [elapsed for response, elapsed in outcomes if response.status_code == 200]
+    shed = [(response, elapsed) for response, elapsed in outcomes if response.status_code == 503]
+    assert len(served) == 2
+    assert len(shed) == 2
+    for response, elapsed in shed:
+        assert int(response.headers["Retry-After"]) >= 1
+        assert "overloaded" in response.json()["detail"]
+        assert elapsed < 0.1
+    assert provider.pending == 0
+    assert provider.admission.in_flight == 0
+
+    async def saturated_background_call():
+        provider.admission.in_flight = provider.admission.max_limit
+        try:
+            return await provider.run_background(lambda: "done")
+        finally:
+            provider.admission.in_flight = 0
+
+    assert asyncio.run(saturated_background_call()) == "done"
@@ -0,0 +1,80 @@
+"""
+Unit tests for the combined /analyze-all endpoint
+Stub services stand in for the models, so nothing is downloaded
+"""
+import asyncio
+import time
+import httpx
+import pytest
+
+from lib.models import Entity, NERResponse, SentimentResponse, SummarizationResponse
+
+
+class StubSentimentService:
+    async def analyze_sentiment_async(self, text, charge=None):
+        await asyncio.sleep(0.2)
+        return SentimentResponse(sentiment="Positive", confidence=0.9)
+
+
+class StubNERService:
+    async def extract_entities_async(self, text, charge=None):
+        await asyncio.sleep(0.2)
+        return NERResponse(entities=[Entity(text="Paris", label="LOC", score=0.99)], text=text)
+
+
+class FailingSummarizationService:
+    async def summarize_async(self, text, charge=None):
+        raise RuntimeError("model unavailable")
+
+
+@pytest.fixture
+def client_app(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.app.state, "sentiment_service", StubSentimentService())
+    monkeypatch.setattr(main.app.state, "ner_service", StubNERService())
+    monkeypatch.setattr(main.app.state, "summarization_service", FailingSummarizationService())
+    monkeypatch.setattr(main.limiter, "enabled", False)
+    return main.app
+
+
+def post(app, body):
+    async def run():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            start = time.perf_counter()
+            response = await client.post("/analyze-all", json=body)
+            return response, time.perf_counter() - start
+    return asyncio.run(run())
+
+
+@pytest.mark.unit
+def test_tasks_run_concurrently_and_failures_are_partial(client_app):
+    """
+    Test that tasks overlap and a failing task leaves the others' results intact
+    """
+    response, elapsed = post(client_app, {
+        "text": "I loved Paris.",
+        "tasks": ["sentiment", "ner", "summarization", "sentiment"]
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sentiment"]["sentiment"] == "Positive"
+    assert data["ner"]["entities"][0]["text"] == "Paris"
+    assert data["summarization"] is None
+    assert data["paraphrase"] is None
+    assert data["errors"] == {"summarization": "summarization failed: model unavailable"}
+    # Two 0.2s tasks in parallel, not one after the other
+    assert elapsed < 0.35
+
+
+@pytest.mark.unit
+def test_all_tasks_failing_is_an_error(client_app):
+    """
+    Test that the request fails when no task succeeds, and unknown tasks are rejected
+    """
+    failed, _ = post(client_app, {"text": "Hello", "tasks": ["summarization"]})
+    unknown, _ = post(client_app, {"text": "Hello", "tasks": ["poetry"]})
+
+    assert failed.status_code == 500
+    assert unknown.status_code == 422
@@ -0,0 +1,73 @@
+"""
+Unit tests for the micro-batching scheduler
+These use a fake batch function, so no models are loaded
+"""
+import asyncio
+import pytest
+from lib.batching import MicroBatcher
+
+
+@pytest.mark.unit
+def test_concurrent_requests_share_one_batch():
+    """
+    Test that requests arriving together are answered by a single call
+    """
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(t) for t in ["a", "b", "c"]))
+
+    results = asyncio.run(run())
+
+    assert results == ["A", "B", "C"]
+    assert calls == [["a", "b", "c"]]
+
+
+@pytest.mark.unit
+def test_batch_flushes_at_max_size():
+    """
+    Test that a full batch is sent without waiting for the timer
+    """
+    calls = []
+
+    def batch_fn(items):
+        calls.append(len(items))
+        return items
+
+    # A long wait proves the size limit, not the timer, triggered the flush
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=10_000)
+
+    async def run():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i) for i in range(4))),
+            timeout=5
+        )
+
+    assert asyncio.run(run()) == [0, 1, 2, 3]
+    assert calls == [2, 2]
+
+
+@pytest.mark.unit
+def test_batch_errors_reach_every_caller():
+    """
+    Test that a failing batch raises in each waiting request
+    """
+    def batch_fn(items):
+        raise RuntimeError("model exploded")
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=4, max_wait_ms=1)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit("x"), batcher.submit("y"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
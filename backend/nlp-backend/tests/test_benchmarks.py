@@ -0,0 +1,50 @@
+"""
+Unit tests for the benchmark suite's result handling
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from perf_suite import compare, summarize_samples
+
+
+@pytest.mark.unit
+def test_summarize_samples_reports_percentiles_and_throughput():
+    """
+    Test latency statistics computed from raw timings
+    """
+    stats = summarize_samples([float(ms) for ms in range(1, 21)], items=4)
+
+    assert stats["iterations"] == 20
+    assert stats["p50_ms"] == 11.0
+    assert stats["p95_ms"] == 20.0
+    assert stats["throughput_per_s"] == round(4 * 1000 / 10.5, 2)
+
+
+@pytest.mark.unit
+def test_compare_flags_only_regressions_beyond_threshold():
+    """
+    Test that slower latency or lower throughput past the threshold is reported
+    """
+    baseline = {
+        "provider.ner.single": {"p50_ms": 10.0, "throughput_per_s": 100.0},
+        "endpoint.analyze": {"p50_ms": 20.0, "throughput_per_s": 50.0},
+        "endpoint.summarize": {"p50_ms": 100.0, "throughput_per_s": 10.0},
+    }
+    results = {
+        "provider.ner.single": {"p50_ms": 11.0, "throughput_per_s": 95.0},   # within 25%
+        "endpoint.analyze": {"p50_ms": 20.0, "throughput_per_s": 30.0},      # throughput -40%
+        "endpoint.summarize": {"p50_ms": 180.0, "throughput_per_s": 10.0},   # latency +80%
+        "endpoint.new": {"p50_ms": 1.0, "throughput_per_s": 1.0},            # not in baseline
+    }
+
+    regressions = compare(results, baseline, threshold=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("endpoint.analyze throughput_per_s")
+    assert regressions[1].startswith("endpoint.summarize p50_ms")
+
+    # A looser threshold for one benchmark clears its regression
+    regressions = compare(results, baseline, threshold=0.25, overrides={"endpoint.summarize": 1.0})
+    assert len(regressions) == 1
@@ -0,0 +1,82 @@
+"""
+Unit tests for the in-process result cache
+"""
+import pytest
+from lib.cache import ResultCache, make_cache_key
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_cache_key_depends_on_task_model_params_and_text():
+    """
+    Test that every part of the request changes the key, including surrounding
+    whitespace (responses echo the text), but the Unicode form does not
+    """
+    base = make_cache_key("translation", "opus-mt", {"target_lang": "es"}, "Hello")
+
+    assert make_cache_key("translation", "opus-mt", {"target_lang": "es"}, "  Hello ") != base
+    assert (make_cache_key("translation", "opus-mt", {}, "Cafe\u0301")
+            == make_cache_key("translation", "opus-mt", {}, "Caf\u00e9"))
+    assert make_cache_key("translation", "opus-mt", {"target_lang": "fr"}, "Hello") != base
+    assert make_cache_key("translation", "other-model", {"target_lang": "es"}, "Hello") != base
+    assert make_cache_key("summarization", "opus-mt", {"target_lang": "es"}, "Hello") != base
+    assert make_cache_key("translation", "opus-mt", {"target_lang": "es"}, "Hello!") != base
+
+
+@pytest.mark.unit
+def test_cache_counts_hits_and_misses():
+    """
+    Test hit/miss counters
+    """
+    cache = ResultCache(max_bytes=1024)
+
+    assert cache.get("a") is None
+    cache.set("a", {"summary_text": "short"})
+    assert cache.get("a") == {"summary_text": "short"}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.unit
+def test_cache_evicts_least_recently_used_to_stay_under_size():
+    """
+    Test that the byte budget is enforced with LRU eviction
+    """
+    cache = ResultCache(max_bytes=30)
+    cache.set("a", "x" * 8)  # 10 bytes serialized (with quotes)
+    cache.set("b", "y" * 8)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", "z" * 8)
+    cache.set("d", "w" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size_bytes <= 30
+
+
+@pytest.mark.unit
+def test_cache_entries_expire_after_ttl():
+    """
+    Test that entries older than the TTL are treated as misses
+    """
+    clock = FakeClock()
+    cache = ResultCache(max_bytes=1024, ttl_seconds=60, clock=clock)
+    cache.set("a", "value")
+
+    clock.now = 59
+    assert cache.get("a") == "value"
+    clock.now = 121
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,49 @@
+"""
+Tests that model inference does not block the event loop
+A slow stub pipeline stands in for the real model, so nothing is downloaded
+"""
+import asyncio
+import time
+import httpx
+import pytest
+
+import main
+
+
+@pytest.mark.integration
+def test_health_responds_during_slow_summarization(monkeypatch, sample_texts):
+    """
+    Test that /health answers within a few ms while a summary is being generated
+    """
+    def slow_pipeline(text, **generate_kwargs):
+        time.sleep(1.0)
+        return [{"summary_text": "A stubbed summary."}]
+
+    monkeypatch.setattr(main.summarization_model, "pipeline", slow_pipeline)
+    # Summarize even a short sample text
+    monkeypatch.setattr(main.summarization_model, "min_input_tokens", 0)
+    monkeypatch.setattr(main.summarization_service, "cache", None)
+
+    async def run():
+        # Both requests share one event loop, like a single uvicorn worker
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            summary_task = asyncio.create_task(
+                client.post("/summarize", json={"text": sample_texts["valid_length"]})
+            )
+            await asyncio.sleep(0.2)  # Let the summarization start
+
+            start = time.perf_counter()
+            health = await client.get("/health")
+            elapsed = time.perf_counter() - start
+            still_running = not summary_task.done()
+
+            summary = await summary_task
+        return health, elapsed, still_running, summary
+
+    health, elapsed, still_running, summary = asyncio.run(run())
+
+    assert health.status_code == 200
+    assert still_running
+    assert elapsed < 0.05
+    assert summary.status_code == 200
+    assert summary.json()["summary_text"] == "A stubbed summary."
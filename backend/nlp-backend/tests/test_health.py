@@ -2,6 +2,9 @@
 Tests for health check endpoints
 These verify that the API is running and models are loaded
 """
+import asyncio
+import time
+import httpx
 import pytest
 
 
@@ -40,3 +43,46 @@ def test_health_check_endpoint(client):
     assert models["paraphrase"] == True
     assert models["summarization"] == True
 
+
+
+@pytest.mark.unit
+def test_ready_waits_for_required_models_to_be_warm(monkeypatch):
+    """
+    Test that /ready answers 503 until the required models are loaded and warmed up
+    """
+    import main
+
+    monkeypatch.setattr(main.app.state, "ready_models", ["sentiment"])
+    monkeypatch.setattr(main.sentiment_model, "pipeline", None)
+    monkeypatch.setattr(main.sentiment_model, "warmed_up", False)
+
+    async def get_ready():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            return await client.get("/ready")
+
+    response = asyncio.run(get_ready())
+    assert response.status_code == 503
+    assert response.json()["models"]["sentiment"] == {"loaded": False, "warmed_up": False}
+
+    monkeypatch.setattr(main.sentiment_model, "pipeline", lambda text: [])
+    assert asyncio.run(get_ready()).status_code == 503
+
+    monkeypatch.setattr(main.sentiment_model, "warmed_up", True)
+    response = asyncio.run(get_ready())
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+@pytest.mark.integration
+def test_ready_passes_after_warm_up(client):
+    """
+    Test that the readiness probe passes once startup warm-up has finished
+    """
+    deadline = time.monotonic() + 120
+    response = client.get("/ready")
+    while response.status_code == 503 and time.monotonic() < deadline:
+        time.sleep(0.5)
+        response = client.get("/ready")
+
+    assert response.status_code == 200
+    assert response.json()["models"]["sentiment"] == {"loaded": True, "warmed_up": True}
@@ -0,0 +1,319 @@
+"""
+Unit tests for bulk jobs and NDJSON streaming
+Jobs run stand-in batch functions, so no models are loaded
+"""
+import asyncio
+import json
+import httpx
+import pytest
+
+from lib.jobs import JobManager, JobTask, run_batch, stream_results
+from lib.models import SentimentResponse, TranslationInput, TranslationResponse
+from lib.providers.model_providers import SentimentModelProvider
+
+
+async def stream(data: bytes, chunk_size: int = 7):
+    """Yield `data` in small chunks, like a request body"""
+    for start in range(0, len(data), chunk_size):
+        yield data[start:start + chunk_size]
+
+
+def corpus(*texts) -> bytes:
+    return b"".join(json.dumps({"text": text, "id": i}).encode() + b"\n" for i, text in enumerate(texts))
+
+
+def label_task(seen=None, fail_on=None):
+    """Sentiment-like task labelling each text, failing on `fail_on`"""
+    def run_batch(texts, params):
+        if seen is not None:
+            seen.append(list(texts))
+        if fail_on in texts:
+            raise RuntimeError("bad input")
+        return [SentimentResponse(sentiment=text.upper(), confidence=1.0) for text in texts]
+    return JobTask(SentimentModelProvider(), run_batch)
+
+
+def read_results(manager, job_id):
+    with open(manager.results_path(job_id)) as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.unit
+def test_job_runs_in_batches_and_keeps_input_order(tmp_path):
+    """
+    Test that a job is processed batch by batch into ordered per-line results
+    """
+    seen = []
+    manager = JobManager(str(tmp_path), {"sentiment": label_task(seen)}, batch_size=2)
+
+    async def run():
+        job = await manager.create("sentiment", {}, stream(corpus("a", "b", "c")))
+        await manager.run_pending()
+        return job["job_id"]
+
+    job_id = asyncio.run(run())
+
+    job = manager.get(job_id)
+    assert job["status"] == "completed"
+    assert (job["total"], job["processed"], job["failed"]) == (3, 3, 0)
+    assert seen == [["a", "b"], ["c"]]
+    results = read_results(manager, job_id)
+    assert [r["line"] for r in results] == [1, 2, 3]
+    assert [r["id"] for r in results] == [0, 1, 2]
+    assert [r["result"]["sentiment"] for r in results] == ["A", "B", "C"]
+
+
+@pytest.mark.unit
+def test_failing_line_only_fails_itself(tmp_path):
+    """
+    Test that a failed batch is retried line by line so good lines still succeed
+    """
+    manager = JobManager(str(tmp_path), {"sentiment": label_task(fail_on="bad")}, batch_size=3)
+
+    async def run():
+        job = await manager.create("sentiment", {}, stream(corpus("good", "bad", "fine")))
+        await manager.run_pending()
+        return job["job_id"]
+
+    job_id = asyncio.run(run())
+
+    assert manager.get(job_id)["failed"] == 1
+    results = read_results(manager, job_id)
+    assert results[1] == {"line": 2, "id": 1, "error": "bad input"}
+    assert results[2]["result"]["sentiment"] == "FINE"
+
+
+@pytest.mark.unit
+def test_invalid_corpus_is_rejected_and_not_kept(tmp_path):
+    """
+    Test that bad lines, unknown tasks and bad params fail the submission
+    """
+    manager = JobManager(str(tmp_path), {
+        "sentiment": label_task(),
+        "translation": JobTask(SentimentModelProvider(), lambda texts, params: [], input_model=TranslationInput),
+    })
+
+    def submit(task, data, params=None):
+        with pytest.raises(ValueError) as error:
+            asyncio.run(manager.create(task, params or {}, stream(data)))
+        return str(error.value)
+
+    assert submit("sentiment", corpus("ok") + b"not json\n") == "Line 2: not valid JSON"
+    assert submit("sentiment", corpus("ok", "   ")).startswith("Line 2:")
+    assert submit("sentiment", b"\n") == "The corpus is empty"
+    assert "Unknown task" in submit("poetry", corpus("ok"))
+    assert submit("translation", corpus("ok"), {"source_lang": "x"})
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_restarted_job_resumes_from_checkpoint(tmp_path):
+    """
+    Test that an interrupted job continues after its last checkpoint
+    """
+    manager = JobManager(str(tmp_path), {"sentiment": label_task()}, batch_size=2)
+    job = asyncio.run(manager.create("sentiment", {}, stream(corpus("a", "b", "c", "d", "e"))))
+    job_id = job["job_id"]
+    asyncio.run(manager.run_pending())
+
+    # Rewind to the state of a crash after the first batch was checkpointed,
+    # while the second batch was half written
+    with open(manager._path(job_id, "input.jsonl"), "rb") as f:
+        input_bytes = len(f.readline()) + len(f.readline())
+    with open(manager.results_path(job_id), "rb") as f:
+        kept = f.readline() + f.readline()
+    with open(manager.results_path(job_id), "wb") as f:
+        f.write(kept + b'{"line": 3, "id"')
+    state = manager.get(job_id)
+    state.update(status="running", processed=2, input_bytes=input_bytes, results_bytes=len(kept))
+    manager._save(state)
+
+    seen = []
+    manager = JobManager(str(tmp_path), {"sentiment": label_task(seen)}, batch_size=2)
+    asyncio.run(manager.run_pending())
+
+    assert seen == [["c", "d"], ["e"]]
+    results = read_results(manager, job_id)
+    assert [r["result"]["sentiment"] for r in results] == ["A", "B", "C", "D", "E"]
+    assert manager.get(job_id)["status"] == "completed"
+
+
+@pytest.mark.unit
+def test_jobs_wait_for_interactive_requests(tmp_path):
+    """
+    Test that a job batch does not start while the model has other calls pending
+    """
+    seen = []
+    task = label_task(seen)
+    manager = JobManager(str(tmp_path), {"sentiment": task}, idle_poll_seconds=0.01)
+
+    async def run():
+        await manager.create("sentiment", {}, stream(corpus("a")))
+        task.provider.pending = 1  # An interactive request is running
+        job_run = asyncio.create_task(manager.run_pending())
+        await asyncio.sleep(0.1)
+        waited = not seen
+        task.provider.pending = 0
+        await job_run
+        return waited
+
+    assert asyncio.run(run())
+    assert seen == [["a"]]
+
+
+@pytest.mark.unit
+def test_job_endpoints(tmp_path, monkeypatch):
+    """
+    Test submitting, polling and downloading a job over HTTP
+    """
+    import main
+
+    manager = JobManager(str(tmp_path), {
+        "sentiment": label_task(),
+        "translation": JobTask(
+            SentimentModelProvider(),
+            lambda texts, params: [TranslationResponse(translated_text=f"{params['target_lang']}:{t}") for t in texts],
+            input_model=TranslationInput
+        ),
+    })
+    monkeypatch.setattr(main.app.state, "job_manager", manager)
+    monkeypatch.setattr(main.limiter, "enabled", False)
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            created = await client.post("/jobs?task=translation&target_lang=fr", content=corpus("hi", "bye"))
+            job_id = created.json()["job_id"]
+            early = await client.get(f"/jobs/{job_id}/results")
+            await manager.run_pending()
+            status = await client.get(f"/jobs/{job_id}")
+            results = await client.get(f"/jobs/{job_id}/results")
+            rejected = await client.post("/jobs?task=sentiment", content=b"oops\n")
+            missing = await client.get("/jobs/" + "0" * 32)
+            return created, early, status, results, rejected, missing
+
+    created, early, status, results, rejected, missing = asyncio.run(run())
+
+    assert created.status_code == 202
+    assert created.json()["status"] == "queued"
+    assert early.status_code == 409
+    assert status.json()["status"] == "completed"
+    lines = [json.loads(line) for line in results.text.splitlines()]
+    assert [line["result"]["translated_text"] for line in lines] == ["fr:hi", "fr:bye"]
+    assert rejected.status_code == 400
+    assert missing.status_code == 404
+
+
+@pytest.mark.unit
+def test_stream_results_emits_batches_before_input_ends():
+    """
+    Test that NDJSON results flow back while the input is still arriving,
+    with an error line for each invalid input line
+    """
+    task = label_task()
+    events = []
+
+    async def slow_input():
+        for chunk in (corpus("a", "b"), b"not json\n", corpus("c"), corpus("d")):
+            events.append("read")
+            yield chunk
+            await asyncio.sleep(0.05)
+
+    async def run():
+        lines = []
+        async for chunk in stream_results(task, {}, slow_input(), batch_size=2):
+            events.append("result")
+            lines.extend(json.loads(line) for line in chunk.splitlines())
+        return lines
+
+    lines = asyncio.run(run())
+
+    last_read = max(i for i, event in enumerate(events) if event == "read")
+    assert events.index("result") < last_read
+    assert [line["line"] for line in lines] == [1, 2, 3, 4, 5]
+    assert lines[2] == {"line": 3, "id": None, "error": "not valid JSON"}
+    assert [line["result"]["sentiment"] for line in lines if "result" in line] == ["A", "B", "C", "D"]
+
+
+@pytest.mark.unit
+def test_ndjson_endpoint(monkeypatch):
+    """
+    Test streaming a task over an NDJSON body
+    """
+    import main
+
+    manager = JobManager("unused", {"sentiment": label_task()})
+    monkeypatch.setattr(main.app.state, "job_manager", manager)
+    monkeypatch.setattr(main.limiter, "enabled", False)
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            streamed = await client.post("/ndjson?task=sentiment", content=corpus("x", "y", "z"))
+            unknown = await client.post("/ndjson?task=poetry", content=corpus("x"))
+            return streamed, unknown
+
+    streamed, unknown = asyncio.run(run())
+
+    assert streamed.status_code == 200
+    assert streamed.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [line["result"]["sentiment"] for line in lines] == ["X", "Y", "Z"]
+    assert unknown.status_code == 400
+
+
+@pytest.mark.unit
+def test_ndjson_is_charged_per_batch(monkeypatch):
+    """
+    Test that /ndjson draws on the compute budget batch by batch and ends
+    the stream with a rate-limit line once the budget is spent
+    """
+    import main
+    from lib import routes
+    from lib.rate_limiter import CostLimiter
+
+    seen = []
+    manager = JobManager("unused", {"sentiment": label_task(seen)})
+    monkeypatch.setattr(main.app.state, "job_manager", manager)
+    monkeypatch.setattr(main.app.state, "ndjson_batch_size", 2)
+    monkeypatch.setattr(routes, "cost_limiter", CostLimiter({}, anonymous_rate="3/minute"))
+    monkeypatch.setattr(main.limiter, "enabled", False)
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            return await client.post("/ndjson?task=sentiment", content=corpus("a", "b", "c", "d", "e"))
+
+    streamed = asyncio.run(run())
+
+    lines = [json.loads(line) for line in streamed.text.splitlines()]
+    assert [line["result"]["sentiment"] for line in lines[:2]] == ["A", "B"]
+    assert "Compute budget exhausted" in lines[2]["error"]
+    assert lines[2]["retry_after"] >= 1
+    assert len(lines) == 3
+    assert seen == [["a", "b"]]
+
+
+@pytest.mark.unit
+def test_stream_results_are_shed_when_the_model_is_overloaded():
+    """
+    Test that NDJSON batches go through admission control (ending the stream
+    with an overload line) while queued job batches are never shed
+    """
+    seen = []
+    task = label_task(seen)
+    task.provider.enable_admission(max_queue=0, max_wait_seconds=10)
+
+    async def run():
+        lines = []
+        async for chunk in stream_results(task, {}, stream(corpus("a", "b", "c")), batch_size=2):
+            lines.extend(json.loads(line) for line in chunk.splitlines())
+            task.provider.admission.in_flight = 1  # Another request takes the only slot
+        jobs_outcomes = await run_batch(task, ["d"], {})
+        return lines, jobs_outcomes
+
+    lines, jobs_outcomes = asyncio.run(run())
+
+    assert [line["result"]["sentiment"] for line in lines[:2]] == ["A", "B"]
+    assert "overloaded" in lines[2]["error"]
+    assert lines[2]["retry_after"] >= 1
+    assert len(lines) == 3
+    assert jobs_outcomes[0][0].sentiment == "D"
+    assert seen == [["a", "b"], ["d"]]
@@ -0,0 +1,123 @@
+"""
+Unit tests for the translation language pair index
+The local model cache is a temporary directory, so no models are downloaded
+"""
+import asyncio
+import httpx
+import pytest
+
+from lib.providers.language_pairs import LanguagePairIndex, parse_pairs
+from lib.providers.model_providers import TranslationModelProvider
+
+
+def cache_model(cache_dir, name, downloaded=True):
+    """Create a hub cache entry for `name` (with a snapshot when downloaded)"""
+    entry = cache_dir / ("models--" + name.replace("/", "--"))
+    (entry / "snapshots").mkdir(parents=True)
+    if downloaded:
+        (entry / "snapshots" / "abc123").mkdir()
+
+
+@pytest.fixture
+def index(tmp_path):
+    cache_model(tmp_path, "Helsinki-NLP/opus-mt-de-en")
+    cache_model(tmp_path, "Helsinki-NLP/opus-mt-en-xx", downloaded=False)
+    cache_model(tmp_path, "Helsinki-NLP/opus-mt-tc-big-en-pt")
+    cache_model(tmp_path, "facebook/bart-large-cnn")
+    return LanguagePairIndex("Helsinki-NLP/opus-mt", [("en", "fr")], cache_dir=str(tmp_path))
+
+
+@pytest.mark.unit
+def test_parse_pairs():
+    """
+    Test parsing the comma-separated pair list
+    """
+    assert parse_pairs(" en-fr, fr-en,,") == [("en", "fr"), ("fr", "en")]
+    with pytest.raises(ValueError):
+        parse_pairs("en-fr,english")
+
+
+@pytest.mark.unit
+def test_index_combines_allow_list_and_downloaded_models(index):
+    """
+    Test that supported pairs are the allow-list plus fully downloaded opus-mt models
+    """
+    assert index.pairs() == [("de", "en"), ("en", "fr")]
+    index.check("de", "en")
+    index.check("en", "fr")
+    with pytest.raises(ValueError, match="Unsupported language pair: en-xx"):
+        index.check("en", "xx")
+
+
+@pytest.mark.unit
+def test_failed_pairs_are_rejected_until_the_ttl_expires(index):
+    """
+    Test negative caching of pairs whose model failed to load
+    """
+    index.record_failure("en", "fr")
+
+    with pytest.raises(ValueError, match="failed to load recently"):
+        index.check("en", "fr")
+    assert ("en", "fr") not in index.pairs()
+
+    index.failure_ttl = 0
+    index.check("en", "fr")
+
+
+@pytest.mark.unit
+def test_provider_checks_pairs_before_loading(index):
+    """
+    Test that unsupported pairs never reach the loader and a failed load
+    is not retried
+    """
+    provider = TranslationModelProvider(language_pairs=index)
+    attempts = []
+
+    def failing_load(model_name):
+        attempts.append(model_name)
+        raise ValueError("Translation model not available: offline")
+
+    provider._load_pipeline = failing_load
+
+    with pytest.raises(ValueError, match="Unsupported"):
+        provider.load_model("en", "xx")
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            provider.load_model("en", "fr")
+
+    assert attempts == ["Helsinki-NLP/opus-mt-en-fr"]
+
+
+@pytest.mark.unit
+def test_languages_endpoint_and_fast_rejection(index, monkeypatch):
+    """
+    Test listing pairs and rejecting an unsupported pair with 400 before any
+    work reaches the translation executor
+    """
+    import main
+
+    provider = TranslationModelProvider(language_pairs=index)
+    monkeypatch.setitem(main.app.state.models, "translation", provider)
+    monkeypatch.setattr(main.translation_service, "model_provider", provider)
+    monkeypatch.setattr(main.limiter, "enabled", False)
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            languages = await client.get("/languages")
+            single = await client.post("/translate", json={"text": "Hi", "source_lang": "en", "target_lang": "xx"})
+            batch = await client.post("/translate-batch", json={"items": [
+                {"text": "Hi", "source_lang": "de", "target_lang": "en"},
+                {"text": "Hi", "source_lang": "en", "target_lang": "xx"},
+            ]})
+            return languages, single, batch
+
+    languages, single, batch = asyncio.run(run())
+
+    assert languages.json() == {"pairs": [
+        {"source_lang": "de", "target_lang": "en", "loaded": False},
+        {"source_lang": "en", "target_lang": "fr", "loaded": False},
+    ]}
+    assert single.status_code == 400
+    assert "en-xx" in single.json()["detail"]
+    assert batch.status_code == 400
+    assert provider.pending == 0
@@ -0,0 +1,98 @@
+"""
+Tests for the Prometheus-style metrics
+"""
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from lib.metrics import (
+    HTTP_REQUESTS,
+    MODEL_INFERENCE_SECONDS,
+    MODEL_QUEUE_DEPTH,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+)
+from lib.providers.model_providers import NERModelProvider
+
+
+@pytest.mark.unit
+def test_histogram_renders_cumulative_buckets():
+    """
+    Test that observations land in cumulative le buckets with sum and count
+    """
+    histogram = Histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, endpoint="/a")
+
+    lines = histogram.render()
+
+    assert 'latency_seconds_bucket{endpoint="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{endpoint="/a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{endpoint="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{endpoint="/a"} 3.65' in lines
+    assert 'latency_seconds_count{endpoint="/a"} 4' in lines
+
+
+@pytest.mark.unit
+def test_registry_renders_help_type_and_samples():
+    """
+    Test the text exposition format of counters and gauges
+    """
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs run", ("kind",)))
+    gauge = registry.register(Gauge("queue_depth", "Waiting jobs"))
+    counter.inc(kind="fast")
+    counter.inc(2, kind="fast")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    text = registry.render()
+
+    assert "# HELP jobs_total Jobs run\n# TYPE jobs_total counter\n" in text
+    assert 'jobs_total{kind="fast"} 3\n' in text
+    assert "# TYPE queue_depth gauge\nqueue_depth 1\n" in text
+
+
+@pytest.mark.unit
+def test_middleware_labels_requests_by_route_template():
+    """
+    Test that requests are counted per route template and status, not raw path
+    """
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    before = HTTP_REQUESTS.value(endpoint="/items/{item_id}", method="GET", status="200")
+
+    async def run():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+
+    asyncio.run(run())
+
+    after = HTTP_REQUESTS.value(endpoint="/items/{item_id}", method="GET", status="200")
+    assert after - before == 2
+
+
+@pytest.mark.unit
+def test_executor_calls_record_inference_time_and_queue_depth():
+    """
+    Test that model calls on the executor are timed and leave the queue empty
+    """
+    provider = NERModelProvider()
+    before = MODEL_INFERENCE_SECONDS.count(model="ner")
+
+    result = asyncio.run(provider.run_in_executor(lambda x: x * 2, 21))
+
+    assert result == 42
+    assert MODEL_INFERENCE_SECONDS.count(model="ner") == before + 1
+    assert MODEL_QUEUE_DEPTH.value(model="ner") == 0
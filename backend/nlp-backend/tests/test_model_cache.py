@@ -0,0 +1,121 @@
+"""
+Unit tests for the on-demand model cache used by translation
+Loaders return plain objects, so no models are downloaded
+"""
+import asyncio
+import threading
+import time
+import pytest
+from lib.providers.model_cache import ModelCache
+
+
+class FakeClock:
+    """Manually advanced clock for idle-eviction tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+def test_cache_evicts_least_recently_used_over_budget():
+    """
+    Test that the oldest unused model is dropped once the budget is exceeded
+    """
+    cache = ModelCache(max_bytes=250, size_fn=lambda value: 100)
+
+    cache.get_or_load("en-es", lambda: "es")
+    cache.get_or_load("en-fr", lambda: "fr")
+    cache.get_or_load("en-es", lambda: "es")  # en-fr is now least recently used
+    cache.get_or_load("en-de", lambda: "de")
+
+    assert cache.keys() == ["en-es", "en-de"]
+    assert cache.total_bytes == 200
+
+
+@pytest.mark.unit
+def test_cache_evicts_idle_models():
+    """
+    Test that models unused for longer than idle_seconds are unloaded
+    """
+    clock = FakeClock()
+    cache = ModelCache(max_bytes=10_000, idle_seconds=60, size_fn=lambda value: 1, clock=clock)
+
+    cache.get_or_load("en-es", lambda: "es")
+    clock.now = 30
+    cache.get_or_load("en-fr", lambda: "fr")
+    clock.now = 75
+    cache.prune()
+
+    assert cache.keys() == ["en-fr"]
+
+
+@pytest.mark.unit
+def test_periodic_prune_evicts_idle_models_without_a_lookup():
+    """
+    Test that the server's background prune task unloads an idle model
+    even though no other model is ever requested
+    """
+    import main
+
+    clock = FakeClock()
+    cache = ModelCache(max_bytes=10_000, idle_seconds=60, size_fn=lambda value: 1, clock=clock)
+    cache.get_or_load("en-es", lambda: "es")
+    clock.now = 61
+
+    async def run():
+        task = asyncio.create_task(main.prune_periodically("translation model cache", cache.prune, 0.01))
+        for _ in range(100):
+            if len(cache) == 0:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert cache.keys() == []
+
+
+@pytest.mark.unit
+def test_cache_loads_same_key_once_under_concurrency():
+    """
+    Test that concurrent requests for one model share a single load
+    """
+    cache = ModelCache(max_bytes=10_000, size_fn=lambda value: 1)
+    load_count = []
+
+    def slow_loader():
+        load_count.append(1)
+        time.sleep(0.1)
+        return "es"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("en-es", slow_loader)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(load_count) == 1
+    assert results == ["es"] * 5
+
+
+@pytest.mark.unit
+def test_cache_does_not_store_failed_loads():
+    """
+    Test that a failed load raises and leaves nothing behind
+    """
+    cache = ModelCache(max_bytes=10_000)
+
+    def failing_loader():
+        raise ValueError("Translation model not available")
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("xx-yy", failing_loader)
+
+    assert len(cache) == 0
@@ -6,6 +6,7 @@ import pytest
 from pydantic import ValidationError
 from lib.models import (
     TextInput,
+    DocumentInput,
     BatchTextInput,
     TranslationInput,
     SentimentResponse,
@@ -59,6 +60,18 @@ def test_text_input_too_long_fails():
         TextInput(text="a" * 6000)
 
 
+@pytest.mark.unit
+def test_document_input_accepts_long_text():
+    """
+    Test that DocumentInput allows texts beyond the regular 5000 character limit
+    """
+    document = DocumentInput(text="a" * 20000)
+    assert len(document.text) == 20000
+
+    with pytest.raises(ValidationError):
+        DocumentInput(text="a" * 50001)
+
+
 @pytest.mark.unit
 def test_batch_text_input_valid():
     """
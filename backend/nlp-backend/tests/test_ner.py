@@ -99,3 +99,23 @@ def test_ner_no_entities(client):
     assert "entities" in data
     assert isinstance(data["entities"], list)
 
+
+
+@pytest.mark.integration
+def test_ner_finds_entities_beyond_model_window(client):
+    """
+    Test that entities after the model's 512-token window are still found
+    (the text is covered by overlapping windows)
+    """
+    filler = "the weather was mild and the roads were quiet that day. " * 70
+    text = filler + "Angela Merkel visited Paris."
+    response = client.post("/ner", json={"text": text})
+    
+    assert response.status_code == 200
+    entities = response.json()["entities"]
+    
+    labels = {e["label"] for e in entities}
+    assert "PER" in labels
+    assert "LOC" in labels
+    # Entities seen by two overlapping windows are only reported once
+    assert len([e for e in entities if "Paris" in e["text"]]) == 1
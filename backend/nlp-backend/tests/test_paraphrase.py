@@ -1,6 +1,7 @@
 """
 Tests for paraphrasing endpoint
 """
+import json
 import pytest
 
 
@@ -42,6 +43,33 @@ def test_paraphrase_longer_text(client):
     assert len(data["paraphrased_text"]) > 0
 
 
+@pytest.mark.integration
+@pytest.mark.slow
+def test_paraphrase_candidates(client):
+    """
+    Test requesting several paraphrases
+    """
+    response = client.post(
+        "/paraphrase",
+        json={"text": "The weather is nice today.", "num_candidates": 3}
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["candidates"]) == 3
+    assert data["paraphrased_text"] == data["candidates"][0]
+
+
+@pytest.mark.integration
+def test_paraphrase_settings_over_limits(client):
+    """
+    Test that generation settings beyond the server's ceilings are rejected
+    """
+    response = client.post("/paraphrase", json={"text": "Hello there.", "num_beams": 100})
+    
+    assert response.status_code == 400
+
+
 @pytest.mark.integration
 def test_paraphrase_empty_text(client):
     """
@@ -52,3 +80,25 @@ def test_paraphrase_empty_text(client):
     # Should return validation error
     assert response.status_code == 422
 
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_paraphrase_stream(client):
+    """
+    Test that the streaming endpoint sends server-sent events ending with the full response
+    """
+    text = "The weather is nice today."
+    response = client.post("/paraphrase-stream", json={"text": text, "greedy": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0][len("event: "):] for lines in events]
+    assert names[-1] == "done"
+    assert set(names[:-1]) <= {"token"}
+
+    final = json.loads(events[-1][1][len("data: "):])
+    tokens = "".join(json.loads(lines[1][len("data: "):])["text"] for lines in events[:-1])
+    assert len(final["paraphrased_text"]) > 0
+    assert tokens.strip() == final["paraphrased_text"].strip()
@@ -0,0 +1,166 @@
+"""
+Unit tests for the SQLite-backed persistent result store
+"""
+import pytest
+from lib.cache import ResultCache
+from lib.persistent_cache import SQLiteResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteResultStore(str(tmp_path / "results.db"), max_bytes=1024 * 1024)
+
+
+@pytest.mark.unit
+def test_store_survives_reopen(tmp_path):
+    """
+    Test that results written by one process are visible after a restart
+    """
+    path = str(tmp_path / "results.db")
+    SQLiteResultStore(path, max_bytes=1024).set("k", {"summary_text": "s"}, "summarization", "bart")
+
+    reopened = SQLiteResultStore(path, max_bytes=1024)
+
+    assert reopened.get("k") == {"summary_text": "s"}
+
+
+@pytest.mark.unit
+def test_memory_miss_falls_through_to_store(store):
+    """
+    Test that a fresh in-memory cache (e.g. another worker) hits the store
+    """
+    ResultCache(max_bytes=1024, store=store).set("k", "hola", task="translation", model_id="opus-mt")
+    other_worker = ResultCache(max_bytes=1024, store=store)
+
+    assert other_worker.get("k") == "hola"
+    assert other_worker.stats()["store_hits"] == 1
+    assert len(other_worker) == 1  # promoted into memory
+
+
+@pytest.mark.unit
+def test_store_invalidates_results_from_other_model_versions(store):
+    """
+    Test that results from a replaced model are dropped
+    """
+    store.set("old", "a", "ner", "bert-v1")
+    store.set("new", "b", "ner", "bert-v2")
+    store.set("other", "c", "sentiment", "roberta")
+
+    deleted = store.invalidate_stale({"ner": "bert-v2", "sentiment": "roberta"})
+
+    assert deleted == 1
+    assert store.get("old") is None
+    assert store.get("new") == "b"
+    assert store.get("other") == "c"
+
+
+@pytest.mark.unit
+def test_store_prunes_least_recently_used_over_budget(tmp_path):
+    """
+    Test that pruning keeps the store within its size budget
+    """
+    store = SQLiteResultStore(str(tmp_path / "results.db"), max_bytes=100)
+    for i in range(10):
+        store.set(f"k{i}", "x" * 18, "sentiment", "roberta")  # 20 bytes each
+
+    deleted = store.prune()
+
+    assert deleted > 0
+    assert store.count() * 20 <= 100
+    assert store.get("k9") is not None
+    assert store.get("k0") is None
+
+
+@pytest.mark.unit
+def test_warm_loads_hottest_entries(store):
+    """
+    Test that startup warm-load brings the most-hit entries into memory
+    """
+    store.set("cold", "c", "sentiment", "roberta")
+    store.set("hot", "h", "sentiment", "roberta")
+    for _ in range(3):
+        store.get("hot")
+
+    cache = ResultCache(max_bytes=1024, store=store)
+    loaded = cache.warm(limit=1)
+
+    assert loaded == 1
+    assert cache.get("hot") == "h"
+    assert cache.stats()["store_hits"] == 0  # served from memory
+
+
+@pytest.mark.unit
+def test_loaded_entries_keep_their_original_expiry(store):
+    """
+    Test that results copied from the store into memory (by warm-load or a
+    memory miss) expire when they would have in the store, not a full TTL later
+    """
+    store.set("warm", "w", "sentiment", "roberta")
+    store.set("miss", "m", "sentiment", "roberta")
+    store.get("warm")  # The hottest entry, so warm-load picks it
+    store._connect().execute("UPDATE results SET created_at = created_at - 9")
+
+    clock = [1000.0]
+    cache = ResultCache(max_bytes=1024, ttl_seconds=10, clock=lambda: clock[0], store=store)
+    cache.warm(limit=1)
+    assert cache.get("miss") == "m"
+    assert len(cache) == 2
+
+    clock[0] += 2
+    store._connect().execute("DELETE FROM results")
+    assert cache.get("warm") is None
+    assert cache.get("miss") is None
+
+
+@pytest.mark.unit
+def test_store_writes_never_prune_and_prune_frees_the_oldest_in_one_pass(tmp_path):
+    """
+    Test that writes leave pruning to the background task, which then drops
+    exactly the least recently used entries needed to get back under budget
+    """
+    store = SQLiteResultStore(str(tmp_path / "results.db"), max_bytes=100)
+    for i in range(20):
+        store.set(f"k{i}", "x" * 18, "sentiment", "roberta")  # 20 bytes each
+    assert store.count() == 20
+
+    store.get("k0")  # Recently used again, so kept
+
+    # 400 bytes down to 90 bytes: the 16 oldest untouched entries go
+    assert store.prune() == 16
+    assert store.count() == 4
+    assert store.get("k0") is not None
+    assert store.get("k1") is None
+    assert store.get("k19") is not None
+
+
+@pytest.mark.unit
+def test_async_cache_reads_and_writes_the_store_off_the_event_loop(store, monkeypatch):
+    """
+    Test that get_async/set_async run the store's blocking calls on another thread
+    """
+    import asyncio
+    import threading
+
+    threads = []
+    for name in ("lookup", "set"):
+        blocking = getattr(store, name)
+
+        def recorded(*args, _blocking=blocking):
+            threads.append(threading.current_thread())
+            return _blocking(*args)
+
+        monkeypatch.setattr(store, name, recorded)
+
+    async def run():
+        writer = ResultCache(max_bytes=1024, store=store)
+        await writer.set_async("k", "hola", task="translation", model_id="opus-mt")
+        reader = ResultCache(max_bytes=1024, store=store)
+        return await reader.get_async("k"), await reader.get_async("missing"), reader.stats()
+
+    value, missing, stats = asyncio.run(run())
+
+    assert value == "hola"
+    assert missing is None
+    assert stats["store_hits"] == 1 and stats["misses"] == 1
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,145 @@
+"""
+Smoke test for the pre-fork launcher (serve_prefork.py)
+
+The launcher runs in its own process group against a stub API module, so
+no models are loaded and this test session is never forked.
+"""
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Stand-in for main: records every model load and worker shutdown in a log
+# file, and reports each worker's pid and collector state per request
+STUB_API = '''
+import gc
+import json
+import os
+
+LOG = os.environ["PREFORK_TEST_LOG"]
+models_preloaded = False
+
+
+def record(event):
+    with open(LOG, "a") as f:
+        f.write(f"{event} {os.getpid()}\\n")
+
+
+def load_models():
+    record("load")
+
+
+def warm_result_cache():
+    pass
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if not models_preloaded:
+                    load_models()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                record("stop")
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+        return
+    body = json.dumps({
+        "pid": os.getpid(),
+        "frozen": gc.get_freeze_count(),
+        "gc_enabled": gc.isenabled(),
+    }).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as response:
+        return json.loads(response.read())
+
+
+def wait_for(condition, timeout: float = 15.0):
+    """Poll `condition` until it returns something truthy"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            result = condition()
+            if result:
+                return result
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise AssertionError("Timed out waiting for the pre-fork server")
+
+
+def read_log(path) -> list:
+    if not path.exists():
+        return []
+    return [line.split() for line in path.read_text().splitlines()]
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pre-fork serving needs os.fork")
+def test_prefork_workers_serve_respawn_and_shut_down(tmp_path):
+    """
+    Test that models load once in the master, forked workers serve with a
+    frozen heap and the collector back on, a killed worker is replaced, and
+    SIGTERM shuts every worker down cleanly
+    """
+    (tmp_path / "stub_api.py").write_text(STUB_API)
+    log = tmp_path / "events.log"
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=str(tmp_path), PREFORK_TEST_LOG=str(log))
+    master = subprocess.Popen(
+        [sys.executable, "serve_prefork.py", "--app", "stub_api", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "2", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    try:
+        first = wait_for(lambda: get(port))
+        assert first["pid"] != master.pid
+        assert first["frozen"] > 0
+        assert first["gc_enabled"]
+
+        # Kill a worker: the master forks a replacement, and the surviving
+        # worker and the replacement both serve
+        os.kill(first["pid"], signal.SIGKILL)
+        workers = set()
+
+        def both_workers_serve():
+            workers.add(get(port)["pid"])
+            workers.discard(first["pid"])
+            return len(workers) == 2
+
+        wait_for(both_workers_serve)
+        assert master.pid not in workers
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=15) == 0
+    finally:
+        if master.poll() is None:
+            os.killpg(master.pid, signal.SIGKILL)
+            master.wait()
+
+    events = read_log(log)
+    assert [event for event in events if event[0] == "load"] == [["load", str(master.pid)]]
+    stopped = {int(pid) for event, pid in events if event == "stop"}
+    assert workers <= stopped
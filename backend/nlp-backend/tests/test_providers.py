@@ -0,0 +1,240 @@
+"""
+Unit tests for model providers
+Providers are given small stand-in pipelines, so no models are downloaded
+"""
+import os
+from types import SimpleNamespace
+import pytest
+from lib.providers.backends import ONNXRuntimeBackend, TorchBackend, get_backend
+from lib.providers.model_providers import (
+    NERModelProvider,
+    ParaphraseModelProvider,
+    SentimentModelProvider,
+    SummarizationModelProvider,
+)
+
+
+@pytest.mark.unit
+def test_quantize_converts_linear_layers_to_int8():
+    """
+    Test that quantized mode swaps Linear layers for dynamic int8 ones
+    """
+    torch = pytest.importorskip("torch")
+    provider = NERModelProvider(quantize=True)
+    pipeline_obj = SimpleNamespace(model=torch.nn.Sequential(torch.nn.Linear(8, 8), torch.nn.ReLU()))
+
+    provider.optimize_pipeline(pipeline_obj)
+
+    layer = pipeline_obj.model[0]
+    assert isinstance(layer, torch.ao.nn.quantized.dynamic.Linear)
+    assert layer(torch.ones(1, 8)).shape == (1, 8)
+
+
+@pytest.mark.unit
+def test_quantize_is_off_by_default():
+    """
+    Test that providers keep fp32 weights unless quantization is requested
+    """
+    torch = pytest.importorskip("torch")
+    provider = NERModelProvider()
+    pipeline_obj = SimpleNamespace(model=torch.nn.Sequential(torch.nn.Linear(8, 8)))
+
+    provider.optimize_pipeline(pipeline_obj)
+
+    assert type(pipeline_obj.model[0]) is torch.nn.Linear
+
+
+@pytest.mark.unit
+def test_quantized_models_have_distinct_model_id():
+    """
+    Test that int8 results are cached separately from fp32 results
+    """
+    assert SummarizationModelProvider(quantize=True).model_id != SummarizationModelProvider().model_id
+
+
+@pytest.mark.unit
+def test_get_backend_rejects_unknown_names():
+    """
+    Test that a misconfigured backend name fails loudly
+    """
+    assert get_backend("torch").name == "torch"
+    assert get_backend("onnx").name == "onnx"
+    with pytest.raises(ValueError):
+        get_backend("tensorrt")
+
+
+@pytest.mark.unit
+def test_onnx_backend_only_supports_encoder_tasks():
+    """
+    Test that generation tasks are refused by the ONNX Runtime backend
+    """
+    with pytest.raises(ValueError):
+        ONNXRuntimeBackend().build_pipeline("summarization", "facebook/bart-large-cnn")
+
+
+@pytest.mark.unit
+def test_onnx_models_have_distinct_model_id():
+    """
+    Test that ONNX Runtime results are cached separately from torch results
+    """
+    provider = NERModelProvider(backend=ONNXRuntimeBackend())
+
+    assert provider.model_id == "dslim/bert-base-NER+onnx"
+
+
+def exports_onnx_with_dynamo() -> bool:
+    """
+    Whether torch.onnx.export uses the dynamo exporter by default (newer
+    torch), whose graphs the pinned optimum cannot export and load
+    """
+    import inspect
+    import torch
+    dynamo = inspect.signature(torch.onnx.export).parameters.get("dynamo")
+    return dynamo is not None and dynamo.default is True
+
+
+@pytest.mark.unit
+@pytest.mark.slow
+def test_onnx_and_torch_sentiment_outputs_match(tmp_path, monkeypatch):
+    """
+    Test that the ONNX Runtime export of the tiny sentiment model gives the
+    same labels and (within tolerance) the same scores as torch
+    """
+    pytest.importorskip("optimum.onnxruntime")
+    if exports_onnx_with_dynamo():
+        pytest.skip("the installed torch exports ONNX with dynamo, which optimum cannot handle")
+    monkeypatch.syspath_prepend(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+    from tiny_models import build_tiny_models
+
+    model_path = build_tiny_models(str(tmp_path / "models"))["sentiment"]
+    torch_provider = SentimentModelProvider(model_name=model_path, backend=TorchBackend())
+    onnx_provider = SentimentModelProvider(
+        model_name=model_path,
+        backend=ONNXRuntimeBackend(export_dir=str(tmp_path / "onnx"))
+    )
+    torch_provider.load_model()
+    onnx_provider.load_model()
+    texts = ["I love this product", "I hate it", "Tim Cook is in California", "a"]
+
+    torch_results = torch_provider.predict_batch(texts)
+    onnx_results = onnx_provider.predict_batch(texts)
+
+    for torch_scores, onnx_scores in zip(torch_results, onnx_results):
+        torch_by_label = {item["label"]: item["score"] for item in torch_scores}
+        onnx_by_label = {item["label"]: item["score"] for item in onnx_scores}
+        assert onnx_by_label.keys() == torch_by_label.keys()
+        assert max(onnx_by_label, key=onnx_by_label.get) == max(torch_by_label, key=torch_by_label.get)
+        for label, score in torch_by_label.items():
+            assert onnx_by_label[label] == pytest.approx(score, abs=1e-4)
+
+
+@pytest.mark.unit
+def test_failed_onnx_sentiment_load_does_not_fall_back_to_torch():
+    """
+    Test that a failing ONNX load raises instead of silently serving the
+    default torch model under the configured model's name
+    """
+    class BrokenONNXBackend(ONNXRuntimeBackend):
+        def build_pipeline(self, task, model_name, **pipeline_kwargs):
+            raise ImportError("optimum is not installed")
+
+    provider = SentimentModelProvider(backend=BrokenONNXBackend())
+
+    with pytest.raises(ImportError):
+        provider.load_model()
+    assert not provider.is_loaded()
+
+
+@pytest.mark.unit
+def test_only_single_sequence_decoding_can_stream():
+    """
+    Test that beam search is sent final-only unless greedy decoding is requested
+    """
+    paraphraser = ParaphraseModelProvider()
+    summarizer = SummarizationModelProvider()
+    summarizer.pipeline = SimpleNamespace(model=SimpleNamespace(generation_config=SimpleNamespace(num_beams=4)))
+
+    assert not paraphraser.can_stream()
+    assert paraphraser.can_stream(greedy=True)
+    assert not summarizer.can_stream()
+
+    summarizer.pipeline.model.generation_config.num_beams = 1
+    assert summarizer.can_stream()
+
+
+def stub_ner_tokenizer(is_fast=True, model_max_length=512):
+    """Tokenizer stand-in exposing what NER windowing looks at"""
+    return SimpleNamespace(
+        is_fast=is_fast,
+        model_max_length=model_max_length,
+        num_special_tokens_to_add=lambda: 2
+    )
+
+
+@pytest.mark.unit
+def test_ner_runs_long_texts_in_overlapping_windows():
+    """
+    Test that NER asks the pipeline for batched, overlapping windows
+    """
+    provider = NERModelProvider(window_stride=128, batch_size=4)
+    provider.pipeline = SimpleNamespace(tokenizer=stub_ner_tokenizer())
+
+    assert provider.window_kwargs() == {"stride": 128, "batch_size": 4}
+
+    # The overlap never exceeds half a window
+    provider.pipeline.tokenizer.model_max_length = 66
+    assert provider.window_kwargs()["stride"] == 32
+
+
+@pytest.mark.unit
+def test_ner_windowing_needs_a_fast_tokenizer_and_a_stride():
+    """
+    Test that windowing is skipped when it cannot work or is disabled
+    """
+    provider = NERModelProvider()
+    provider.pipeline = SimpleNamespace(tokenizer=stub_ner_tokenizer(is_fast=False))
+    assert provider.window_kwargs() == {}
+
+    provider.pipeline = SimpleNamespace(tokenizer=stub_ner_tokenizer())
+    provider.window_stride = 0
+    assert provider.window_kwargs() == {}
+
+
+@pytest.mark.unit
+def test_warm_up_runs_each_length_and_marks_provider_warm():
+    """
+    Test that warm-up runs one dummy input per length and survives a failing one
+    """
+    provider = SentimentModelProvider()
+    assert not provider.warmed_up
+    provider.warm_up()
+    assert not provider.warmed_up  # Nothing to warm up before the model loads
+
+    seen = []
+
+    def pipeline(text):
+        seen.append(len(text.split()))
+        if len(seen) == 2:
+            raise RuntimeError("boom")
+        return [[{"label": "positive", "score": 1.0}]]
+
+    provider.pipeline = pipeline
+    provider.warm_up(lengths=(8, 32, 128))
+
+    assert seen == [8, 32, 128]
+    assert provider.warmed_up
+
+
+@pytest.mark.unit
+def test_generation_warm_up_caps_output_length():
+    """
+    Test that generation models are warmed up with a few decoding steps only
+    """
+    provider = SummarizationModelProvider()
+    calls = []
+    provider.pipeline = lambda text, **kwargs: calls.append(kwargs)
+
+    provider.warm_up(lengths=(16,))
+
+    assert calls == [SummarizationModelProvider.WARMUP_GENERATE_KWARGS]
+    assert provider.warmed_up
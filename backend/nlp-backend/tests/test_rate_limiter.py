@@ -0,0 +1,123 @@
+"""
+Unit tests for compute-cost rate limiting
+Stub services stand in for the models, so nothing is downloaded
+"""
+import asyncio
+import httpx
+import pytest
+
+from lib.models import SentimentResponse, SummarizationResponse
+from lib.rate_limiter import CostLimiter, estimate_cost, parse_rate
+
+
+@pytest.mark.unit
+def test_parse_rate_and_estimate_cost():
+    """
+    Test rate parsing and that cost grows with task weight and input length
+    """
+    assert parse_rate("20/minute") == (20.0, 60.0)
+    assert parse_rate("5/seconds") == (5.0, 1.0)
+    with pytest.raises(ValueError):
+        parse_rate("lots")
+
+    assert estimate_cost("sentiment", ["Nice!"]) == 1.0
+    assert estimate_cost("summarization", ["Nice!"]) == 8.0
+    assert estimate_cost("summarization", ["x" * 5000]) == pytest.approx(156.25)
+    assert estimate_cost("sentiment", ["a", "b", "c"]) == 3.0
+
+
+@pytest.mark.unit
+def test_bucket_drains_and_refills():
+    """
+    Test that a bucket refuses requests it cannot cover and refills over time,
+    and that a request larger than the bucket takes all of it
+    """
+    limiter = CostLimiter({})
+    rate = (10.0, 10.0)  # 10 units, refilling 1 per second
+
+    assert limiter.acquire("ip:a", rate, 6, now=0) == 0
+    assert limiter.acquire("ip:a", rate, 6, now=0) == pytest.approx(2.0)
+    assert limiter.acquire("ip:a", rate, 6, now=2) == 0
+    assert limiter.acquire("ip:b", rate, 50, now=0) == 0
+    assert limiter.acquire("ip:b", rate, 1, now=0) == pytest.approx(1.0)
+
+
+@pytest.mark.unit
+def test_budgets_follow_api_key_tiers(monkeypatch):
+    """
+    Test that expensive requests are throttled per client (with Retry-After)
+    while a key with a larger tier and cheap requests are still served
+    """
+    import main
+    from lib import routes
+
+    # The stubs run their "model" for every request, so they always charge
+    class StubSummarizationService:
+        async def summarize_async(self, text, ratio=None, max_tokens=None, charge=None):
+            charge()
+            return SummarizationResponse(summary_text="Short.")
+
+    class StubSentimentService:
+        async def analyze_sentiment_async(self, text, charge=None):
+            charge()
+            return SentimentResponse(sentiment="Positive", confidence=0.9)
+
+    limiter = CostLimiter({"big-key": "1000/minute"}, anonymous_rate="20/minute")
+    monkeypatch.setattr(routes, "cost_limiter", limiter)
+    monkeypatch.setattr(main.app.state, "summarization_service", StubSummarizationService())
+    monkeypatch.setattr(main.app.state, "sentiment_service", StubSentimentService())
+    monkeypatch.setattr(main.limiter, "enabled", False)
+    long_text = {"text": "word " * 120}  # Costs about 19 of the 20 anonymous units
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            first = await client.post("/summarize", json=long_text)
+            throttled = await client.post("/summarize", json=long_text)
+            keyed = await client.post("/summarize", json=long_text, headers={"X-API-Key": "big-key"})
+            cheap = await client.post("/analyze", json={"text": "Nice!"})
+            return first, throttled, keyed, cheap
+
+    first, throttled, keyed, cheap = asyncio.run(run())
+
+    assert first.status_code == 200
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) > 0
+    assert keyed.status_code == 200
+    # The anonymous bucket still has a little left for a short /analyze
+    assert cheap.status_code == 200
+
+
+@pytest.mark.unit
+def test_cache_hits_and_shed_requests_are_not_charged(monkeypatch):
+    """
+    Test that only requests that run the model draw on the budget: repeated
+    texts served from the result cache and requests shed with 503 are free
+    """
+    import main
+    from lib import routes
+    from lib.cache import ResultCache
+    from lib.providers.model_providers import SentimentModelProvider
+    from lib.services import SentimentService
+
+    provider = SentimentModelProvider()
+    provider.pipeline = lambda text: [[{"label": "positive", "score": 0.9}, {"label": "negative", "score": 0.1}]]
+    provider.enable_admission(max_queue=0, max_wait_seconds=10)
+    service = SentimentService(provider, cache=ResultCache(max_bytes=1024 * 1024))
+    monkeypatch.setattr(routes, "cost_limiter", CostLimiter({}, anonymous_rate="2/minute"))
+    monkeypatch.setattr(main.app.state, "sentiment_service", service)
+    monkeypatch.setattr(main.limiter, "enabled", False)
+
+    async def run():
+        async with httpx.AsyncClient(app=main.app, base_url="http://test") as client:
+            statuses = [(await client.post("/analyze", json={"text": "Nice!"})).status_code for _ in range(3)]
+            provider.admission.in_flight = provider.admission.max_limit  # The only slot is taken
+            statuses.append((await client.post("/analyze", json={"text": "Shed"})).status_code)
+            provider.admission.in_flight = 0
+            statuses.append((await client.post("/analyze", json={"text": "Fine"})).status_code)
+            statuses.append((await client.post("/analyze", json={"text": "Over"})).status_code)
+            return statuses
+
+    statuses = asyncio.run(run())
+
+    # 2 units: "Nice!" once, its cache hits free, "Shed" free, "Fine" takes the last unit
+    assert statuses == [200, 200, 200, 503, 200, 429]
@@ -0,0 +1,527 @@
+"""
+Unit tests for the service layer
+Providers are given stub pipelines, so no models are downloaded
+"""
+import asyncio
+import threading
+import pytest
+from lib.cache import ResultCache
+from lib.providers.model_providers import (
+    NERModelProvider,
+    ParaphraseModelProvider,
+    SentimentModelProvider,
+    SummarizationModelProvider,
+    TranslationModelProvider,
+)
+from lib.services import NERService, ParaphraseService, SentimentService, SummarizationService, TranslationService
+
+
+class StubTokenizer:
+    """Whitespace tokenizer standing in for a Hugging Face tokenizer"""
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+class StubSentimentPipeline:
+    """Records every call and labels texts containing 'good' as positive"""
+
+    def __init__(self):
+        self.tokenizer = StubTokenizer()
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        if isinstance(texts, str):
+            texts = [texts]
+        self.calls.append(list(texts))
+        return [
+            [
+                {"label": "positive", "score": 0.9 if "good" in text else 0.1},
+                {"label": "negative", "score": 0.1 if "good" in text else 0.9},
+            ]
+            for text in texts
+        ]
+
+
+@pytest.fixture
+def sentiment_pipeline():
+    return StubSentimentPipeline()
+
+
+@pytest.fixture
+def sentiment_service(sentiment_pipeline):
+    provider = SentimentModelProvider()
+    provider.pipeline = sentiment_pipeline
+    return SentimentService(provider, batch_size=2)
+
+
+@pytest.mark.unit
+def test_analyze_batch_keeps_input_order(sentiment_service):
+    """
+    Test that results come back in the order the texts were sent
+    """
+    texts = ["a good but rather long review", "bad", "good", "very bad service"]
+
+    results = sentiment_service.analyze_batch(texts)
+
+    assert [r.text for r in results] == texts
+    assert [r.sentiment for r in results] == ["Positive", "Negative", "Positive", "Negative"]
+
+
+@pytest.mark.unit
+def test_analyze_batch_runs_duplicates_once(sentiment_service, sentiment_pipeline):
+    """
+    Test that identical texts are only sent to the model once
+    """
+    texts = ["good", "bad", "good", "good", "bad"]
+
+    results = sentiment_service.analyze_batch(texts)
+
+    assert len(results) == len(texts)
+    inferred = [text for call in sentiment_pipeline.calls for text in call]
+    assert sorted(inferred) == ["bad", "good"]
+
+
+@pytest.mark.unit
+def test_analyze_batch_buckets_by_token_length(sentiment_service, sentiment_pipeline):
+    """
+    Test that texts are grouped into length-sorted batches of batch_size
+    """
+    texts = ["one two three four", "one", "one two three", "one two"]
+
+    sentiment_service.analyze_batch(texts)
+
+    assert sentiment_pipeline.calls == [
+        ["one", "one two"],
+        ["one two three", "one two three four"],
+    ]
+
+
+@pytest.fixture
+def cached_sentiment_service(sentiment_pipeline):
+    provider = SentimentModelProvider()
+    provider.pipeline = sentiment_pipeline
+    return SentimentService(provider, cache=ResultCache(max_bytes=1024 * 1024))
+
+
+@pytest.mark.unit
+def test_repeated_text_is_served_from_cache(cached_sentiment_service, sentiment_pipeline):
+    """
+    Test that a repeated single-text request does not run the model again
+    """
+    first = cached_sentiment_service.analyze_sentiment("good stuff")
+    second = cached_sentiment_service.analyze_sentiment("good stuff")
+
+    assert first == second
+    assert sentiment_pipeline.calls == [["good stuff"]]
+    assert cached_sentiment_service.cache.hits == 1
+
+
+@pytest.mark.unit
+def test_analyze_batch_only_runs_uncached_texts(cached_sentiment_service, sentiment_pipeline):
+    """
+    Test that batch analysis reuses cached results and infers only new texts
+    """
+    cached_sentiment_service.analyze_batch(["good", "bad"])
+    sentiment_pipeline.calls.clear()
+
+    results = cached_sentiment_service.analyze_batch(["bad", "good", "new and good"])
+
+    assert [r.sentiment for r in results] == ["Negative", "Positive", "Positive"]
+    assert sentiment_pipeline.calls == [["new and good"]]
+
+
+class StubNERPipeline:
+    """Records every call and tags each capitalized word as an organization"""
+
+    def __init__(self):
+        self.tokenizer = StubTokenizer()
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        if isinstance(texts, str):
+            return self([texts])[0]
+        self.calls.append((list(texts), batch_size))
+        return [
+            [{"word": word, "entity_group": "ORG", "score": 0.9} for word in text.split() if word[0].isupper()]
+            for text in texts
+        ]
+
+
+@pytest.mark.unit
+def test_extract_entities_batch_runs_uncached_distinct_texts_together():
+    """
+    Test that a batch of texts goes to the NER pipeline in one call, skipping
+    cached and repeated texts, and that results keep the input order
+    """
+    pipeline = StubNERPipeline()
+    provider = NERModelProvider(window_stride=0, batch_size=8)
+    provider.pipeline = pipeline
+    service = NERService(provider, cache=ResultCache(max_bytes=1024 * 1024))
+    service.extract_entities("Apple in Cupertino")
+    pipeline.calls.clear()
+
+    texts = ["Tim at Apple", "Apple in Cupertino", "nothing here", "Tim at Apple"]
+    results = service.extract_entities_batch(texts)
+
+    assert [r.text for r in results] == texts
+    assert [[e.text for e in r.entities] for r in results] == [["Tim", "Apple"], ["Apple", "Cupertino"], [], ["Tim", "Apple"]]
+    assert len(pipeline.calls) == 1
+    batch, batch_size = pipeline.calls[0]
+    assert sorted(batch) == ["Tim at Apple", "nothing here"]
+    assert batch_size == 2
+
+
+class StubStreamingSummarizer(SummarizationModelProvider):
+    """Generates a fixed summary word by word through the streaming callback"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def predict_stream(self, text, on_text, greedy=False, cancelled=None):
+        self.calls += 1
+        words = ["A ", "short ", "summary"]
+        for word in words:
+            on_text(word)
+        return [{"summary_text": "".join(words)}]
+
+
+def collect(events):
+    """Drain a service event stream into a list"""
+    async def drain():
+        return [event async for event in events]
+    return asyncio.run(drain())
+
+
+@pytest.mark.unit
+def test_summarize_stream_yields_tokens_then_response():
+    """
+    Test that streamed pieces arrive in order, followed by the full response
+    """
+    service = SummarizationService(StubStreamingSummarizer())
+
+    events = collect(service.summarize_stream("some long text"))
+
+    assert events[:-1] == [("token", "A "), ("token", "short "), ("token", "summary")]
+    assert events[-1][0] == "done"
+    assert events[-1][1].summary_text == "A short summary"
+
+
+@pytest.mark.unit
+def test_summarize_stream_replays_cached_response():
+    """
+    Test that a cached summary is sent as the final event without generating again
+    """
+    provider = StubStreamingSummarizer()
+    service = SummarizationService(provider, cache=ResultCache(max_bytes=1024 * 1024))
+
+    collect(service.summarize_stream("some long text"))
+    events = collect(service.summarize_stream("some long text"))
+
+    assert provider.calls == 1
+    assert [event for event, _ in events] == ["done"]
+    assert events[0][1].summary_text == "A short summary"
+
+
+class StubSummarizationTokenizer(StubTokenizer):
+    """Whitespace tokenizer with a 10-token window (8 after special tokens)"""
+
+    model_max_length = 10
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+
+class StubSummarizationPipeline:
+    """Records every call and "summarizes" a text as its first two words"""
+
+    def __init__(self):
+        self.tokenizer = StubSummarizationTokenizer()
+        self.calls = []
+        self.generate_kwargs = []
+
+    def __call__(self, texts, batch_size=None, truncation=False, **generate_kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        self.calls.append(list(texts))
+        self.generate_kwargs.append(generate_kwargs)
+        return [{"summary_text": " ".join(text.split()[:2])} for text in texts]
+
+
+@pytest.fixture
+def summarization_pipeline():
+    return StubSummarizationPipeline()
+
+
+@pytest.fixture
+def summarization_provider(summarization_pipeline):
+    provider = SummarizationModelProvider()
+    provider.pipeline = summarization_pipeline
+    return provider
+
+
+@pytest.mark.unit
+def test_chunk_text_packs_sentences_within_the_window(summarization_provider):
+    """
+    Test that chunks end on sentence boundaries and stay within the token budget
+    """
+    text = "One two three. Four five six. Seven eight nine. Ten."
+
+    chunks = summarization_provider.chunk_text(text)
+
+    assert chunks == ["One two three. Four five six.", "Seven eight nine. Ten."]
+
+
+@pytest.mark.unit
+def test_chunk_text_splits_overlong_sentences_between_words(summarization_provider):
+    """
+    Test that a sentence longer than the window is split into word groups
+    """
+    text = "a b c d e f g h i j k l"
+
+    chunks = summarization_provider.chunk_text(text)
+
+    assert chunks == ["a b c d e f g h", "i j k l"]
+
+
+@pytest.mark.unit
+def test_summarize_document_summarizes_chunks_then_their_summaries(summarization_provider, summarization_pipeline):
+    """
+    Test the map stage runs all chunks as one (length-sorted) batch and the
+    reduce stage summarizes the partial summaries in document order
+    """
+    service = SummarizationService(summarization_provider)
+    text = "Alpha one two three. Beta four five six. Gamma seven eight nine."
+
+    response = asyncio.run(service.summarize_document_async(text))
+
+    assert summarization_pipeline.calls == [
+        ["Gamma seven eight nine.", "Alpha one two three. Beta four five six."],
+        ["Alpha one Gamma seven"],
+    ]
+    assert response.summary_text == "Alpha one"
+
+
+@pytest.mark.unit
+def test_admitted_document_is_not_shed_between_stages(summarization_provider, summarization_pipeline):
+    """
+    Test that a document admitted by its first stage still finishes when the
+    model's queue fills up while it is being summarized
+    """
+    summarization_provider.enable_admission(max_queue=0, max_wait_seconds=10)
+    service = SummarizationService(summarization_provider)
+    text = "Alpha one two three. Beta four five six. Gamma seven eight nine."
+    chunk_text = summarization_provider.chunk_text
+    saturated = threading.Event()
+
+    def chunk_then_wait(text):
+        chunks = chunk_text(text)
+        saturated.wait(5)
+        return chunks
+
+    summarization_provider.chunk_text = chunk_then_wait
+
+    async def run():
+        document = asyncio.ensure_future(service.summarize_document_async(text))
+        await asyncio.sleep(0.05)
+        # Other requests have taken every slot since the document was admitted
+        summarization_provider.admission.in_flight += summarization_provider.admission.max_limit
+        saturated.set()
+        response = await document
+        summarization_provider.admission.in_flight -= summarization_provider.admission.max_limit
+        return response
+
+    response = asyncio.run(run())
+
+    assert response.summary_text == "Alpha one"
+    assert len(summarization_pipeline.calls) == 2
+    assert summarization_provider.admission.in_flight == 0
+
+
+@pytest.mark.unit
+def test_summarize_batch_runs_uncached_distinct_texts_once(summarization_provider, summarization_pipeline):
+    """
+    Test that batch summaries skip cached and duplicate texts and keep input order
+    """
+    summarization_provider.min_input_tokens = 0
+    service = SummarizationService(summarization_provider, cache=ResultCache(max_bytes=1024 * 1024))
+    service.summarize("one two three")
+    summarization_pipeline.calls.clear()
+
+    responses = service.summarize_batch(["four five six", "one two three", "four five six"])
+
+    assert summarization_pipeline.calls == [["four five six"]]
+    assert [r.summary_text for r in responses] == ["four five", "one two", "four five"]
+
+
+@pytest.mark.unit
+def test_summary_length_is_planned_from_the_input(summarization_provider):
+    """
+    Test that length bounds scale with the input, within the configured and
+    requested caps
+    """
+    summarization_provider.min_input_tokens = 4
+    words = lambda n: " ".join(["word"] * n)
+
+    assert summarization_provider.plan_generation(words(3)) is None
+    assert summarization_provider.plan_generation(words(40)) == {"max_length": 24, "min_length": 12}
+    assert summarization_provider.plan_generation(words(1000)) == {"max_length": 150, "min_length": 30}
+    assert summarization_provider.plan_generation(words(40), ratio=1.0) == {"max_length": 40, "min_length": 20}
+    assert summarization_provider.plan_generation(words(1000), max_tokens=64) == {"max_length": 64, "min_length": 30}
+    # Short texts are still summarized when they exceed the requested length
+    assert summarization_provider.plan_generation(words(3), max_tokens=2) == {"max_length": 2, "min_length": 1}
+
+
+@pytest.mark.unit
+def test_short_texts_are_returned_without_running_the_model(summarization_provider, summarization_pipeline):
+    """
+    Test that texts below the threshold skip generation (and the executor)
+    """
+    service = SummarizationService(summarization_provider)
+    submitted = []
+    summarization_provider.run_in_executor = lambda *args: submitted.append(args)
+
+    response = asyncio.run(service.summarize_async("Too short to summarize."))
+    events = collect(service.summarize_stream("Too short to summarize."))
+
+    assert response.summary_text == "Too short to summarize."
+    assert [event for event, _ in events] == ["token", "done"]
+    assert submitted == [] and summarization_pipeline.calls == []
+
+
+@pytest.mark.unit
+def test_summarize_batch_groups_texts_by_planned_length(summarization_provider, summarization_pipeline):
+    """
+    Test that batch summaries are generated per planned length, skipping short texts
+    """
+    summarization_provider.min_input_tokens = 4
+    long_text, longer_text = " ".join(["a"] * 20), " ".join(["b"] * 40)
+    service = SummarizationService(summarization_provider)
+
+    responses = service.summarize_batch(["a b", long_text, longer_text])
+
+    assert [r.summary_text for r in responses] == ["a b", "a a", "b b"]
+    assert summarization_pipeline.calls == [[long_text], [longer_text]]
+    assert summarization_pipeline.generate_kwargs == [
+        {"max_length": 16, "min_length": 8},
+        {"max_length": 24, "min_length": 12},
+    ]
+
+
+class StubTranslationPipeline:
+    """Records every call and 'translates' by prefixing the target language"""
+
+    def __init__(self, target_lang):
+        self.tokenizer = StubTokenizer()
+        self.target_lang = target_lang
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None, truncation=False):
+        self.calls.append(list(texts))
+        return [{"translation_text": f"{self.target_lang}:{text}"} for text in texts]
+
+
+class StubTranslationProvider(TranslationModelProvider):
+    """Serves one stub pipeline per language pair"""
+
+    def __init__(self):
+        super().__init__()
+        self.pipelines = {}
+
+    def load_model(self, source_lang, target_lang):
+        return self.pipelines.setdefault(f"{source_lang}-{target_lang}", StubTranslationPipeline(target_lang))
+
+
+@pytest.mark.unit
+def test_translate_items_groups_pairs_and_keeps_input_order():
+    """
+    Test that mixed language pairs are batched per pair, shortest texts first,
+    skipping cached and duplicate texts, with results in input order
+    """
+    provider = StubTranslationProvider()
+    service = TranslationService(provider, cache=ResultCache(max_bytes=1024 * 1024), batch_size=2)
+    service.translate_batch(["hi"], "en", "fr")
+    provider.pipelines["en-fr"].calls.clear()
+    items = [
+        ("a rather long sentence", "en", "fr"),
+        ("hello", "en", "es"),
+        ("hi", "en", "fr"),
+        ("two words", "en", "fr"),
+        ("one", "en", "fr"),
+        ("hello", "en", "es"),
+    ]
+
+    results = asyncio.run(service.translate_items_async(items))
+
+    assert results == [
+        "fr:a rather long sentence", "es:hello", "fr:hi", "fr:two words", "fr:one", "es:hello"
+    ]
+    assert provider.pipelines["en-fr"].calls == [["one", "two words"], ["a rather long sentence"]]
+    assert provider.pipelines["en-es"].calls == [["hello"]]
+
+
+class StubParaphrasePipeline:
+    """Records generation overrides and returns one numbered output per sequence"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text, **kwargs):
+        self.calls.append(kwargs)
+        return [{"generated_text": f"{text} {i}"} for i in range(kwargs.get("num_return_sequences", 1))]
+
+
+@pytest.fixture
+def paraphrase_pipeline():
+    return StubParaphrasePipeline()
+
+
+@pytest.fixture
+def paraphrase_service(paraphrase_pipeline):
+    provider = ParaphraseModelProvider()
+    provider.pipeline = paraphrase_pipeline
+    return ParaphraseService(provider, cache=ResultCache(max_bytes=1024 * 1024), max_candidates=3, max_beams=6)
+
+
+@pytest.mark.unit
+def test_paraphrase_generates_only_what_is_asked_for(paraphrase_service, paraphrase_pipeline):
+    """
+    Test that default requests decode one sequence, extra candidates are
+    returned only when requested, and greedy mode skips beam search
+    """
+    default = paraphrase_service.paraphrase("hello")
+    several = paraphrase_service.paraphrase("hello", num_candidates=3, num_beams=4, max_length=20)
+    fast = paraphrase_service.paraphrase("hello", greedy=True)
+
+    assert paraphrase_pipeline.calls == [
+        {},
+        {"num_beams": 4, "num_return_sequences": 3, "max_length": 20},
+        {"num_beams": 1, "num_return_sequences": 1, "do_sample": False},
+    ]
+    assert default.paraphrased_text == "hello 0" and default.candidates is None
+    assert several.candidates == ["hello 0", "hello 1", "hello 2"]
+    assert fast.candidates is None
+
+    # Different settings are cached separately
+    paraphrase_service.paraphrase("hello", num_candidates=3, num_beams=4, max_length=20)
+    assert len(paraphrase_pipeline.calls) == 3
+
+
+@pytest.mark.unit
+def test_paraphrase_settings_are_checked_against_ceilings(paraphrase_service, paraphrase_pipeline):
+    """
+    Test that settings beyond the server's ceilings or contradicting each
+    other are rejected without running the model
+    """
+    for settings in (
+        {"num_candidates": 4},
+        {"num_beams": 7},
+        {"max_length": 61},
+        {"num_candidates": 2, "greedy": True},
+        {"num_candidates": 3, "num_beams": 2},
+    ):
+        with pytest.raises(ValueError):
+            paraphrase_service.paraphrase("hello", **settings)
+
+    assert paraphrase_pipeline.calls == []
@@ -0,0 +1,53 @@
+"""
+Tests that importing the API stays fast
+
+Each check runs in a fresh interpreter, since this test session has
+already imported everything.
+"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# `import main` took about 4s while transformers was imported at module
+# level; it now takes well under 1s
+IMPORT_BUDGET_SECONDS = 2.0
+
+HEAVY_MODULES = ("transformers", "torch")
+
+
+def run_import(module: str) -> dict:
+    """Import `module` in a fresh interpreter; report its import time and heavy modules loaded"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+@pytest.mark.unit
+def test_api_layer_does_not_import_ml_libraries():
+    """
+    Test that routes, services and providers import without transformers or torch
+    """
+    assert run_import("lib.routes")["loaded"] == []
+
+
+@pytest.mark.unit
+def test_import_main_within_budget():
+    """
+    Test that `import main` stays lazy and within its import-time budget
+    """
+    result = run_import("main")
+
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
@@ -1,6 +1,7 @@
 """
 Tests for text summarization endpoint
 """
+import json
 import pytest
 
 
@@ -81,3 +82,56 @@ def test_summarization_empty_text(client):
     # Should return validation error
     assert response.status_code == 422
 
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_summarization_stream(client):
+    """
+    Test that the streaming endpoint sends server-sent events ending with the full response
+    """
+    text = "Artificial intelligence has revolutionized many industries in recent years. Machine learning algorithms can now process vast amounts of data and identify patterns that humans might miss. Deep learning uses neural networks with multiple layers to extract high-level features from raw input."
+    response = client.post("/summarize-stream", json={"text": text, "greedy": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    names = [lines[0][len("event: "):] for lines in events]
+    assert names[-1] == "done"
+    assert set(names[:-1]) <= {"token"}
+
+    final = json.loads(events[-1][1][len("data: "):])
+    tokens = "".join(json.loads(lines[1][len("data: "):])["text"] for lines in events[:-1])
+    assert len(final["summary_text"]) > 0
+    assert tokens.strip() == final["summary_text"].strip()
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+def test_summarize_document_longer_than_model_window(client):
+    """
+    Test that a document longer than the model's input window is summarized as a whole
+    """
+    paragraph = (
+        "The city council met on Tuesday to discuss the new transport plan. "
+        "Members debated funding for bus lanes, cycle paths and a tram extension. "
+        "Residents raised concerns about construction noise and parking. "
+    )
+    text = paragraph * 60
+
+    response = client.post("/summarize-document", json={"text": text})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["summary_text"]) > 0
+    assert len(data["summary_text"]) < len(text)
+
+
+@pytest.mark.integration
+def test_summarize_document_too_long(client):
+    """
+    Test that documents over the 50000 character limit are rejected
+    """
+    response = client.post("/summarize-document", json={"text": "a" * 50001})
+
+    assert response.status_code == 422